@@ -0,0 +1,66 @@
+#ifndef SAMPLE_ASYNC_H
+#define SAMPLE_ASYNC_H
+
+#include <pthread.h>
+#include <stdatomic.h>
+#include <stdbool.h>
+#include <time.h>
+
+#include "list.h"
+#include "sample_binary.h"
+#include "sensor.h"
+
+// A thread polling a slow sensor at its own update period and publishing the
+// last values it read (with the time they were read at)
+struct sensor_reader {
+    struct sensor *sensor;
+    pthread_t thread;
+    pthread_mutex_t lock;
+    long period_us;
+
+    // Position of the sensor values and of its age column in the table
+    int first_col;
+    int ncols;
+    int age_col;
+
+    // Protected by lock
+    double *values;
+    double read_us;
+    struct timespec stamp;
+
+    // Private to the reader thread
+    double *scratch;
+    atomic_bool *running;
+};
+
+// Slow sensors are read by their own threads, the others by the sampling loop
+struct sample_async {
+    int nreaders;
+    struct sensor_reader *readers;
+    atomic_bool running;
+};
+
+// Number of extra columns (one age column per slow sensor) the table shall
+// reserve for sample_async_start
+extern int sample_async_extra_cols(struct list_head *sensors);
+
+// Read each slow sensor once and start its reader thread; sensors with no
+// update period are polled every period_us; age columns start from first_col
+// Success if return >= 0
+extern int sample_async_start(struct sample_async *async,
+                              struct list_head *sensors,
+                              struct sample_table *table, int first_col,
+                              long period_us);
+
+// Stop all reader threads and release their resources
+extern void sample_async_stop(struct sample_async *async);
+
+// Read the fast sensors and collect the values last published by the reader
+// threads into the table, together with their age (never blocks on I/O); if
+// read_us is not NULL, the latency of the last read of each sensor is stored
+// in it (in list order)
+extern void sample_async_store(struct sample_async *async,
+                               struct list_head *sensors,
+                               struct sample_table *table, double *read_us);
+
+#endif // SAMPLE_ASYNC_H
@@ -0,0 +1,60 @@
+#ifndef SAMPLE_BINARY_H
+#define SAMPLE_BINARY_H
+
+#include <stdint.h>
+#include <stdio.h>
+
+#include "list.h"
+#include "sensor.h"
+
+// Binary output format (all fields in host byte order):
+//  - a struct sample_header;
+//  - ncols struct sample_column, describing each value of a record;
+//  - one record per sample: a uint64_t flags word followed by ncols doubles.
+
+#define SAMPLE_BINARY_MAGIC "SMPLBIN"
+#define SAMPLE_BINARY_VERSION 1
+
+// The sample is the first one after a breakpoint (SIGUSR1)
+#define SAMPLE_FLAG_BREAKPOINT 0x1ULL
+
+struct sample_header {
+    char magic[8];
+    uint32_t version;
+    uint32_t ncols;
+    int64_t period_us;
+};
+
+// The columns of all sensors and the values of the last sample
+struct sample_table {
+    int ncols;
+    struct sample_column *cols;
+    double *values;
+};
+
+// Collect the columns of all sensors in the list, followed by extra_cols
+// columns left to the caller
+// Success if return >= 0
+extern int sample_table_init(struct sample_table *table,
+                             struct list_head *sensors, int extra_cols);
+
+extern void sample_table_free(struct sample_table *table);
+
+// Store the last sample of all sensors in the list
+extern void sample_table_store(struct sample_table *table,
+                               struct list_head *sensors);
+
+// Print the values stored in the table in text format (the same produced by
+// print_last)
+extern void sample_text_write_record(FILE *f, const struct sample_table *table,
+                                     uint64_t flags);
+
+// Success if return >= 0
+extern int sample_binary_write_header(FILE *f, const struct sample_table *table,
+                                      long period_us);
+
+// Success if return >= 0
+extern int sample_binary_write_record(FILE *f, const struct sample_table *table,
+                                      uint64_t flags);
+
+#endif // SAMPLE_BINARY_H
@@ -0,0 +1,49 @@
+#ifndef SAMPLE_INSTR_H
+#define SAMPLE_INSTR_H
+
+#include <time.h>
+
+#include "list.h"
+#include "sample_binary.h"
+#include "sensor.h"
+
+// Self-instrumentation of the sampling loop, added to each sample as extra
+// columns (all in microseconds):
+//  - sampler_wakeup_late_us: how late the loop woke up with respect to the
+//    beginning of the period;
+//  - sampler_busy_us: time spent by the loop on the previous sample, from
+//    wakeup to the end of its output;
+//  - <sensor>_read_us: how long the last read of each sensor took.
+struct sample_instr {
+    int first_col;
+    int nsensors;
+
+    // Read latency of each sensor, in list order
+    double *read_us;
+};
+
+// Number of extra columns the table shall reserve for sample_instr_init
+extern int sample_instr_extra_cols(struct list_head *sensors);
+
+// Describe the instrumentation columns, starting from first_col
+// Success if return >= 0
+extern int sample_instr_init(struct sample_instr *instr,
+                             struct list_head *sensors,
+                             struct sample_table *table, int first_col);
+
+extern void sample_instr_free(struct sample_instr *instr);
+
+// Read the sensor, returns how long it took in microseconds
+extern double sensor_read_timed(struct sensor *sensor);
+
+// Read all sensors in the list, recording the latency of each one
+extern void sample_instr_read(struct sample_instr *instr,
+                              struct list_head *sensors);
+
+// Store the instrumentation values of the current sample in the table
+extern void sample_instr_store(struct sample_instr *instr,
+                               struct sample_table *table,
+                               struct timespec target, struct timespec wakeup,
+                               double busy_us);
+
+#endif // SAMPLE_INSTR_H
@@ -0,0 +1,37 @@
+#ifndef SAMPLE_RING_H
+#define SAMPLE_RING_H
+
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdio.h>
+
+#include "sample_binary.h"
+
+// Preallocated in-memory buffer of samples, written out only when explicitly
+// flushed (or when full), so that no I/O is performed while sampling
+struct sample_ring {
+    size_t capacity;
+    size_t count;
+    int ncols;
+    uint64_t *flags;
+    double *values;
+};
+
+// Success if return >= 0
+extern int sample_ring_init(struct sample_ring *ring, size_t capacity,
+                            int ncols);
+
+extern void sample_ring_free(struct sample_ring *ring);
+
+// Append the last sample stored in the table, returns true if the ring is full
+// and must be flushed
+extern bool sample_ring_push(struct sample_ring *ring,
+                             const struct sample_table *table, uint64_t flags);
+
+// Write all samples in the ring, either in binary or in text format (the same
+// produced by print_last), and empty it
+// Success if return >= 0
+extern int sample_ring_flush(struct sample_ring *ring, FILE *f,
+                             const struct sample_table *table, bool binary);
+
+#endif // SAMPLE_RING_H
@@ -1,6 +1,8 @@
 #ifndef SENSOR_H
 #define SENSOR_H
 
+#include <stdbool.h>
+
 #include "list.h"
 
 enum sample_type {
@@ -10,7 +12,22 @@ enum sample_type {
 #define METHOD(ret, name, ...) ret (*name)(__VA_ARGS__)
 
 #define __SENSOR_INITIALIZER                                                   \
-    { {}, -1, "", NULL, NULL, NULL }
+    { {}, -1, "", NULL, NULL, NULL, NULL, NULL, false }
+
+// How a value is printed in text mode
+enum sample_column_type {
+    SAMPLE_INTEGER = 0,
+    SAMPLE_REAL = 1,
+};
+
+// Description of a single value produced by a sensor. In text mode the value is
+// printed as "<name><sep><unit> <value>" (or "<name> <value>" without unit).
+struct sample_column {
+    char name[46];
+    char unit[16];
+    char sep;
+    char type;
+};
 
 // TODO: standard sensor name
 struct sensor {
@@ -20,6 +37,22 @@ struct sensor {
     METHOD(int, read, struct sensor *self);
     METHOD(void, close, struct sensor *self);
     METHOD(void, print_last, struct sensor *self);
+
+    // Describe the values of the sensor in cols (if not NULL), in the same
+    // order in which they are stored by store_last; returns their number
+    METHOD(int, columns, struct sensor *self, struct sample_column *cols);
+
+    // Store the last data sample collected in values, returns the number of
+    // values stored
+    METHOD(int, store_last, struct sensor *self, double *values);
+
+    // Reading the sensor involves slow device I/O (in async mode the sensor
+    // is read by its own thread)
+    bool slow;
 };
 
+// Fill a column description (name and unit are truncated if too long)
+extern void sample_column_set(struct sample_column *col, const char *name,
+                              const char *unit, char sep, char type);
+
 #endif // SENSOR_H
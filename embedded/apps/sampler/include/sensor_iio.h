@@ -25,6 +25,12 @@ extern int sensor_iio_read(struct sensor *sself);
 // Print last data sample collected
 extern void sensor_iio_print_last(struct sensor *sself);
 
+// Describe the values of each data sample
+extern int sensor_iio_columns(struct sensor *sself, struct sample_column *cols);
+
+// Store last data sample collected
+extern int sensor_iio_store_last(struct sensor *sself, double *values);
+
 // ============ DETECTION AND INITIALIZATION ============ //
 
 extern struct list_head *sensors_iio_init();
@@ -29,6 +29,12 @@ extern int sensor_ina231_read(struct sensor *sself);
 // Print last data sample collected
 extern void sensor_ina231_print_last(struct sensor *sself);
 
+// Describe the values of each data sample
+extern int sensor_ina231_columns(struct sensor *sself, struct sample_column *cols);
+
+// Store last data sample collected
+extern int sensor_ina231_store_last(struct sensor *sself, double *values);
+
 // ============ DETECTION AND INITIALIZATION ============ //
 
 extern struct list_head *sensors_ina231_init();
@@ -71,4 +71,14 @@ extern int time_cmp(struct timespec t1, struct timespec t2);
  */
 extern int time_diff(struct timespec *tdest, struct timespec t2, struct timespec t1);
 
+/** Calculates the difference between two times (t2 - t1) in microseconds.
+ * The result is negative if t2 is lower than t1.
+ */
+extern long time_diff_us(struct timespec t2, struct timespec t1);
+
+/** Calculates the difference between two times (t2 - t1) in nanoseconds.
+ * The result is negative if t2 is lower than t1.
+ */
+extern long time_diff_ns(struct timespec t2, struct timespec t1);
+
 #endif
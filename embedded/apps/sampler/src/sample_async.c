@@ -0,0 +1,185 @@
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "periodic.h"
+#include "sample_async.h"
+#include "sample_instr.h"
+#include "time_utils.h"
+
+int sample_async_extra_cols(struct list_head *sensors) {
+    struct sensor *pos;
+    int nslow = 0;
+
+    list_for_each_entry(pos, sensors, list) {
+        if (pos->slow)
+            nslow++;
+    }
+
+    return nslow;
+}
+
+static void sensor_reader_publish(struct sensor_reader *reader,
+                                  double read_us) {
+    reader->sensor->store_last(reader->sensor, reader->scratch);
+
+    pthread_mutex_lock(&reader->lock);
+    memcpy(reader->values, reader->scratch, reader->ncols * sizeof(double));
+    reader->read_us = read_us;
+    clock_gettime(CLOCK_MONOTONIC, &reader->stamp);
+    pthread_mutex_unlock(&reader->lock);
+}
+
+static void *sensor_reader_main(void *arg) {
+    struct sensor_reader *reader = arg;
+    struct timespec at;
+
+    // The first sample was read by sample_async_start
+    rt_start_period(&at);
+    rt_next_period(&at, reader->period_us);
+
+    while (atomic_load(reader->running)) {
+        sensor_reader_publish(reader, sensor_read_timed(reader->sensor));
+
+        // Wait next activation time
+        rt_next_period(&at, reader->period_us);
+    }
+
+    return NULL;
+}
+
+static void sensor_reader_free(struct sensor_reader *reader) {
+    free(reader->values);
+    free(reader->scratch);
+    reader->values = NULL;
+    reader->scratch = NULL;
+}
+
+int sample_async_start(struct sample_async *async, struct list_head *sensors,
+                       struct sample_table *table, int first_col,
+                       long period_us) {
+    struct sensor *pos;
+    sigset_t all, old;
+    int nslow = sample_async_extra_cols(sensors);
+    int i = 0;
+
+    async->nreaders = 0;
+    async->readers = calloc(nslow > 0 ? nslow : 1, sizeof(*async->readers));
+    atomic_init(&async->running, true);
+
+    if (async->readers == NULL)
+        return -1;
+
+    // Signals are handled by the sampling loop only
+    sigfillset(&all);
+    pthread_sigmask(SIG_BLOCK, &all, &old);
+
+    list_for_each_entry(pos, sensors, list) {
+        const int ncols = pos->columns(pos, NULL);
+
+        if (!pos->slow) {
+            i += ncols;
+            continue;
+        }
+
+        struct sensor_reader *reader = &async->readers[async->nreaders];
+        char name[sizeof(table->cols[0].name) + 8];
+
+        reader->sensor = pos;
+        reader->period_us = pos->period_us > 0 ? pos->period_us : period_us;
+        reader->first_col = i;
+        reader->ncols = ncols;
+        reader->age_col = first_col + async->nreaders;
+        reader->values = calloc(ncols > 0 ? ncols : 1, sizeof(double));
+        reader->scratch = calloc(ncols > 0 ? ncols : 1, sizeof(double));
+        reader->running = &async->running;
+
+        if (reader->values == NULL || reader->scratch == NULL) {
+            sensor_reader_free(reader);
+            break;
+        }
+
+        snprintf(name, sizeof(name), "%s_age", table->cols[i].name);
+        sample_column_set(&table->cols[reader->age_col], name, "us", '_',
+                          SAMPLE_INTEGER);
+
+        // Publish a first sample before the sampling loop starts
+        pthread_mutex_init(&reader->lock, NULL);
+        sensor_reader_publish(reader, sensor_read_timed(pos));
+
+        if (pthread_create(&reader->thread, NULL, sensor_reader_main,
+                           reader) != 0) {
+            pthread_mutex_destroy(&reader->lock);
+            sensor_reader_free(reader);
+            break;
+        }
+
+        async->nreaders++;
+        i += ncols;
+    }
+
+    pthread_sigmask(SIG_SETMASK, &old, NULL);
+
+    if (async->nreaders < nslow) {
+        sample_async_stop(async);
+        return -1;
+    }
+
+    return 0;
+}
+
+void sample_async_stop(struct sample_async *async) {
+    atomic_store(&async->running, false);
+
+    for (int r = 0; r < async->nreaders; ++r) {
+        struct sensor_reader *reader = &async->readers[r];
+
+        pthread_join(reader->thread, NULL);
+        pthread_mutex_destroy(&reader->lock);
+        sensor_reader_free(reader);
+    }
+
+    free(async->readers);
+    async->readers = NULL;
+    async->nreaders = 0;
+}
+
+void sample_async_store(struct sample_async *async, struct list_head *sensors,
+                        struct sample_table *table, double *read_us) {
+    struct sensor *pos;
+    struct timespec now;
+    int i = 0;
+    int k = 0;
+    int r = 0;
+
+    list_for_each_entry(pos, sensors, list) {
+        if (!pos->slow) {
+            const double us = sensor_read_timed(pos);
+            if (read_us != NULL)
+                read_us[k] = us;
+            i += pos->store_last(pos, table->values + i);
+        } else {
+            if (read_us != NULL && r < async->nreaders) {
+                pthread_mutex_lock(&async->readers[r].lock);
+                read_us[k] = async->readers[r].read_us;
+                pthread_mutex_unlock(&async->readers[r].lock);
+            }
+            i += pos->columns(pos, NULL);
+            r++;
+        }
+        k++;
+    }
+
+    clock_gettime(CLOCK_MONOTONIC, &now);
+
+    for (int r = 0; r < async->nreaders; ++r) {
+        struct sensor_reader *reader = &async->readers[r];
+
+        pthread_mutex_lock(&reader->lock);
+        memcpy(table->values + reader->first_col, reader->values,
+               reader->ncols * sizeof(double));
+        table->values[reader->age_col] = time_diff_us(now, reader->stamp);
+        pthread_mutex_unlock(&reader->lock);
+    }
+}
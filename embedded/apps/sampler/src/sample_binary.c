@@ -0,0 +1,121 @@
+#include <stdlib.h>
+#include <string.h>
+
+#include "sample_binary.h"
+
+// The host reader relies on this exact layout
+_Static_assert(sizeof(struct sample_header) == 24, "bad sample_header size");
+_Static_assert(sizeof(struct sample_column) == 64, "bad sample_column size");
+
+void sample_column_set(struct sample_column *col, const char *name,
+                       const char *unit, char sep, char type) {
+    memset(col, 0, sizeof(*col));
+
+    strncpy(col->name, name, sizeof(col->name) - 1);
+    strncpy(col->unit, unit, sizeof(col->unit) - 1);
+
+    col->sep = sep;
+    col->type = type;
+}
+
+int sample_table_init(struct sample_table *table, struct list_head *sensors,
+                      int extra_cols) {
+    struct sensor *pos;
+    int ncols = extra_cols;
+
+    list_for_each_entry(pos, sensors, list) {
+        ncols += pos->columns(pos, NULL);
+    }
+
+    table->ncols = ncols;
+    table->cols = calloc(ncols > 0 ? ncols : 1, sizeof(struct sample_column));
+    table->values = calloc(ncols > 0 ? ncols : 1, sizeof(double));
+
+    if (table->cols == NULL || table->values == NULL) {
+        sample_table_free(table);
+        return -1;
+    }
+
+    int i = 0;
+    list_for_each_entry(pos, sensors, list) {
+        i += pos->columns(pos, table->cols + i);
+    }
+
+    return ncols;
+}
+
+void sample_table_free(struct sample_table *table) {
+    free(table->cols);
+    free(table->values);
+    table->cols = NULL;
+    table->values = NULL;
+    table->ncols = 0;
+}
+
+void sample_table_store(struct sample_table *table, struct list_head *sensors) {
+    struct sensor *pos;
+    int i = 0;
+
+    list_for_each_entry(pos, sensors, list) {
+        i += pos->store_last(pos, table->values + i);
+    }
+}
+
+static inline void sample_text_write_value(FILE *f,
+                                           const struct sample_column *col,
+                                           double value) {
+    if (col->unit[0] != '\0')
+        fprintf(f, "%s%c%s ", col->name, col->sep, col->unit);
+    else
+        fprintf(f, "%s ", col->name);
+
+    if (col->type == SAMPLE_REAL)
+        fprintf(f, "%f\n", value);
+    else
+        fprintf(f, "%ld\n", (long)value);
+}
+
+void sample_text_write_record(FILE *f, const struct sample_table *table,
+                              uint64_t flags) {
+    if (flags & SAMPLE_FLAG_BREAKPOINT)
+        fprintf(f, "--------------------------------------------\n\n");
+
+    for (int i = 0; i < table->ncols; ++i)
+        sample_text_write_value(f, &table->cols[i], table->values[i]);
+
+    fprintf(f, "\n");
+}
+
+int sample_binary_write_header(FILE *f, const struct sample_table *table,
+                               long period_us) {
+    struct sample_header header;
+
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, SAMPLE_BINARY_MAGIC, sizeof(SAMPLE_BINARY_MAGIC));
+    header.version = SAMPLE_BINARY_VERSION;
+    header.ncols = table->ncols;
+    header.period_us = period_us;
+
+    if (fwrite(&header, sizeof(header), 1, f) != 1)
+        return -1;
+
+    if (table->ncols > 0 &&
+        fwrite(table->cols, sizeof(struct sample_column), table->ncols, f) !=
+            (size_t)table->ncols)
+        return -1;
+
+    return 0;
+}
+
+int sample_binary_write_record(FILE *f, const struct sample_table *table,
+                               uint64_t flags) {
+    if (fwrite(&flags, sizeof(flags), 1, f) != 1)
+        return -1;
+
+    if (table->ncols > 0 &&
+        fwrite(table->values, sizeof(double), table->ncols, f) !=
+            (size_t)table->ncols)
+        return -1;
+
+    return 0;
+}
@@ -0,0 +1,84 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "sample_instr.h"
+#include "time_utils.h"
+
+int sample_instr_extra_cols(struct list_head *sensors) {
+    struct sensor *pos;
+    int nsensors = 0;
+
+    list_for_each_entry(pos, sensors, list) {
+        nsensors++;
+    }
+
+    return 2 + nsensors;
+}
+
+int sample_instr_init(struct sample_instr *instr, struct list_head *sensors,
+                      struct sample_table *table, int first_col) {
+    struct sensor *pos;
+    struct sample_column *cols = table->cols + first_col;
+    int i = 0;
+    int k = 0;
+
+    instr->first_col = first_col;
+    instr->nsensors = sample_instr_extra_cols(sensors) - 2;
+    instr->read_us =
+        calloc(instr->nsensors > 0 ? instr->nsensors : 1, sizeof(double));
+
+    if (instr->read_us == NULL)
+        return -1;
+
+    sample_column_set(&cols[0], "sampler_wakeup_late", "us", '_', SAMPLE_REAL);
+    sample_column_set(&cols[1], "sampler_busy", "us", '_', SAMPLE_REAL);
+
+    // Each sensor is named after its first column
+    list_for_each_entry(pos, sensors, list) {
+        char name[sizeof(cols[0].name) + 8];
+
+        snprintf(name, sizeof(name), "%s_read", table->cols[i].name);
+        sample_column_set(&cols[2 + k], name, "us", '_', SAMPLE_REAL);
+
+        i += pos->columns(pos, NULL);
+        k++;
+    }
+
+    return 0;
+}
+
+void sample_instr_free(struct sample_instr *instr) {
+    free(instr->read_us);
+    instr->read_us = NULL;
+    instr->nsensors = 0;
+}
+
+double sensor_read_timed(struct sensor *sensor) {
+    struct timespec t1, t2;
+
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    sensor->read(sensor);
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+
+    return time_diff_ns(t2, t1) / 1000.0;
+}
+
+void sample_instr_read(struct sample_instr *instr, struct list_head *sensors) {
+    struct sensor *pos;
+    int k = 0;
+
+    list_for_each_entry(pos, sensors, list) {
+        instr->read_us[k++] = sensor_read_timed(pos);
+    }
+}
+
+void sample_instr_store(struct sample_instr *instr, struct sample_table *table,
+                        struct timespec target, struct timespec wakeup,
+                        double busy_us) {
+    double *values = table->values + instr->first_col;
+
+    values[0] = time_diff_ns(wakeup, target) / 1000.0;
+    values[1] = busy_us;
+    memcpy(values + 2, instr->read_us, instr->nsensors * sizeof(double));
+}
@@ -0,0 +1,67 @@
+#include <stdlib.h>
+#include <string.h>
+
+#include "sample_ring.h"
+
+int sample_ring_init(struct sample_ring *ring, size_t capacity, int ncols) {
+    const size_t nvalues = capacity * (ncols > 0 ? ncols : 1);
+
+    ring->capacity = capacity;
+    ring->count = 0;
+    ring->ncols = ncols;
+    ring->flags = calloc(capacity, sizeof(uint64_t));
+    ring->values = calloc(nvalues, sizeof(double));
+
+    if (ring->flags == NULL || ring->values == NULL) {
+        sample_ring_free(ring);
+        return -1;
+    }
+
+    // Touch all pages now, to avoid page faults while sampling
+    memset(ring->flags, 0, capacity * sizeof(uint64_t));
+    memset(ring->values, 0, nvalues * sizeof(double));
+
+    return 0;
+}
+
+void sample_ring_free(struct sample_ring *ring) {
+    free(ring->flags);
+    free(ring->values);
+    ring->flags = NULL;
+    ring->values = NULL;
+    ring->capacity = 0;
+    ring->count = 0;
+}
+
+bool sample_ring_push(struct sample_ring *ring,
+                      const struct sample_table *table, uint64_t flags) {
+    if (ring->count < ring->capacity) {
+        ring->flags[ring->count] = flags;
+        memcpy(ring->values + ring->count * ring->ncols, table->values,
+               ring->ncols * sizeof(double));
+        ring->count++;
+    }
+
+    return ring->count >= ring->capacity;
+}
+
+int sample_ring_flush(struct sample_ring *ring, FILE *f,
+                      const struct sample_table *table, bool binary) {
+    struct sample_table record = *table;
+    int res = 0;
+
+    for (size_t i = 0; i < ring->count; ++i) {
+        record.values = ring->values + i * ring->ncols;
+
+        if (binary)
+            res = sample_binary_write_record(f, &record, ring->flags[i]);
+        else
+            sample_text_write_record(f, &record, ring->flags[i]);
+
+        if (res < 0)
+            break;
+    }
+
+    ring->count = 0;
+    return res;
+}
@@ -12,11 +12,16 @@
 #include <unistd.h>
 
 #include "periodic.h"
+#include "sample_async.h"
+#include "sample_binary.h"
+#include "sample_instr.h"
+#include "sample_ring.h"
 #include "sensor_file.h"
 #include "sensor_hwmon.h"
 #include "sensor_iio.h"
 #include "sensor_ina226.h"
 #include "sensor_ina231.h"
+#include "time_utils.h"
 
 #ifndef UDEV_NOTFOUND
 #include "sensor_smartpower.h"
@@ -57,9 +62,57 @@ void init_signal_action() {
     sigaction(SIGUSR1, &action_usr1, NULL);
 }
 
-int main() {
+void usage(const char *argv0) {
+    fprintf(stderr,
+            "Usage: %s [-a] [-b] [-i] [-r N]\n"
+            "  -a    read slow sensors (I2C, HID, hwmon) in separate threads,\n"
+            "        each at its own update period, printing the last value\n"
+            "        read and its age\n"
+            "  -b    print samples in binary format (see sample_binary.h)\n"
+            "  -i    add to each sample the wakeup lateness and the busy time\n"
+            "        of the sampling loop and the read latency of each sensor\n"
+            "        (see sample_instr.h)\n"
+            "  -r N  keep up to N samples in memory, printing them only on\n"
+            "        breakpoints (SIGUSR1), at exit or when the buffer is full\n",
+            argv0);
+}
+
+int main(int argc, char *argv[]) {
     LIST_HEAD(sensors_list);
 
+    bool async_mode = false;
+    bool binary = false;
+    bool instr_mode = false;
+    long ring_capacity = 0;
+    int opt;
+
+    while ((opt = getopt(argc, argv, "abir:h")) != -1) {
+        switch (opt) {
+        case 'a':
+            async_mode = true;
+            break;
+        case 'b':
+            binary = true;
+            break;
+        case 'i':
+            instr_mode = true;
+            break;
+        case 'r':
+            ring_capacity = atol(optarg);
+            if (ring_capacity < 1) {
+                usage(argv[0]);
+                return EXIT_FAILURE;
+            }
+            break;
+        case 'h':
+            usage(argv[0]);
+            return EXIT_SUCCESS;
+        default:
+            usage(argv[0]);
+            return EXIT_FAILURE;
+        }
+    }
+
     // Register signal handlers
     init_signal_action();
 
@@ -82,7 +135,50 @@ int main() {
             period_us = pos->period_us;
     }
 
-    printf("UPDATE_PERIOD_us %ld\n\n", period_us);
+    const bool ring_mode = ring_capacity > 0;
+    const bool use_table = binary || ring_mode || async_mode || instr_mode;
+
+    struct sample_table table;
+    struct sample_ring ring;
+    struct sample_async async;
+    struct sample_instr instr;
+
+    // Age columns (async) and instrumentation columns follow sensor columns
+    const int async_cols =
+        async_mode ? sample_async_extra_cols(&sensors_list) : 0;
+    const int instr_cols =
+        instr_mode ? sample_instr_extra_cols(&sensors_list) : 0;
+
+    if (use_table) {
+        const int extra_cols = async_cols + instr_cols;
+        if (sample_table_init(&table, &sensors_list, extra_cols) < 0)
+            exit(EXIT_FAILURE);
+    }
+
+    if (instr_mode) {
+        if (sample_instr_init(&instr, &sensors_list, &table,
+                              table.ncols - instr_cols) < 0)
+            exit(EXIT_FAILURE);
+    }
+
+    if (async_mode) {
+        if (sample_async_start(&async, &sensors_list, &table,
+                               table.ncols - instr_cols - async_cols,
+                               period_us) < 0)
+            exit(EXIT_FAILURE);
+    }
+
+    if (ring_mode) {
+        if (sample_ring_init(&ring, ring_capacity, table.ncols) < 0)
+            exit(EXIT_FAILURE);
+    }
+
+    if (binary) {
+        if (sample_binary_write_header(stdout, &table, period_us) < 0)
+            exit(EXIT_FAILURE);
+    } else {
+        printf("UPDATE_PERIOD_us %ld\n\n", period_us);
+    }
 
     // Turn on full buffering for stdout, avoiding a flush each printline
     fflush(stdout);
@@ -91,27 +187,88 @@ int main() {
     struct timespec at;
     rt_start_period(&at);
 
+    // Used only by instrumentation
+    struct timespec wakeup = at;
+    struct timespec done;
+    double busy_us = 0;
+
     // Until the user sends a SIGINT
     while (keep_sampling) {
+        uint64_t flags = 0;
+
         if (mark_section) {
-            printf("--------------------------------------------\n\n");
+            if (binary || ring_mode)
+                flags |= SAMPLE_FLAG_BREAKPOINT;
+            else
+                printf("--------------------------------------------\n\n");
             mark_section = 0;
         }
 
+        // Write out samples collected so far on breakpoints
+        if (ring_mode && (flags & SAMPLE_FLAG_BREAKPOINT)) {
+            sample_ring_flush(&ring, stdout, &table, binary);
+            fflush(stdout);
+        }
+
         // Read data from device and print it
-        list_for_each_entry(pos, &sensors_list, list) {
-            pos->read(pos);
+        if (async_mode) {
+            sample_async_store(&async, &sensors_list, &table,
+                               instr_mode ? instr.read_us : NULL);
+        } else if (instr_mode) {
+            sample_instr_read(&instr, &sensors_list);
+        } else {
+            list_for_each_entry(pos, &sensors_list, list) {
+                pos->read(pos);
+            }
         }
 
-        list_for_each_entry(pos, &sensors_list, list) {
-            pos->print_last(pos);
+        if (use_table && !async_mode)
+            sample_table_store(&table, &sensors_list);
+
+        if (instr_mode)
+            sample_instr_store(&instr, &table, at, wakeup, busy_us);
+
+        if (ring_mode) {
+            if (sample_ring_push(&ring, &table, flags)) {
+                sample_ring_flush(&ring, stdout, &table, binary);
+                fflush(stdout);
+            }
+        } else if (binary) {
+            sample_binary_write_record(stdout, &table, flags);
+        } else if (async_mode || instr_mode) {
+            sample_text_write_record(stdout, &table, flags);
+        } else {
+            list_for_each_entry(pos, &sensors_list, list) {
+                pos->print_last(pos);
+            }
+
+            printf("\n");
         }
 
-        printf("\n");
-        fflush(stdout);
+        if (!ring_mode)
+            fflush(stdout);
+
+        if (instr_mode) {
+            clock_gettime(CLOCK_MONOTONIC, &done);
+            busy_us = time_diff_ns(done, wakeup) / 1000.0;
+        }
 
         // Wait next activation time
         rt_next_period(&at, period_us);
+
+        if (instr_mode)
+            clock_gettime(CLOCK_MONOTONIC, &wakeup);
+    }
+
+    if (async_mode)
+        sample_async_stop(&async);
+
+    if (instr_mode)
+        sample_instr_free(&instr);
+
+    if (ring_mode) {
+        sample_ring_flush(&ring, stdout, &table, binary);
+        sample_ring_free(&ring);
     }
 
     // Re-enable full buffering for stdout
@@ -121,5 +278,8 @@ int main() {
         pos->close(pos);
     }
 
+    if (use_table)
+        sample_table_free(&table);
+
     return 0;
 }
@@ -15,7 +15,11 @@
 // =========================================================
 
 #define __SENSOR_FILE_BASE_INITIALIZER                                         \
-    { {}, -1, "", sensor_file_read, sensor_file_close, sensor_file_print_last, }
+    {                                                                          \
+        {}, -1, "", sensor_file_read, sensor_file_close,                       \
+            sensor_file_print_last, sensor_file_columns,                       \
+            sensor_file_store_last, false,                                     \
+    }
 
 #define __SENSOR_FILE_INITIALIZER                                              \
     {                                                                          \
@@ -72,6 +76,18 @@ void sensor_file_print_last(struct sensor *sself) {
     printf("%s %s\n", self->base.name, self->data);
 }
 
+int sensor_file_columns(struct sensor *sself, struct sample_column *cols) {
+    if (cols != NULL)
+        sample_column_set(&cols[0], sself->name, "", ' ', SAMPLE_INTEGER);
+    return 1;
+}
+
+int sensor_file_store_last(struct sensor *sself, double *values) {
+    struct sensor_file *self = (struct sensor_file *)sself;
+    values[0] = strtod(self->data, NULL);
+    return 1;
+}
+
 // =========================================================
 // MULTIPLE SENSORS DETECTION AND INITIALIZATION
 // =========================================================
@@ -15,7 +15,8 @@
 #define __SENSOR_HWMON_BASE_INITIALIZER                                        \
     {                                                                          \
         {}, -1, "", sensor_hwmon_read, sensor_hwmon_close,                     \
-            sensor_hwmon_print_last,                                           \
+            sensor_hwmon_print_last, sensor_hwmon_columns,                     \
+            sensor_hwmon_store_last, true,                                     \
     }
 
 #define __SENSOR_HWMON_INITIALIZER                                             \
@@ -171,6 +172,29 @@ void sensor_hwmon_print_last(struct sensor *sself) {
     printf("hwmon_%s_mC %ld\n", NAME(self), TEMP_mC(self));
 }
 
+int sensor_hwmon_columns(struct sensor *sself, struct sample_column *cols) {
+    struct sensor_hwmon *self = (struct sensor_hwmon *)sself;
+    static const char *units[] = {"uA", "uV", "uW", "mC"};
+    const int ncols = sizeof(units) / sizeof(units[0]);
+
+    if (cols != NULL) {
+        char name[sizeof(cols[0].name)];
+        snprintf(name, sizeof(name), "hwmon_%s", NAME(self));
+        for (int i = 0; i < ncols; ++i)
+            sample_column_set(&cols[i], name, units[i], '_', SAMPLE_INTEGER);
+    }
+    return ncols;
+}
+
+int sensor_hwmon_store_last(struct sensor *sself, double *values) {
+    struct sensor_hwmon *self = (struct sensor_hwmon *)sself;
+    values[0] = CURRENT_uA(self);
+    values[1] = VOLTAGE_uV(self);
+    values[2] = POWER_uW(self);
+    values[3] = TEMP_mC(self);
+    return 4;
+}
+
 // =========================================================
 // SENSORS DETECTION AND INITIALIZATION
 // =========================================================
@@ -15,7 +15,11 @@
 // =========================================================
 
 #define __SENSOR_IIO_BASE_INITIALIZER                                          \
-    { {}, -1, "", sensor_iio_read, sensor_iio_close, sensor_iio_print_last, }
+    {                                                                          \
+        {}, -1, "", sensor_iio_read, sensor_iio_close,                         \
+            sensor_iio_print_last, sensor_iio_columns,                         \
+            sensor_iio_store_last, false,                                      \
+    }
 
 #define __SENSOR_IIO_INITIALIZER                                               \
     { __SENSOR_IIO_BASE_INITIALIZER, "", "", "", 0, 0, 0, 0, }
@@ -90,6 +94,18 @@ void sensor_iio_print_last(struct sensor *sself) {
     printf("%s %f\n", self->base.name, self->value);
 }
 
+int sensor_iio_columns(struct sensor *sself, struct sample_column *cols) {
+    if (cols != NULL)
+        sample_column_set(&cols[0], sself->name, "", ' ', SAMPLE_REAL);
+    return 1;
+}
+
+int sensor_iio_store_last(struct sensor *sself, double *values) {
+    struct sensor_iio *self = (struct sensor_iio *)sself;
+    values[0] = self->value;
+    return 1;
+}
+
 // =========================================================
 // MULTIPLE SENSORS DETECTION AND INITIALIZATION
 // =========================================================
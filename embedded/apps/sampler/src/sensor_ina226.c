@@ -12,7 +12,8 @@
 #define __SENSOR_INA226_BASE_INITIALIZER                                       \
     {                                                                          \
         {}, -1, "", sensor_ina226_read, sensor_ina226_close,                   \
-            sensor_ina226_print_last,                                          \
+            sensor_ina226_print_last, sensor_ina226_columns,                   \
+            sensor_ina226_store_last, true,                                    \
     }
 
 #define __SENSOR_INA226_INITIALIZER                                            \
@@ -163,21 +164,31 @@ int sensor_ina226_read(struct sensor *sself) {
     return 0;
 }
 
-void sensor_ina226_print_last(struct sensor *sself) {
-    struct sensor_ina226 *self = (struct sensor_ina226 *)sself;
-
+static inline void sensor_ina226_sums(struct sensor_ina226 *self,
+                                      long *power_sum, long *power_calc_sum) {
     struct ina226_data *data;
+
     long current_sum __attribute((unused)) = 0;
     long voltage_sum __attribute((unused)) = 0;
-    long power_sum = 0;
-    long power_calc_sum = 0;
+
+    *power_sum = 0;
+    *power_calc_sum = 0;
 
     list_for_each_entry(data, &self->data_list, list) {
         // current_sum += data->current.diff_value;
         // voltage_sum += data->voltage.diff_value;
-        power_sum += data->power.diff_value;
-        power_calc_sum += data->current.diff_value * data->voltage.diff_value;
+        *power_sum += data->power.diff_value;
+        *power_calc_sum += data->current.diff_value * data->voltage.diff_value;
     }
+}
+
+void sensor_ina226_print_last(struct sensor *sself) {
+    struct sensor_ina226 *self = (struct sensor_ina226 *)sself;
+
+    long power_sum;
+    long power_calc_sum;
+
+    sensor_ina226_sums(self, &power_sum, &power_calc_sum);
 
     // printf("%s_uA %ld\n", self->base.name, current_sum * 1000L);
     // printf("%s_uV %ld\n", self->base.name, voltage_sum * 1000L);
@@ -185,6 +196,29 @@ void sensor_ina226_print_last(struct sensor *sself) {
     printf("%s_CALC_uW %ld\n", self->base.name, power_calc_sum);
 }
 
+int sensor_ina226_columns(struct sensor *sself, struct sample_column *cols) {
+    if (cols != NULL) {
+        char name[sizeof(cols[0].name)];
+        snprintf(name, sizeof(name), "%s_CALC", sself->name);
+        sample_column_set(&cols[0], sself->name, "uW", '_', SAMPLE_INTEGER);
+        sample_column_set(&cols[1], name, "uW", '_', SAMPLE_INTEGER);
+    }
+    return 2;
+}
+
+int sensor_ina226_store_last(struct sensor *sself, double *values) {
+    struct sensor_ina226 *self = (struct sensor_ina226 *)sself;
+
+    long power_sum;
+    long power_calc_sum;
+
+    sensor_ina226_sums(self, &power_sum, &power_calc_sum);
+
+    values[0] = power_sum;
+    values[1] = power_calc_sum;
+    return 2;
+}
+
 // =========================================================
 // SENSORS DETECTION AND INITIALIZATION
 // =========================================================
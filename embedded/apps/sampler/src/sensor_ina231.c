@@ -13,7 +13,8 @@
 #define __SENSOR_INA231_BASE_INITIALIZER                                       \
     {                                                                          \
         {}, -1, "", sensor_ina231_read, sensor_ina231_close,                   \
-            sensor_ina231_print_last,                                          \
+            sensor_ina231_print_last, sensor_ina231_columns,                   \
+            sensor_ina231_store_last, true,                                    \
     }
 
 #define __SENSOR_INA231_INITIALIZER                                            \
@@ -156,6 +157,23 @@ void sensor_ina231_print_last(struct sensor *sself) {
     printf("%s_uW %u\n", self->base.name, self->data.cur_uW);
 }
 
+int sensor_ina231_columns(struct sensor *sself, struct sample_column *cols) {
+    if (cols != NULL) {
+        sample_column_set(&cols[0], sself->name, "uA", '_', SAMPLE_INTEGER);
+        sample_column_set(&cols[1], sself->name, "uV", '_', SAMPLE_INTEGER);
+        sample_column_set(&cols[2], sself->name, "uW", '_', SAMPLE_INTEGER);
+    }
+    return 3;
+}
+
+int sensor_ina231_store_last(struct sensor *sself, double *values) {
+    struct sensor_ina231 *self = (struct sensor_ina231 *)sself;
+    values[0] = self->data.cur_uA;
+    values[1] = self->data.cur_uV;
+    values[2] = self->data.cur_uW;
+    return 3;
+}
+
 // =========================================================
 // MULTIPLE SENSORS DETECTION AND INITIALIZATION
 // =========================================================
@@ -11,7 +11,8 @@
 #define __SENSOR_SMARTPOWER_BASE_INITIALIZER                                   \
     {                                                                          \
         {}, -1, "", sensor_smartpower_read, sensor_smartpower_close,           \
-            sensor_smartpower_print_last,                                      \
+            sensor_smartpower_print_last, sensor_smartpower_columns,           \
+            sensor_smartpower_store_last, true,                                \
     }
 
 #define __SENSOR_SMARTPOWER_INITIALIZER                                        \
@@ -186,6 +187,25 @@ void sensor_smartpower_print_last(struct sensor *sself) {
     printf("smartpower uW %ld\n", (long)(self->power * 1000000.0));
 }
 
+int sensor_smartpower_columns(struct sensor *sself __attribute((unused)),
+                              struct sample_column *cols) {
+    if (cols != NULL) {
+        sample_column_set(&cols[0], "smartpower", "uV", ' ', SAMPLE_INTEGER);
+        sample_column_set(&cols[1], "smartpower", "uA", ' ', SAMPLE_INTEGER);
+        sample_column_set(&cols[2], "smartpower", "uW", ' ', SAMPLE_INTEGER);
+    }
+    return 3;
+}
+
+int sensor_smartpower_store_last(struct sensor *sself, double *values) {
+    struct sensor_smartpower *self = (struct sensor_smartpower *)sself;
+    // Same truncation as in text mode
+    values[0] = (long)(self->voltage * 1000000.0);
+    values[1] = (long)(self->current * 1000000.0);
+    values[2] = (long)(self->power * 1000000.0);
+    return 3;
+}
+
 // =========================================================
 // MULTIPLE SENSORS DETECTION AND INITIALIZATION
 // =========================================================
@@ -83,3 +83,14 @@ int time_diff(struct timespec *tdest, struct timespec t2, struct timespec t1)
 
     return 0;
 }
+
+long time_diff_us(struct timespec t2, struct timespec t1)
+{
+    return (t2.tv_sec - t1.tv_sec) * 1000000L +
+           (t2.tv_nsec - t1.tv_nsec) / 1000L;
+}
+
+long time_diff_ns(struct timespec t2, struct timespec t1)
+{
+    return (t2.tv_sec - t1.tv_sec) * 1000000000L + (t2.tv_nsec - t1.tv_nsec);
+}
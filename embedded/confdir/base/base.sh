@@ -21,6 +21,40 @@ export EXP_TEST_DURATION=20
 # Cooldown period between consecutive test tries
 export EXP_SLEEP_INTERVAL=10
 
+# End the cooldown as soon as all thermal zones are back within
+# EXP_COOLDOWN_TOLERANCE degrees Celsius from their idle temperature (measured
+# at the beginning of each policy over EXP_COOLDOWN_BASELINE_SAMPLES samples,
+# one per second); EXP_SLEEP_INTERVAL becomes the maximum cooldown duration.
+# The cooldown lasts at least EXP_COOLDOWN_MIN seconds anyway, so that its
+# samples span at least a smoothing window of the host analysis (11 samples, see
+# host/pyscripts/modules/tabletools.py).
+export EXP_COOLDOWN_ADAPTIVE=0
+export EXP_COOLDOWN_TOLERANCE=1
+export EXP_COOLDOWN_BASELINE_SAMPLES=10
+export EXP_COOLDOWN_MIN=5
+
+# End the active phase of each test as soon as all temperatures and power values
+# are steady (see host/pyscripts/steady_state_detector.py), but not before
+# EXP_TEST_MIN_DURATION seconds; EXP_TEST_DURATION becomes the maximum duration.
+# Steadiness is checked over the last EXP_STEADY_WINDOW seconds, temperatures
+# must vary less than EXP_STEADY_TEMP_TOLERANCE degrees Celsius, power less than
+# EXP_STEADY_POWER_TOLERANCE (fraction of its mean).
+# NOTE: the detector reads the samples as they are written, so it cannot be used
+# with a buffered sampler (option -r in POWERSAMPLER_CMD), which writes nothing
+# until the breakpoint: in that case the detection is disabled with a warning.
+export EXP_STEADY_DETECT=0
+export EXP_TEST_MIN_DURATION=10
+export EXP_STEADY_WINDOW=5
+export EXP_STEADY_TEMP_TOLERANCE=0.5
+export EXP_STEADY_POWER_TOLERANCE=0.05
+
+# The perf events to count, if TIME_CMD contains the PERF_EVENTS pattern (see
+# confdir/base/timeperfpower.sh)
+export PERF_EVENTS=()
+export PERF_COUNTERS=6
+export PERF_CYCLES_ALWAYS=0
+export PERF_EVENTS_AVAILABLE=""
+
 # The command to execute to measure elapsed time
 export TIME_CMD="${APPSDIR}/forever/forever"
 
@@ -35,6 +69,31 @@ export POWERSAMPLER_CMD=""
 # The number of repetitions to run for each test
 export HOWMANY_TIMES=5
 
+# If 1, each test is repeated until the half-width of the EXP_REPS_CONFIDENCE
+# confidence interval of its mean time and steady-state power is below
+# EXP_REPS_TARGET (fraction of the mean), with at least EXP_REPS_MIN and at most
+# EXP_REPS_MAX repetitions; HOWMANY_TIMES is used only if the controller fails.
+# When perf events are counted in groups (see PERF_EVENTS), each test is repeated
+# at least once per group anyway.
+export EXP_REPS_ADAPTIVE=0
+export EXP_REPS_MIN=3
+export EXP_REPS_MAX=20
+export EXP_REPS_TARGET=0.02
+export EXP_REPS_CONFIDENCE=0.95
+
+# If 1, the configurations (policy, frequency and task) are run from the coldest
+# to the hottest within each policy, as predicted from the results of previous
+# experiments in EXP_PLAN_HISTORY (a results directory, optional), to minimize
+# thermal transitions between consecutive tests (see
+# host/pyscripts/sweep_plan.py). The plan is saved in sweep_plan.txt.
+export EXP_PLAN_ORDER=0
+export EXP_PLAN_HISTORY=""
+
+# If 1, the plan of a previous (interrupted) run of the same experiment is kept
+# and the runs recorded as complete in its manifest (sweep_manifest.txt) are
+# skipped, so that the experiment continues exactly where it stopped.
+export EXP_RESUME=0
+
 # The number of instances to run in parallel on the same policy
 # (at most one per cpu, may be less than this number if the number of cpus is
 # not enough)
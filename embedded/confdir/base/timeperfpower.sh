@@ -58,12 +58,32 @@ export EXP_SLEEP_INTERVAL=40
 # cpu/t1=v1[,t2=v2,t3 ...]/modifier                  [Raw hardware event descriptor]
 # mem:<addr>[/len][:access]                          [Hardware breakpoint]
 
+# The events to count. When they are more than the hardware counters of the
+# board (PERF_COUNTERS, of which one always counts cycles if PERF_CYCLES_ALWAYS
+# is 1), they are split into the fewest groups that can be counted without
+# multiplexing (see host/pyscripts/perf_groups.py) and each repetition of a test
+# counts the next group in place of the PERF_EVENTS pattern in TIME_CMD. Events
+# not listed in PERF_EVENTS_AVAILABLE (a file, e.g. the output of
+# pmc-load-events.sh), if given, are dropped.
+export PERF_EVENTS=(
+    branches branch-misses bus-cycles cache-misses cache-references cycles
+    instructions
+    L1-dcache-load-misses L1-dcache-loads L1-dcache-store-misses L1-dcache-stores
+    L1-icache-load-misses L1-icache-loads
+    LLC-load-misses LLC-loads LLC-store-misses LLC-stores
+    branch-load-misses branch-loads
+    dTLB-load-misses dTLB-store-misses iTLB-load-misses
+)
+export PERF_COUNTERS=7
+export PERF_CYCLES_ALWAYS=1
+export PERF_EVENTS_AVAILABLE=""
+
 # The command to execute to measure elapsed time
-export TIME_CMD="${APPSDIR}/forever/forever perf stat -x, -I 1000 -e branches,branch-misses,bus-cycles,cache-misses,cache-references,cycles,instructions -- "
+export TIME_CMD="${APPSDIR}/forever/forever perf stat -x, -I 1000 -e PERF_EVENTS -- "
 
 # This command is used to make a single dry run of the application if needed
 # (see run.sh script for more details)
-export TIME_CMD_DRY="/usr/bin/time perf stat -x, -I 1000 -e branches,branch-misses,bus-cycles,cache-misses,cache-references,cycles,instructions -- "
+export TIME_CMD_DRY="/usr/bin/time perf stat -x, -I 1000 -e PERF_EVENTS -- "
 export TIME=$'\ntime %e\n'
 
 # The command to execute to measure the power consumption
@@ -87,6 +87,38 @@ TASK MIN DURATION:      ${EXP_TASK_MIN_DURATION} seconds
 SINGLE TEST DURATION:   ${EXP_TEST_DURATION} seconds
 EOF
 
+    if [ "$EXP_COOLDOWN_ADAPTIVE" = "1" ]; then
+        cat >>"$1" <<EOF
+
+NOTE:   This experiment ends each cooldown as soon as temperatures are idle
+        MIN DURATION:       ${EXP_COOLDOWN_MIN} seconds
+        MAX DURATION:       ${EXP_SLEEP_INTERVAL} seconds
+        TOLERANCE:          ${EXP_COOLDOWN_TOLERANCE} degrees Celsius
+EOF
+    fi
+
+    if [ "$EXP_STEADY_DETECT" = "1" ]; then
+        cat >>"$1" <<EOF
+
+NOTE:   This experiment ends each test as soon as it reaches steady state
+        MIN DURATION:       ${EXP_TEST_MIN_DURATION} seconds
+        WINDOW:             ${EXP_STEADY_WINDOW} seconds
+        TEMP TOLERANCE:     ${EXP_STEADY_TEMP_TOLERANCE} degrees Celsius
+        POWER TOLERANCE:    ${EXP_STEADY_POWER_TOLERANCE} (relative)
+EOF
+    fi
+
+    if [ "$EXP_REPS_ADAPTIVE" = "1" ]; then
+        cat >>"$1" <<EOF
+
+NOTE:   This experiment repeats each test until its results are precise enough
+        MIN REPETITIONS:    ${EXP_REPS_MIN}
+        MAX REPETITIONS:    ${EXP_REPS_MAX}
+        TARGET:             ${EXP_REPS_TARGET} (relative CI half-width)
+        CONFIDENCE:         ${EXP_REPS_CONFIDENCE}
+EOF
+    fi
+
     if [ "$DEADLINE_USE" = "1" ]; then
         cat >>"$1" <<EOF
 
@@ -101,6 +133,74 @@ EOF
 #                     task management                      #
 # -------------------------------------------------------- #
 
+# Splits PERF_EVENTS into groups that can be counted at the same time by the
+# hardware counters of the board (see host/pyscripts/perf_groups.py), saving
+# them in PERF_GROUPS and in the file given as argument. Nothing is done if
+# TIME_CMD does not count perf events (i.e. it lacks the PERF_EVENTS pattern).
+#
+# Env variables:
+#  - TIME_CMD
+#  - PERF_EVENTS
+#  - PERF_COUNTERS
+#  - PERF_CYCLES_ALWAYS
+#  - PERF_EVENTS_AVAILABLE
+#
+# Arguments:
+#  - the output file
+function perf_groups_create() {
+    local events_file="${1}.all"
+    local perf_opts=()
+
+    PERF_GROUPS=()
+    if [[ "$TIME_CMD" != *PERF_EVENTS* ]] || [ "${#PERF_EVENTS[@]}" -lt 1 ]; then
+        return
+    fi
+
+    printf '%s\n' "${PERF_EVENTS[@]}" >"$events_file"
+
+    if [ "$PERF_CYCLES_ALWAYS" = "1" ]; then
+        perf_opts+=(--cycles-always)
+    fi
+    if [ -n "$PERF_EVENTS_AVAILABLE" ]; then
+        perf_opts+=(--available "$PERF_EVENTS_AVAILABLE")
+    fi
+
+    python3 "${PROJPATH}/host/pyscripts/perf_groups.py" \
+        --counters "$PERF_COUNTERS" \
+        --out-file "$1" \
+        "${perf_opts[@]}" \
+        "$events_file"
+    rm -f "$events_file"
+
+    readarray -t PERF_GROUPS <"$1"
+
+    if [ "${#PERF_GROUPS[@]}" -gt "$(repetitions_max)" ]; then
+        pwarn "Only $(repetitions_max) of the ${#PERF_GROUPS[@]} perf groups" \
+            "will be counted, increase the number of repetitions!"
+    fi
+}
+
+# Prints the command used to measure time for the current run, with the
+# PERF_EVENTS pattern replaced by the group of events of this repetition (each
+# group is counted in turn, starting from the first run after the 0 run).
+#
+# Env variables:
+#  - TIME_CMD
+#  - PERF_GROUPS
+#
+#  - task_rep
+function time_command() {
+    local group
+
+    if [ "${#PERF_GROUPS[@]}" -lt 1 ]; then
+        echo "$TIME_CMD"
+        return
+    fi
+
+    group=$(((task_rep > 0 ? task_rep - 1 : 0) % ${#PERF_GROUPS[@]}))
+    echo "${TIME_CMD//PERF_EVENTS/${PERF_GROUPS[$group]}}"
+}
+
 # Uses a few patterns to generate the command to run (namely substitutes input
 # and output files).
 #
@@ -297,30 +397,190 @@ function high_prio_kind_to_cmd() {
 #                          Body of a Single Test Run                           #
 # ============================================================================ #
 
-# If you need something more sophisticated, change this function
+# Waits for the platform to cool down: a fixed amount of time or, if
+# EXP_COOLDOWN_ADAPTIVE is 1, until all thermal zones are back to their idle
+# temperature (but at least EXP_COOLDOWN_MIN and at most EXP_SLEEP_INTERVAL
+# seconds). The actual duration is saved in cooldown_duration.
 function wait_cooldown() {
-    sleep "$EXP_SLEEP_INTERVAL"
+    if [ "$EXP_COOLDOWN_ADAPTIVE" != "1" ] || [ "${#THERMAL_BASELINE[@]}" = 0 ]; then
+        sleep "$EXP_SLEEP_INTERVAL"
+        cooldown_duration="$EXP_SLEEP_INTERVAL"
+        return
+    fi
+
+    thermal_wait_cooldown \
+        "$(calculator "int(${EXP_COOLDOWN_TOLERANCE} * 1000)")" \
+        "$EXP_SLEEP_INTERVAL" \
+        "1" \
+        "$EXP_COOLDOWN_MIN"
+
+    cooldown_duration="$THERMAL_COOLDOWN_DURATION"
+}
+
+# Returns whether the power sampler keeps its samples in memory (option -r of
+# the sampler), printing them only at the breakpoint or when its buffer fills.
+#
+# Env variables:
+#  - POWERSAMPLER_CMD
+function powersampler_is_buffered() {
+    local word
+
+    for word in ${POWERSAMPLER_CMD}; do
+        if [[ "$word" =~ ^-[a-z]*r ]]; then
+            return 0
+        fi
+    done
+
+    return 1
 }
 
+# Disables the steady state detection if the power sampler is buffered: the
+# detector follows the output of the sampler during the active phase, which a
+# buffered sampler does not write until the breakpoint.
+#
+# Env variables:
+#  - EXP_STEADY_DETECT
+#  - POWERSAMPLER_CMD
+function steady_detect_check() {
+    if [ "$EXP_STEADY_DETECT" = "1" ] && powersampler_is_buffered; then
+        pwarn "Steady state detection needs an unbuffered power sampler" \
+            "(no -r option), using the fixed test duration!"
+        EXP_STEADY_DETECT=0
+    fi
+}
+
+# Waits for the end of the active phase of the test: a fixed amount of time or,
+# if EXP_STEADY_DETECT is 1, until all temperatures and power values measured
+# by the sampler are steady (but at least EXP_TEST_MIN_DURATION seconds and at
+# most EXP_TEST_DURATION seconds).
+#
+# Env variables:
+#  - sampler_logfile
 function wait_test_duration() {
-    sleep "${EXP_TEST_DURATION}"
+    local res=0
+
+    if [ "$EXP_STEADY_DETECT" != "1" ]; then
+        sleep "${EXP_TEST_DURATION}"
+        return
+    fi
+
+    SECONDS=0
+    python3 "${PROJPATH}/host/pyscripts/steady_state_detector.py" \
+        --min-duration "${EXP_TEST_MIN_DURATION}" \
+        --max-duration "${EXP_TEST_DURATION}" \
+        --window "${EXP_STEADY_WINDOW}" \
+        --temp-tolerance "${EXP_STEADY_TEMP_TOLERANCE}" \
+        --power-tolerance "${EXP_STEADY_POWER_TOLERANCE}" \
+        "${sampler_logfile}" || res=$?
+
+    case $res in
+    0) pdebug "steady state reached after ${SECONDS} seconds" ;;
+    3) pdebug "steady state not reached in ${SECONDS} seconds" ;;
+    *)
+        # The detector failed, fall back to the fixed duration
+        pwarn "steady state detector failed, waiting the full test duration"
+        if [ "$SECONDS" -lt "${EXP_TEST_DURATION}" ]; then
+            sleep "$((EXP_TEST_DURATION - SECONDS))"
+        fi
+        ;;
+    esac
 }
 
+# Returns the maximum number of repetitions of each test (excluding the 0 run).
+#
 # Env variables:
+#  - HOWMANY_TIMES
+#  - EXP_REPS_ADAPTIVE
+#  - EXP_REPS_MAX
+function repetitions_max() {
+    if [ "$EXP_REPS_ADAPTIVE" = "1" ]; then
+        echo "$EXP_REPS_MAX"
+    else
+        echo "$HOWMANY_TIMES"
+    fi
+}
+
+# Returns the minimum number of repetitions of each test with EXP_REPS_ADAPTIVE
+# (excluding the 0 run): at least EXP_REPS_MIN and at least one per perf group,
+# so that every group of events is counted.
+#
+# Env variables:
+#  - EXP_REPS_MIN
+#  - PERF_GROUPS
+function repetitions_min() {
+    if [ "${#PERF_GROUPS[@]}" -gt "$EXP_REPS_MIN" ]; then
+        echo "${#PERF_GROUPS[@]}"
+    else
+        echo "$EXP_REPS_MIN"
+    fi
+}
+
+# Returns whether the current test has been repeated enough times. Without
+# EXP_REPS_ADAPTIVE, this happens after HOWMANY_TIMES runs; otherwise, the
+# results of each run are fed to the repetition controller, which decides
+# whether the confidence intervals of time and power are narrow enough (see
+# host/pyscripts/repetition_controller.py). Should the controller fail, the
+# test falls back to HOWMANY_TIMES runs.
 #
+# Env variables:
 #  - HOWMANY_TIMES
+#  - EXP_REPS_ADAPTIVE
+#  - EXP_REPS_MIN
+#  - EXP_REPS_MAX
+#  - EXP_REPS_TARGET
+#  - EXP_REPS_CONFIDENCE
+#  - PERF_GROUPS
+#
+#  - task_rep
+#
+# Arguments:
+#  - the file holding the state of the controller for the current test
+function enough_repetitions() {
+    local state_file="$1"
+    local answer
+
+    if [ "$EXP_REPS_ADAPTIVE" != "1" ]; then
+        [ "$task_rep" -ge "$HOWMANY_TIMES" ]
+        return
+    fi
+
+    # The 0 run is always ignored
+    if [ "$task_rep" -lt 1 ]; then
+        return 1
+    fi
+
+    if ! answer="$(python3 "${PROJPATH}/host/pyscripts/repetition_controller.py" \
+        --state-file "$state_file" \
+        --runs "$task_rep" \
+        --min-runs "$(repetitions_min)" \
+        --max-runs "${EXP_REPS_MAX}" \
+        --target "${EXP_REPS_TARGET}" \
+        --confidence "${EXP_REPS_CONFIDENCE}" \
+        "$(this_test_directory)")"; then
+        pwarn "Repetition controller failed, running ${HOWMANY_TIMES} times"
+        EXP_REPS_ADAPTIVE=0
+        [ "$task_rep" -ge "$HOWMANY_TIMES" ]
+        return
+    fi
+
+    [ "$answer" = "stop" ]
+}
+
+# Env variables:
+#
 #  - TASKS_NAME
 #
 #  - task_index
 #  - task_name
 #  - task_rep
+#  - task_reps_max
 function run_a_test() {
     # Print progress status
     delline
     pinfo2 \
         "[Task $((task_index + 1))/${#TASKS_NAME[@]}]" \
         "Running '${task_name}'" \
-        "[run ${task_rep}/${HOWMANY_TIMES}] ..."
+        "[run ${task_rep}/${task_reps_max}] ..."
 
     # Variables that hold data for the actual runs
     local tasks_cmds=()
@@ -407,6 +667,7 @@ function run_a_test() {
     # Start one by one all tasks
     local tasks_pids=()
     local index
+    local time_cmd="$(time_command)"
     for ((index = 0; index < $tasks_count; ++index)); do
         task_cmd="${tasks_cmds[$index]}"
         task_core="${tasks_cores[$index]}"
@@ -416,7 +677,7 @@ function run_a_test() {
         # of these commands must remain like this in order for all experiments
         # to work (including the ones using SCHED_DEADLINE).
         taskset -c "$task_core" \
-            $TIME_CMD \
+            $time_cmd \
             $HIGH_PRIO_CMD \
             $task_cmd \
             >/dev/null 2>"$task_logfile" &
@@ -449,8 +710,9 @@ function run_a_test() {
     pinfo2 \
         "[Task $((task_index + 1))/${#TASKS_NAME[@]}]" \
         "Running '${task_name}'" \
-        "[run ${task_rep}/${HOWMANY_TIMES}] cooling down ..."
+        "[run ${task_rep}/${task_reps_max}] cooling down ..."
 
+    local cooldown_duration=
     wait_cooldown
 
     # Stop the sampler now that cooldown is over
@@ -470,6 +732,9 @@ function run_a_test() {
         "${tasks_logfile[@]}" \
         "$testdir"
 
+    # Record the actual duration of the cooldown
+    echo "cooldown_s ${cooldown_duration}" >"$testdir/cooldown.txt"
+
     # Delete all output files
     # NOTE: Input files are assumed not to be modified! Is this always true??
     rm -f "${sampler_logfile}" \
@@ -530,6 +795,291 @@ function should_skip_frequency() {
     return 1
 }
 
+# -------------------------------------------------------- #
+#                  sweep plan and manifest                 #
+# -------------------------------------------------------- #
+
+# Writes to the file given as argument all the configurations to run, one per
+# line in the form "<policy> <freq> <task_index> <task_name>", in the default
+# order (skipping policies and frequencies as requested by the configuration).
+#
+# Env variables:
+#  - HOWMANY_TASKS
+#  - TASKS_NAME
+#
+# Arguments:
+#  - the output file
+function plan_enumerate() {
+    local policy
+    local freq
+    local policy_cpulist
+    local policy_frequencies
+    local task_index
+
+    local policy_list=$(cpufreq_policy_list | sort_and_lineup)
+
+    pinfo2 'List of policies available:' "$policy_list"
+
+    : >"$1"
+    for policy in $policy_list; do
+        if should_skip_policy; then
+            pinfo1 "Skipping policy $policy"
+            continue
+        fi
+
+        policy_cpulist=($(cpufreq_policy_cpu_list "$policy"))
+        if [ "${#policy_cpulist[@]}" -lt "$HOWMANY_TASKS" ]; then
+            pinfosay1 "Skipping CPU Island ${policy} because it has only ${#policy_cpulist[@]} cpus instead of the $HOWMANY_TASKS required!"
+            continue
+        fi
+
+        policy_frequencies="$(cpufreq_policy_frequency_list "$policy" | sort_and_lineup)"
+
+        pinfo1 "Policy $policy supported frequencies: $(format_frequency $policy_frequencies)"
+
+        for freq in $policy_frequencies; do
+            if should_skip_frequency; then
+                pinfo1 "Skipping frequency $(format_frequency $freq)"
+                continue
+            fi
+
+            for ((task_index = 0; task_index < ${#TASKS_CMD[@]}; ++task_index)); do
+                echo "$policy $freq $task_index ${TASKS_NAME[$task_index]}" >>"$1"
+            done
+        done
+    done
+}
+
+# Creates the plan of the experiment, i.e. the ordered list of configurations
+# to run. With EXP_PLAN_ORDER=1, configurations are ordered to minimize thermal
+# transitions (see host/pyscripts/sweep_plan.py), otherwise the default order
+# is kept. With EXP_RESUME=1, an existing plan (and its manifest) is kept as is,
+# so that an interrupted experiment continues exactly where it stopped.
+#
+# Env variables:
+#  - EXP_RESUME
+#  - EXP_PLAN_ORDER
+#  - EXP_PLAN_HISTORY
+#  - HOWMANY_TASKS
+#
+# Arguments:
+#  - the plan file
+#  - the manifest file
+function plan_create() {
+    local plan_file="$1"
+    local manifest_file="$2"
+    local space_file="${plan_file}.all"
+
+    if [ "$EXP_RESUME" = "1" ] && [ -f "$plan_file" ]; then
+        pinfo1 "Resuming the experiment from its manifest" \
+            "($(grep -c ' done$' "$manifest_file" 2>/dev/null || true)" \
+            "of $(wc -l <"$plan_file") configurations completed)"
+        return
+    fi
+
+    rm -f "$manifest_file"
+    plan_enumerate "$space_file"
+
+    if [ "$EXP_PLAN_ORDER" = "1" ] && python3 "${PROJPATH}/host/pyscripts/sweep_plan.py" \
+        --out-file "$plan_file" \
+        --history "${EXP_PLAN_HISTORY}" \
+        --howmany "${HOWMANY_TASKS}" \
+        "$space_file"; then
+        rm -f "$space_file"
+    else
+        mv "$space_file" "$plan_file"
+    fi
+}
+
+# Appends a line to the manifest of the experiment, which records the runs
+# (and then the configurations) that are complete.
+#
+# Arguments:
+#  - the manifest file
+#  - the line to add
+function manifest_add() {
+    echo "$2" >>"$1"
+}
+
+# Prints the index of the last completed repetition of the current
+# configuration (-1 if none) or "done" if the configuration is complete.
+#
+# Env variables:
+#  - policy
+#  - freq
+#  - task_name
+#
+# Arguments:
+#  - the manifest file
+function manifest_last_rep() {
+    if [ ! -f "$1" ]; then
+        echo -1
+        return
+    fi
+
+    awk -v conf="$policy $freq $task_name" '
+        BEGIN { last = -1 }
+        substr($0, 1, length(conf) + 1) == conf " " {
+            if ($4 == "done") { last = "done"; exit }
+            if ($4 + 0 > last) { last = $4 + 0 }
+        }
+        END { print last }
+    ' "$1"
+}
+
+# Prepares the platform to run tests on the current policy.
+#
+# Env variables:
+#  - policy
+#  - policy_other
+#  - EXP_COOLDOWN_ADAPTIVE
+#  - EXP_COOLDOWN_BASELINE_SAMPLES
+function policy_setup() {
+    # Get a policy different than the current one (it
+    # may remain the same one, but it's okay in that
+    # case, we at least try)
+    if [ -z "$policy_other" -o "$policy_other" = "$policy" ]; then
+        policy_other=$(cpufreq_policy_find_another "$policy")
+    fi
+
+    pinfosay1 "Selected CPU Island is ${policy}"
+    pinfosay2 "Other CPU Island is ${policy_other}"
+
+    #--------------------------------------------------#
+    #-------- TASKSET SCRIPT AND POWER SAMPLER --------#
+    #--------------------------------------------------#
+
+    # NOTE: using a core on the same island if the system has only one
+    # island available (it is inevitable). In that case, only the last core
+    # of that island will be used (should not affect significantly
+    # experiments with less concurrent tasks than the number of cores per
+    # island...)
+
+    # NOTE: we no longer start stress tasks on the other policy
+
+    # Select the core on which the power sensor will run
+    # as the last one in policy_other.
+    readarray -t CPU_OTHER_LIST <<<"$(cpufreq_policy_cpu_list "$policy_other")"
+    POWERSAMPLER_CPUCORE=${CPU_OTHER_LIST[${#CPU_OTHER_LIST[@]} - 1]}
+    SCRIPT_CPUCORE=$POWERSAMPLER_CPUCORE
+
+    # TODO: how about having a "fake" policy that instead includes all cores
+    # that are NOT in the current policy?
+
+    # There is room for more use it
+    if [ "$policy_other" != "$policy" ] && [ "${#CPU_OTHER_LIST[@]}" -gt 1 ]; then
+        SCRIPT_CPUCORE=${CPU_OTHER_LIST[${#CPU_OTHER_LIST[@]} - 2]}
+    fi
+
+    if [ "$SCRIPT_CPUCORE" = "$POWERSAMPLER_CPUCORE" ]; then
+        pwarn "Running the experiment script on the same core as the power sampler!"
+    fi
+
+    # Move the current script to another core
+    # NOTICE: USING BOTH $BASHPID AND $$ BECAUSE THIS SCRIPT IS TECHNICALLY
+    # INSIDE A SUBSHELL!
+    taskset -c -p "${SCRIPT_CPUCORE}" $$ &>/dev/null
+    taskset -c -p "${SCRIPT_CPUCORE}" ${BASHPID} &>/dev/null
+
+    #--------------------------------------------------#
+    #--------- PREPARE POLICY AND FREQURENCY ----------#
+    #--------------------------------------------------#
+
+    # Prepare CPU policies for manual frequency switching
+    pwarn "If you see an error message here, but the script keeps going," \
+        "don't panic. It's all good."
+
+    if cpufreq_governor_setall "performance" ||
+        cpufreq_governor_setall "userspace"; then
+        # All good
+        :
+    else
+        perr 'NEITHER performance NOR userspace GOVERNORS SUPPORTED!'
+        perr 'Run will terminate now.'
+        false
+    fi
+
+    # Use the commented command to set the other policies to the maximum
+    # instead of the minimum frequency.
+    cpufreq_policy_frequency_minall
+    # cpufreq_policy_frequency_maxall
+
+    # Measure the idle temperature with the current frequencies, adaptive
+    # cooldowns will wait for it
+    if [ "$EXP_COOLDOWN_ADAPTIVE" = "1" ]; then
+        pinfo1 "Measuring idle temperatures..."
+        thermal_measure_baseline "$EXP_COOLDOWN_BASELINE_SAMPLES" 1
+        pinfo2 "Idle temperatures: ${THERMAL_BASELINE[*]}"
+    fi
+}
+
+# Runs all the repetitions of the current task at the current frequency,
+# starting after the last one recorded in the manifest.
+#
+# Env variables:
+#  - EXP_TASK_MIN_DURATION
+#  - TASKS_FILESIZE_RATIO
+#
+#  - policy
+#  - freq
+#  - task_index
+#  - task_name
+#
+# Arguments:
+#  - the manifest file
+function run_task_repetitions() {
+    local manifest_file="$1"
+    local task_rep_first
+
+    task_rep_first="$(manifest_last_rep "$manifest_file")"
+    if [ "$task_rep_first" = "done" ]; then
+        return
+    fi
+    task_rep_first=$((task_rep_first + 1))
+
+    infile_size=$((EXP_TASK_MIN_DURATION * TASKS_FILESIZE_RATIO[task_index]))
+
+    # Create the directory to hold the data in the ramfs
+    mkdir -p "${ramfs_datapath}"
+
+    # Copy if necessary a new (fake) data file in the desired path
+    # from disk
+    copy_fakedata_inram "${ramfs_infile}" "${infile_size}"
+
+    # FIXME: some commands may require the data as input to be a
+    # certain format! If so, make a call here to support that!
+
+    # Drop caches before the 0-execution only, then keep the data in
+    # ram for all subsequent runs
+    sync
+    echo 1 >/proc/sys/vm/drop_caches
+
+    # Repeat the test multiple times (with a 0 run too, which shall be ignored
+    # later!), possibly until results are precise enough
+    task_reps_max="$(repetitions_max)"
+    reps_state_file="policy_${policy}/freq_${freq}/task_${task_name}/repetitions.json"
+    if [ "$task_rep_first" -eq 0 ]; then
+        rm -f "$reps_state_file"
+    fi
+
+    for ((task_rep = task_rep_first; task_rep <= task_reps_max; ++task_rep)); do
+        run_a_test
+        manifest_add "$manifest_file" "$policy $freq $task_name $task_rep"
+
+        if enough_repetitions "$reps_state_file"; then
+            break
+        fi
+
+        # FIXME: if for certain commands some restoration actions are to be
+        # performed on the input file, do it here. But restoation means that
+        # the command modifies its input file, that is a much bigger issue for
+        # the way we handle homogeneous tests (all the input files are the
+        # same file with multiple symbolic links)!
+    done
+
+    manifest_add "$manifest_file" "$policy $freq $task_name done"
+}
+
 function load_conf_files() {
     for arg in "$@"; do
         if [ ! -f "$arg" ]; then
@@ -564,6 +1114,7 @@ function sort_and_lineup() {
     . "${SCRIPT_PATH}/util/cpufreq.sh"
     . "${SCRIPT_PATH}/util/fix-trip-points.sh"
     . "${SCRIPT_PATH}/util/fakedata.sh"
+    . "${SCRIPT_PATH}/util/thermal.sh"
 
     # Put tokens for default Telegram channel and your
     # chatID to get notified about the completion of your
@@ -583,6 +1134,7 @@ function sort_and_lineup() {
     # base.sh from the specified file, if any
     pinfo1 "About to load configuration files provided via command line..."
     load_conf_files "$@"
+    steady_detect_check
 
     # Jump into output directory.
     mkdir -p "$EXP_BASE_DIR/howmany_${HOWMANY_TASKS}"
@@ -628,158 +1180,51 @@ function sort_and_lineup() {
 
     pinfo1 'Experiment will begin NOW!'
 
-    policy_list=$(cpufreq_policy_list | sort_and_lineup)
+    # The plan of the experiment and the runs already completed
+    plan_file="sweep_plan.txt"
+    manifest_file="sweep_manifest.txt"
 
-    pinfo2 'List of policies available:' "$policy_list"
+    # Groups of perf events counted in turn by the repetitions of each test
+    perf_groups_create "perf_groups.txt"
+    if [ "${#PERF_GROUPS[@]}" -gt 0 ]; then
+        pinfo2 "Perf events are counted in ${#PERF_GROUPS[@]} groups:" \
+            "${PERF_GROUPS[*]}"
+    fi
+
+    plan_create "$plan_file" "$manifest_file"
 
     #------------------------------------------------------#
-    #------------------- FOREACH POLICY -------------------#
+    #---------------- FOREACH CONFIGURATION ---------------#
     #------------------------------------------------------#
 
+    # Configurations of the same policy (and frequency) are contiguous in the
+    # plan, the platform is set up again only when they change
     policy=
+    policy_current=
     policy_other=
-    policy_cpulist=
-    for policy in $policy_list; do
-        if should_skip_policy; then
-            pinfo1 "Skipping policy $policy"
-            continue
-        fi
-
-        policy_cpulist=($(cpufreq_policy_cpu_list "$policy"))
-        if [ "${#policy_cpulist[@]}" -lt "$HOWMANY_TASKS" ]; then
-            pinfosay1 "Skipping CPU Island ${policy} because it has only $#_cpulist[@] cpus instead of the $HOWMANY_TASKS required!"
+    freq=
+    freq_current=
+    while read -r -u 3 policy freq task_index task_name; do
+        if [ "$(manifest_last_rep "$manifest_file")" = "done" ]; then
             continue
         fi
 
-        # Get a policy different than the current one (it
-        # may remain the same one, but it's okay in that
-        # case, we at least try)
-        if [ -z "$policy_other" -o "$policy_other" = "$policy" ]; then
-            policy_other=$(cpufreq_policy_find_another "$policy")
-        fi
-
-        pinfosay1 "Selected CPU Island is ${policy}"
-        pinfosay2 "Other CPU Island is ${policy_other}"
-
-        #--------------------------------------------------#
-        #-------- TASKSET SCRIPT AND POWER SAMPLER --------#
-        #--------------------------------------------------#
-
-        # NOTE: using a core on the same island if the system has only one
-        # island available (it is inevitable). In that case, only the last core
-        # of that island will be used (should not affect significantly
-        # experiments with less concurrent tasks than the number of cores per
-        # island...)
-
-        # NOTE: we no longer start stress tasks on the other policy
-
-        # Select the core on which the power sensor will run
-        # as the last one in policy_other.
-        readarray -t CPU_OTHER_LIST <<<"$(cpufreq_policy_cpu_list "$policy_other")"
-        POWERSAMPLER_CPUCORE=${CPU_OTHER_LIST[${#CPU_OTHER_LIST[@]} - 1]}
-        SCRIPT_CPUCORE=$POWERSAMPLER_CPUCORE
-
-        # TODO: how about having a "fake" policy that instead includes all cores
-        # that are NOT in the current policy?
-
-        # There is room for more use it
-        if [ "$policy_other" != "$policy" ] && [ "${#CPU_OTHER_LIST[@]}" -gt 1 ]; then
-            SCRIPT_CPUCORE=${CPU_OTHER_LIST[${#CPU_OTHER_LIST[@]} - 2]}
-        fi
-
-        if [ "$SCRIPT_CPUCORE" = "$POWERSAMPLER_CPUCORE" ]; then
-            pwarn "Running the experiment script on the same core as the power sampler!"
-        fi
-
-        # Move the current script to another core
-        # NOTICE: USING BOTH $BASHPID AND $$ BECAUSE THIS SCRIPT IS TECHNICALLY
-        # INSIDE A SUBSHELL!
-        taskset -c -p "${SCRIPT_CPUCORE}" $$ &>/dev/null
-        taskset -c -p "${SCRIPT_CPUCORE}" ${BASHPID} &>/dev/null
-
-        #--------------------------------------------------#
-        #--------- PREPARE POLICY AND FREQURENCY ----------#
-        #--------------------------------------------------#
-
-        # Prepare CPU policies for manual frequency switching
-        pwarn "If you see an error message here, but the script keeps going," \
-            "don't panic. It's all good."
-
-        if cpufreq_governor_setall "performance" ||
-            cpufreq_governor_setall "userspace"; then
-            # All good
-            :
-        else
-            perr 'NEITHER performance NOR userspace GOVERNORS SUPPORTED!'
-            perr 'Run will terminate now.'
-            false
+        if [ "$policy" != "$policy_current" ]; then
+            policy_setup
+            policy_current="$policy"
+            freq_current=
         fi
 
-        # Use the commented command to set the other policies to the maximum
-        # instead of the minimum frequency.
-        cpufreq_policy_frequency_minall
-        # cpufreq_policy_frequency_maxall
-
-        policy_frequencies="$(cpufreq_policy_frequency_list "$policy" | sort_and_lineup)"
-
-        pinfo1 "Policy $policy supported frequencies: $(format_frequency $policy_frequencies)"
-
-        #--------------------------------------------------#
-        #--------------- FOREACH FREQUENCY ----------------#
-        #--------------------------------------------------#
-
-        # For each frequency available for all its cores at once
-        for freq in $policy_frequencies; do
-            if should_skip_frequency; then
-                pinfo1 "Skipping frequency $(format_frequency $freq)"
-                continue
-            fi
-
+        if [ "$freq" != "$freq_current" ]; then
             pinfosay1 "Selected frequency $(format_frequency $freq)"
 
             # Set the desired frequency for the given policy
             cpufreq_policy_frequency_set "$policy" "$freq"
+            freq_current="$freq"
+        fi
 
-            # This line will be deleted by the print inside the single test run
-            # pinfo_newline
-
-            #----------------------------------------------#
-            #---------------- FOREACH TASK ----------------#
-            #----------------------------------------------#
-            for ((task_index = 0; task_index < ${#TASKS_CMD[@]}; ++task_index)); do
-                task_name=${TASKS_NAME[$task_index]}
-                infile_size=$((EXP_TASK_MIN_DURATION * TASKS_FILESIZE_RATIO[task_index]))
-
-                # Create the directory to hold the data in the ramfs
-                mkdir -p "${ramfs_datapath}"
-
-                # Copy if necessary a new (fake) data file in the desired path
-                # from disk
-                copy_fakedata_inram "${ramfs_infile}" "${infile_size}"
-
-                # FIXME: some commands may require the data as input to be a
-                # certain format! If so, make a call here to support that!
-
-                # Drop caches before the 0-execution only, then keep the data in
-                # ram for all subsequent runs
-                sync
-                echo 1 >/proc/sys/vm/drop_caches
-
-                # Repeat the test multiple times (with a 0 run too, which shall
-                # be ignored later!)
-                for ((task_rep = 0; task_rep <= "${HOWMANY_TIMES}"; ++task_rep)); do
-                    run_a_test
-
-                    # FIXME: if for certain commands some restoration actions
-                    # are to be performed on the input file, do it here. But
-                    # restoation means that the command modifies its input file,
-                    # that is a much bigger issue for the way we handle
-                    # homogeneous tests (all the input files are the same file
-                    # with multiple symbolic links)!
-                done # FOREACH REPETITION
-            done     # FOREACH TASK
-        done         # FOREACH FREQUENCY
-    done             # FOREACH POLICY
+        run_task_repetitions "$manifest_file"
+    done 3<"$plan_file" # FOREACH CONFIGURATION
 
     notify_termination
 )
@@ -0,0 +1,121 @@
+#!/bin/bash
+
+# +--------------------------------------------------------+
+# |                   Utility Functions                    |
+# +--------------------------------------------------------+
+
+THERMAL_PREFIX="/sys/class/thermal/thermal_zone"
+
+# The idle temperature of each thermal zone (in the same order as
+# thermal_zone_list), in millidegrees Celsius
+THERMAL_BASELINE=()
+
+# The duration of the last cooldown, in seconds
+THERMAL_COOLDOWN_DURATION=0
+
+# List all thermal zones whose temperature can be read
+function thermal_zone_list() {
+    local z
+    for z in "${THERMAL_PREFIX}"*; do
+        if [ -r "$z/temp" ]; then
+            echo "${z#"${THERMAL_PREFIX}"}"
+        fi
+    done | sort -n
+}
+
+# Print the temperature of all thermal zones on a single line, in millidegrees
+# Celsius
+function thermal_read_all() {
+    local z
+    for z in $(thermal_zone_list); do
+        cat "${THERMAL_PREFIX}${z}/temp"
+    done | tr '\n' ' '
+}
+
+# Milliseconds since the epoch
+function thermal_now_ms() {
+    echo "$(($(date +%s%N) / 1000000))"
+}
+
+# +--------------------------------------------------------+
+# |                        Cooldown                        |
+# +--------------------------------------------------------+
+
+# Measure the idle temperature of each thermal zone, averaging it over the given
+# number of samples
+#
+# Arguments:
+#  1. Number of samples
+#  2. Interval between samples in seconds
+function thermal_measure_baseline() {
+    local count="$1"
+    local interval="$2"
+    local sums=()
+    local temps
+    local i
+    local j
+
+    for ((i = 0; i < count; ++i)); do
+        temps=($(thermal_read_all))
+        for ((j = 0; j < ${#temps[@]}; ++j)); do
+            sums[$j]=$((${sums[$j]:-0} + temps[j]))
+        done
+        sleep "$interval"
+    done
+
+    THERMAL_BASELINE=()
+    for ((j = 0; j < ${#sums[@]}; ++j)); do
+        THERMAL_BASELINE[$j]=$((sums[j] / count))
+    done
+}
+
+# Returns whether all thermal zones are within the given tolerance from their
+# idle temperature
+#
+# Arguments:
+#  1. Tolerance in millidegrees Celsius
+function thermal_is_cool() {
+    local tolerance="$1"
+    local temps
+    local j
+
+    temps=($(thermal_read_all))
+    for ((j = 0; j < ${#THERMAL_BASELINE[@]}; ++j)); do
+        if [ "${temps[$j]:-0}" -gt "$((THERMAL_BASELINE[j] + tolerance))" ]; then
+            return 1
+        fi
+    done
+
+    return 0
+}
+
+# Wait until all thermal zones are within the given tolerance from their idle
+# temperature (see thermal_measure_baseline), but no less than the given minimum
+# wait and no longer than the given maximum wait. The actual duration is saved
+# in THERMAL_COOLDOWN_DURATION.
+#
+# Arguments:
+#  1. Tolerance in millidegrees Celsius
+#  2. Maximum wait in seconds
+#  3. Interval between checks in seconds
+#  4. Minimum wait in seconds (default 0)
+function thermal_wait_cooldown() {
+    local tolerance="$1"
+    local max_wait_ms="$(($2 * 1000))"
+    local interval="$3"
+    local min_wait_ms="$((${4:-0} * 1000))"
+    local start
+    local elapsed=0
+
+    start=$(thermal_now_ms)
+    while [ "$elapsed" -lt "$max_wait_ms" ]; do
+        if [ "$elapsed" -ge "$min_wait_ms" ] && thermal_is_cool "$tolerance"; then
+            break
+        fi
+
+        sleep "$interval"
+        elapsed=$(($(thermal_now_ms) - start))
+    done
+
+    THERMAL_COOLDOWN_DURATION=$(calculator "$elapsed / 1000")
+}
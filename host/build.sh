@@ -52,6 +52,9 @@ List of options (all commands):
   -n, --dry-run     Prints out all commands but does not execute them.
   -j, --jobs      JOBS
                     The number of jobs to run simultaneously.
+  -b, --batch       Converts all the power files that changed in a single
+                    process (with a pool of JOBS workers) instead of starting
+                    one process per file; much faster with many small files.
   -c, --col-file  FILE
                     The name of the file to use to remap columns when building.
                     By default, no renaming is used (not recommended).
@@ -97,6 +100,9 @@ function toshortopts() {
         --jobs)
             printf ' %s' "-j"
             ;;
+        --batch)
+            printf ' %s' "-b"
+            ;;
         *)
             printf ' %s' "$1"
             ;;
@@ -158,6 +164,9 @@ function parse_opt_args() {
         n)
             dry_run=1
             ;;
+        b)
+            batch=1
+            ;;
         j)
             use_jobs=1
             njobs="$OPTARG"
@@ -259,6 +268,13 @@ function build() {
         args+=" -j $njobs"
     fi
 
+    if [ $batch = 1 ]; then
+        args+=" BATCH=1"
+        if [ $use_jobs = 1 ]; then
+            args+=" BATCH_JOBS=$njobs"
+        fi
+    fi
+
     printf ' --> Beginning processing for %s ...\n' "$cur_dir"
     printf ' --> Running the following command:\n  %s\n' "make $args"
 
@@ -310,10 +326,11 @@ function touch_power() {
     path_host="$(realpath "${path_proj}/host")"
     path_pyscripts="${path_host}/pyscripts"
 
-    optstring="hnj:c:C:"
+    optstring="hnbj:c:C:"
 
     # Optional arguments
     dry_run=0
+    batch=0
     use_jobs=0
     njobs=
     help_exit=
@@ -1,25 +1,16 @@
 #!/bin/bash
 
-function is_zero_repetition() {
-    [[ "$1" =~ "/0/" ]]
-}
+# NOTE: the catalog prints absolute paths, which is a must!
 
-function print_all_matching_no_zero() {
-    # NOTE: printing absolute paths is a must!
-    for f in $(find "$(realpath "$1")" "${@:2}"); do
-        if is_zero_repetition "$f" ; then
-            continue
-        fi
-        echo "$f"
-    done
-}
+# The scripts may not be in the PATH yet when the rules are generated
+path_pyscripts="$(dirname "$(realpath "$0")")/pyscripts"
 
 function print_files_samples_perf() {
-    print_all_matching_no_zero "$1" -name 'measure_time.txt*'
+    "${path_pyscripts}/data_catalog.py" --skip-zero --name 'measure_time.txt*' "$1"
 }
 
 function print_files_samples_power() {
-    print_all_matching_no_zero "$1" -name 'measure_power.txt'
+    "${path_pyscripts}/data_catalog.py" --skip-zero --name 'measure_power.txt' "$1"
 }
 
 function sample2table_perf() {
@@ -52,6 +43,11 @@ function sample2table_power() {
 
     # Printing the actual rules on the final Makefile
 
+    # The lists of power samples and tables, used in batch mode
+    echo 'SAMPLES_POWER := ' "$(cat "${files_samples_power}" | tr '\n' ' ')"
+    echo 'TABLES_POWER := ' "$(cat "${files_tables_power}" | tr '\n' ' ')"
+    echo ''
+
     # The collapsed table for perf has all perf tables as dependencies
     echo 'collapsed_table_perf.csv: ' \
         "$(cat "${files_tables_perf}" | tr '\n' ' ')" \
@@ -148,11 +148,21 @@ def island_subtable(df, island, islands):
 #-- island_subtable
 
 
-def rel_time_calc(row, in_field, out_field, task_max_runtime):
-    vmax = task_max_runtime[row['task']]
-    row[out_field] = row[in_field] / vmax
-    return row
-#-- rel_time_calc
+def add_col_relative(df, ref_df, in_field, out_field, by='task',
+        aggfun='mean'):
+    """
+    Adds to df the out_field column, which is in_field relative to a reference
+    value for each group of rows with the same value of the by column.
+
+    The reference value of each group is computed with a single groupby,
+    aggregating with aggfun the in_field of the rows of ref_df in that group.
+    Rows of groups without a reference get NaN.
+    """
+    reference = ref_df.groupby(by)[in_field].agg(aggfun)
+    df = df.copy()
+    df[out_field] = df[in_field] / df[by].map(reference)
+    return df
+#-- add_col_relative
 
 
 def collapse_table(df, reference_field='time'):
@@ -201,22 +211,15 @@ def collapse_table(df, reference_field='time'):
     in_field = reference_field + the_suffix
     out_field = reference_field + '_' + 'rel'
 
-    task_max_runtime = {}
-
     # If only one island, typically it is called 'cpu',
     # otherwise the smallest island is usually called
     # 'little'
     small_island = 'cpu' if 'cpu' in islands else 'little'
     st = subtables[small_island]
     st = st[st['howmany'] == 1]
-    for task in st['task'].unique():
-        task_max_runtime[task] = st[st['task'] == task][in_field].max()
 
     # Calculate the new column and drop the suffix
-    df = df.apply(
-        lambda row: rel_time_calc(row, in_field, out_field, task_max_runtime),
-        axis=1,
-    )
+    df = add_col_relative(df, st, in_field, out_field, aggfun='max')
     # df = df.rename(columns=lambda col: col.replace(the_suffix, ''))
     sorted_fields = base_fields.copy()
     cols = list(df.columns)
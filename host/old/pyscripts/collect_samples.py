@@ -7,6 +7,8 @@ import os
 import numpy as np
 import pandas as pd
 
+from collapse import add_col_relative
+
 # +--------------------------------------------------------+
 # |          Command-line Arguments Configuration          |
 # +--------------------------------------------------------+
@@ -51,49 +53,26 @@ def parse_cmdline_args():
 # |                          Body                          |
 # +--------------------------------------------------------+
 
-def rel_time_calc(row, in_field, out_field, task_max_runtime):
-    vmax = task_max_runtime[row['task']]
-    row[out_field] = row[in_field] / vmax
-    return row
-#-- rel_time_calc
-
-def rel_time_calc(row, inf, outf, task_max_runtime):
-    tm = task_max_runtime[row['task']]
-    row[outf] = row[inf] / tm
-    return row
-
 def add_col_time_rel(df):
-    task_time = {}
     islands = df['island'].unique()
     small_island = islands[0] if len(islands) == 1 else 'little'
 
-    # Calculate max time needed for single execution on the
-    # little core, for each task
+    # The reference time of each task is the mean time needed for single
+    # execution on the smallest island, at its minimum frequency
     in_field = 'time'
     out_field = 'time_rel'
 
-    # Now let's select the minimum frequency on that island for howmany=1
-    st = df[df['island'] == small_island]
-    st['howmany'] = pd.to_numeric(st['howmany'])
-    st = st[st['howmany'] == 1]
-    st['frequency'] = pd.to_numeric(st['frequency'])
-    min_freq = st['frequency'].min()
-    st = st[st['frequency'] == min_freq]
-
-    # Now we have only minimum frequency all samples for
-    # howmany=1 on the smallest core
-    for task in st['task'].unique():
-        st_task = st[st['task'] == task]
-        task_time[task] = st_task[in_field].mean()
-
-    if len(task_time) < 1:
+    howmany = pd.to_numeric(df['howmany'])
+    frequency = pd.to_numeric(df['frequency'])
+
+    st = (df['island'] == small_island) & (howmany == 1)
+    st = st & (frequency == frequency[st].min())
+
+    if not st.any():
         return df
 
-    df = df.apply(
-        lambda row: rel_time_calc(row, in_field, out_field, task_time),
-        axis=1,
-    )
-    return df
+    return add_col_relative(df, df[st], in_field, out_field, aggfun='mean')
+#-- add_col_time_rel
 
 def last_match(regex, string):
     match = None
@@ -115,7 +94,7 @@ def main():
     for k in regexes:
         regexes[k] = re.compile(regexes[k])
 
-    out_df = pd.DataFrame(columns=regexes.keys())
+    dfs = []
 
     for f in args.in_files:
         data = {}
@@ -133,7 +112,15 @@ def main():
         df.columns = df.columns.str.strip()
         df.loc[:, data.keys()] = data.values()
         print(f.name)
-        out_df = out_df.append(df, ignore_index=True)
+        dfs.append(df)
+
+    if len(dfs) < 1:
+        out_df = pd.DataFrame(columns=list(regexes.keys()))
+    else:
+        out_df = pd.concat(dfs, ignore_index=True)
+    out_df = out_df[list(regexes.keys()) + [
+        c for c in out_df.columns if c not in regexes
+    ]]
 
     # out_df = add_time_rel_col(out_df)
 
@@ -7,7 +7,10 @@
 # [min, 1st, 25th, 50th, 75th, 90th, max]
 #
 # It does this first for each board, then sums up all values
-# for all boards.
+# for all boards. Files are read one at a time: the grand total
+# is computed from a streaming quantile sketch (see
+# QuantileSketch), so its percentiles are approximated within
+# the given relative accuracy (the maximum is exact).
 #
 # In doing so, it also differentiates between negative and
 # positive error values.
@@ -67,6 +70,15 @@ options = [
             'default': 'a.out',
         },
     },
+    {
+        'short': '-a',
+        'long': '--accuracy',
+        'opts': {
+            'help': 'The relative accuracy of the percentiles of the grand total',
+            'type': float,
+            'default': 0.001,
+        },
+    },
 ]
 
 
@@ -127,20 +139,35 @@ def describe(df):
     print(desc)
 
 
+def view_positive(df):
+    return df.clip(lower=0)
+
+
+def view_negative(df):
+    return view_positive(-df)
+
+
+def view_abs(df):
+    return df.abs()
+
+
+VIEWS = {
+    'POSITIVE': view_positive,
+    'NEGATIVE': view_negative,
+    'ABSOLUTE': view_abs,
+}
+
+
 def describe_positive(df):
-    df = df.copy()
-    df[df < 0] = 0
-    describe(df)
+    describe(view_positive(df))
 
 
 def describe_negative(df):
-    df = -df
-    describe_positive(df)
+    describe(view_negative(df))
 
 
 def describe_abs(df):
-    df = df.abs()
-    describe(df)
+    describe(view_abs(df))
 
 def print_separator(numdashes, word):
     print(' ' + '=' * numdashes + ' ' + word + ' ' + '=' * numdashes)
@@ -166,6 +193,103 @@ def describe_all(df, numdashes=15):
     describe_abs(df)
 
 
+# +--------------------------------------------------------+
+# |                    Quantile Sketch                     |
+# +--------------------------------------------------------+
+
+class QuantileSketch:
+    """
+    Mergeable summary of the distribution of a stream of nonnegative values.
+
+    Values are counted in logarithmically-spaced buckets (as in DDSketch), so
+    that any quantile is returned with the given relative accuracy using a
+    memory that depends only on the range of the values, not on their number.
+    The maximum is tracked exactly.
+    """
+
+    def __init__(self, accuracy):
+        self.gamma      = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma  = np.log(self.gamma)
+        self.buckets    = {}
+        self.zeros      = 0
+        self.infs       = 0
+        self.count      = 0
+        self.max        = np.nan
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+
+        self.count  += values.size
+        self.max    = np.fmax(self.max, values.max())
+        self.zeros  += np.count_nonzero(values == 0)
+        self.infs   += np.count_nonzero(np.isinf(values))
+
+        values = values[(values > 0) & np.isfinite(values)]
+        keys = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            self.buckets[k] = self.buckets.get(k, 0) + c
+
+    def merge(self, other):
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        self.zeros  += other.zeros
+        self.infs   += other.infs
+        self.count  += other.count
+        self.max    = np.fmax(self.max, other.max)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+
+        rank = int(np.floor(q * (self.count - 1)))
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if rank < seen:
+                value = 2 * self.gamma**k / (self.gamma + 1)
+                return min(value, self.max)
+
+        # Only infinite values left
+        return np.inf
+#-- QuantileSketch
+
+
+def sketches_new(columns, accuracy):
+    return {
+        view: {col: QuantileSketch(accuracy) for col in columns}
+        for view in VIEWS
+    }
+
+
+def sketches_add(sketches, df):
+    for view, view_fun in VIEWS.items():
+        view_df = view_fun(df)
+        for col, sketch in sketches[view].items():
+            sketch.add(view_df[col].to_numpy())
+
+
+def describe_sketches(sketches):
+    rows = percentiles_to_perc(PERCENTILES) + ['max']
+    desc = pd.DataFrame({
+        col: [s.quantile(q) for q in PERCENTILES] + [s.max]
+        for col, s in sketches.items()
+    }, index=rows)
+    print(desc)
+
+
+def describe_all_sketches(sketches, numdashes=15):
+    for view in VIEWS:
+        print_separator(numdashes, view)
+        describe_sketches(sketches[view])
+
+
 # +--------------------------------------------------------+
 # |                          Main                          |
 # +--------------------------------------------------------+
@@ -173,7 +297,8 @@ def describe_all(df, numdashes=15):
 def main():
     args = parse_cmdline_args()
 
-    out_df = pd.DataFrame()
+    columns = [TIME_ERROR, POWER_ERROR]
+    sketches = sketches_new(columns, args.accuracy)
 
     for inf in args.in_files:
         df = pd.read_csv(inf, float_precision='high')
@@ -181,23 +306,16 @@ def main():
         if args.task_list:
             df = df[df[TASK].isin(args.task_list)]
 
-        df = df[[
-            TIME_ERROR,
-            POWER_ERROR,
-        ]]
+        df = df[columns]
 
         name = str(os.path.basename(os.path.dirname(inf)))
         print_header(name)
         describe_all(df)
 
-        out_df = pd.concat(
-            [out_df, df],
-            ignore_index=True,
-            copy=False,
-        )
+        sketches_add(sketches, df)
 
     print_header('GRAND TOTAL')
-    describe_all(out_df)
+    describe_all_sketches(sketches)
 
     return 0
 #-- main
@@ -31,6 +31,11 @@ PRED_TIME   = 'pred_time'
 MEAS_POWER  = 'meas_power'
 PRED_POWER  = 'pred_power'
 
+# What to do when a measurement is zero but the prediction is not
+ON_ZERO_RAISE   = 'raise'
+ON_ZERO_INF     = 'inf'
+ON_ZERO_NAN     = 'nan'
+
 # +--------------------------------------------------------+
 # |          Command-line Arguments Configuration          |
 # +--------------------------------------------------------+
@@ -63,6 +68,20 @@ options = [
             'default': 'a.out',
         },
     },
+    {
+        'short': '-z',
+        'long': '--on-zero',
+        'opts': {
+            'help': 'What to do when a measured value is zero but the predicted one is not (the error is infinite): raise an error, use a signed infinite error or an undefined (NaN) one',
+            'type': str,
+            'choices': [
+                ON_ZERO_RAISE,
+                ON_ZERO_INF,
+                ON_ZERO_NAN,
+            ],
+            'default': ON_ZERO_RAISE,
+        },
+    },
 ]
 
 
@@ -107,25 +126,49 @@ def safe_save_to_csv(out_df, out_file):
 # |                  Comparison Function                   |
 # +--------------------------------------------------------+
 
-def percent_error(m, p):
+class BlatantlyWrongPredictionException(Exception):
+    pass
+
+
+def percent_error(m, p, on_zero=ON_ZERO_RAISE):
     """
-    Returns the absolute percentage error (with sign).
+    Returns the absolute percentage errors (with sign) of all the given values.
+
+    When both the measured and the predicted values are zero, the error is
+    zero; when only the measured value is zero, the error is infinite and it is
+    handled as indicated by on_zero.
 
     Parameters
     ----------
-    m : numeric
-        The original measured value.
-    p : numeric
-        The predicted value.
+    m : array_like
+        The original measured values.
+    p : array_like
+        The predicted values.
+    on_zero : str
+        One of ON_ZERO_RAISE, ON_ZERO_INF or ON_ZERO_NAN.
     """
-    if m == 0:
-        if p == 0:
-            return 0
-        else:
-            raise BlatantlyWrongPredictionException(
-                'Expected 0, predicted ' + str(p) + "! APE is ∞!"
-            )
-    return (p - m) / abs(m) * 100
+    m = np.asarray(m, dtype=float)
+    p = np.asarray(p, dtype=float)
+
+    zero  = m == 0
+    wrong = zero & (p != 0)
+
+    if on_zero == ON_ZERO_RAISE and wrong.any():
+        raise BlatantlyWrongPredictionException(
+            'Expected 0, predicted ' + str(p[wrong][0]) + "! APE is ∞!"
+        )
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = (p - m) / np.abs(m) * 100
+
+    error[zero & (p == 0)] = 0
+    if on_zero == ON_ZERO_INF:
+        error[wrong] = np.copysign(np.inf, p[wrong])
+    else:
+        error[wrong] = np.nan
+
+    return error
+#-- percent_error
 
 
 # +--------------------------------------------------------+
@@ -174,14 +217,12 @@ def main():
         validate='1:1',
     )
 
-    df['time_error'] = df.apply(lambda row:
-        percent_error(row[MEAS_TIME], row[PRED_TIME]),
-        axis = 'columns',
+    df['time_error'] = percent_error(df[MEAS_TIME], df[PRED_TIME],
+        on_zero=args.on_zero,
     )
 
-    df['power_error'] = df.apply(lambda row:
-        percent_error(row[MEAS_POWER], row[PRED_POWER]),
-        axis = 'columns',
+    df['power_error'] = percent_error(df[MEAS_POWER], df[PRED_POWER],
+        on_zero=args.on_zero,
     )
 
     out_df = df
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import concurrent.futures
 import os
 import sys
 from pathlib import Path
@@ -64,6 +65,15 @@ options = [
             'action': 'store_false',
         },
     },
+    {
+        'short': '-j',
+        'long': '--jobs',
+        'opts': {
+            'help': 'The number of parallel processes used to fit (default: all cpus, ignored when plotting)',
+            'type': int,
+            'default': None,
+        },
+    },
 ]
 
 def parse_cmdline_args():
@@ -139,18 +149,37 @@ POWER='sensor_cpu_uW'
 
 should_plot=False
 
-# SUPPOSE ONLY TIME FOR NOW
-def fit_values(df, xcol, ycol, fhandle,
-    values_field='params', title=''):
-    # Input range ~ [0-2] GHz expressed in KHz (because of cpufreq)
-    x = df[xcol].to_numpy() / 1000000.0
-    y = df[ycol].to_numpy()
+KEYFIELDS = [ISLAND, HOWMANY, TASK]
 
-    whichtodelete = np.argwhere(np.isnan(y))
-    x = np.delete(x, whichtodelete)
-    y = np.delete(y, whichtodelete)
+# Each group (island, howmany, task) is fitted with all these models, the
+# parameters of each model are stored in columns prefix0, prefix1, ...
+FIT_MAPS = [
+    {
+        'xcol': FREQ, 'ycol': TIME, 'fhandle': time_balsini,
+        'prefix':'param_time',
+    },
+    {
+        'xcol': FREQ, 'ycol': TIME, 'fhandle': time_simpler,
+        'prefix':'param_time_simple',
+    },
+    {
+        'xcol': FREQ, 'ycol': POWER, 'fhandle': power_balsini_compact_alt,
+        'prefix':'param_power',
+    }
+]
 
-    popt, pcov = curve_fit(fhandle, x, y, check_finite=True)
+def fit_values(x, y, fhandle, p0=None, title=''):
+    """
+    Fits the given function on the (x, y) points, starting from the initial
+    parameters p0 (if any). If the fit starting from p0 does not converge, it
+    is repeated from the default initial parameters.
+    """
+    try:
+        popt, pcov = curve_fit(fhandle, x, y, p0=p0, check_finite=True)
+    except RuntimeError:
+        if p0 is None:
+            raise
+        popt, pcov = curve_fit(fhandle, x, y, check_finite=True)
 
     if should_plot:
         y = y[x.argsort()]
@@ -161,76 +190,77 @@ def fit_values(df, xcol, ycol, fhandle,
         plt.title(title)
         plt.show()
 
-    return pd.DataFrame({ values_field: [popt]})
+    return popt
 #-- fit_values
 
 
-def fit_by_fields(df, xcol, ycol, fhandle, fields,
-    values_field='params', title=''):
-    if len(fields) < 1:
-        return fit_values(df, xcol, ycol, fhandle, title=title)
-
-    out = pd.DataFrame()
-    fields = fields.copy()
-    field = fields.pop(0)
-    for value in df[field].unique():
-        indf = df[df[field] == value]
-        outdf = fit_by_fields(indf, xcol, ycol, fhandle, fields,
-            values_field=values_field,
-            title=title + ' ' + str(field) + ':' + str(value),
-        )
-        outdf[field] = value
-        out = pd.concat([out, outdf], ignore_index=True)
-    return out
-
-def prepare_table(df, keyfields, in_field, prefix='', suffix=''):
-    newcols = pd.DataFrame(df[in_field].values.tolist(), index=df.index)
-    newcols.columns = [
-        prefix + str(col) + suffix
-        for col in newcols.columns
-    ]
-    newcols[keyfields] = df[keyfields]
-    return newcols
-
-def fit_and_prepare(df, xcol, ycol, keyfields, fhandle, prefix='', suffix=''):
-    v_field = 'params'
-
-    outdf = fit_by_fields(df, xcol, ycol, fhandle, keyfields,
-        values_field=v_field,
-    )
+def group_arrays(df, maps):
+    """
+    Returns the (x, y) points of each group (island, howmany, task) and model,
+    extracted in a single groupby pass.
+
+    Groups are returned in chains, one for each (island, task) and ordered by
+    howmany, so that each group can be warm-started from the previous one.
+    """
+    chains = {}
+    for key, group in df.groupby(KEYFIELDS, sort=True):
+        arrays = {}
+        for m in maps:
+            # Input range ~ [0-2] GHz expressed in KHz (because of cpufreq)
+            x = group[m['xcol']].to_numpy() / 1000000.0
+            y = group[m['ycol']].to_numpy()
+            valid = ~np.isnan(y)
+            arrays[m['prefix']] = (x[valid], y[valid])
+
+        island, howmany, task = key
+        chains.setdefault((island, task), []).append((key, arrays))
+    return list(chains.values())
+#-- group_arrays
+
+
+def fit_chain(chain, maps):
+    """
+    Fits all models on each group of the chain, using the parameters fitted on
+    the previous group as initial guess.
+    """
+    rows = []
+    p0 = {}
+    for key, arrays in chain:
+        row = dict(zip(KEYFIELDS, key))
+        for m in maps:
+            x, y = arrays[m['prefix']]
+            title = ' '.join(str(f) + ':' + str(v)
+                for f, v in zip(KEYFIELDS, key))
+            popt = fit_values(x, y, m['fhandle'],
+                p0=p0.get(m['prefix']),
+                title=title,
+            )
+            p0[m['prefix']] = popt
+            for i, v in enumerate(popt):
+                row[m['prefix'] + str(i)] = v
+        rows.append(row)
+    return rows
+#-- fit_chain
+
+
+def fit_table(df, maps=FIT_MAPS, max_workers=None):
+    chains = group_arrays(df, maps)
 
-    return prepare_table(
-        outdf, keyfields, v_field, prefix=prefix, suffix=suffix,
-    )
-#-- fit_and_prepare
-
-def fit_table(df):
-    keyfields = [ISLAND, HOWMANY, TASK]
-    maps = [
-        {
-            'xcol': FREQ, 'ycol': TIME, 'fhandle': time_balsini,
-            'prefix':'param_time',
-        },
-        {
-            'xcol': FREQ, 'ycol': TIME, 'fhandle': time_simpler,
-            'prefix':'param_time_simple',
-        },
-        {
-            'xcol': FREQ, 'ycol': POWER, 'fhandle': power_balsini_compact_alt,
-            'prefix':'param_power',
-        }
-    ]
-
-    outdf = df[keyfields].drop_duplicates()
-    for m in maps:
-        outdf = outdf.merge(
-            fit_and_prepare(df, m['xcol'], m['ycol'], keyfields, m['fhandle'],
-                prefix=m['prefix'],
-            ),
-            how='inner',
-        )
-
-    return outdf
+    if should_plot:
+        # Plots are shown interactively, one at a time
+        results = [fit_chain(c, maps) for c in chains]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers) as executor:
+            results = list(executor.map(fit_chain, chains,
+                [maps] * len(chains)))
+
+    params = pd.DataFrame([row for rows in results for row in rows])
+
+    # Same order of groups as in the input table
+    outdf = df[KEYFIELDS].drop_duplicates()
+    return outdf.merge(params, how='inner')
+#-- fit_table
 
 import re
 
@@ -242,7 +272,7 @@ def main():
     df_samples = pd.read_csv(args.in_samples, float_precision='high')
     df_averages = pd.read_csv(args.in_averages, float_precision='high')
 
-    outdf = fit_table(df_samples)
+    outdf = fit_table(df_samples, max_workers=args.jobs)
     outdf = outdf.merge(df_averages, how='inner')
     outdf = outdf.rename(
         columns=lambda x: re.sub('_mean','',x)
@@ -2,12 +2,16 @@
 
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 from pandas.core.indexes import base
 
+import plotstuff
+
 # +--------------------------------------------------------+
 # |          Command-line Arguments Configuration          |
 # +--------------------------------------------------------+
@@ -130,55 +134,33 @@ def safe_save_to_csv(out_df, out_file):
     # (or don't, the program will terminate anyway)
 #-- safe_save_to_csv
 
-def plot_col_pairs(basecommand, outpath, col_pair):
+def plot_col_pair(df, label, out_exts, outpath, col_pair):
     x = str(col_pair[0])
     y = str(col_pair[1])
-    xx = "'" + x + "'"
-    yy = "'" + y + "'"
-    cmd = basecommand + [
-        '-o', "'" + outpath + '/' + x + '_' + y + "'",
-        '-x', xx,
-        '-y', yy,
-        '-X', xx,
-        '-Y', yy,
-    ]
-    the_command = " ".join(cmd)
-    print('> ', the_command)
-    os.system(the_command)
-#--
-
-def plot_all_combinations(df, args, outpath=''):
-    import pathlib
-    import tempfile
-
-    scriptdir = pathlib.Path(__file__).parent.resolve()
-
-    f = tempfile.NamedTemporaryFile(delete=False)
-    fname = f.name
-    f.close()
-
-    # Write temporary filtered file here
-    df.to_csv(fname, index=None)
-
-    basecommand = [
-        "'" + str(scriptdir) + '/plotstuff.py' + "'",
-        "'" + fname + "'",
-        '--plot-window' if args.plot_window else '--no-plot-window',
-        # O,
-        # o,
-        # x,
-        # y,
-        # xlabel,
-        # ylabel,
-    ]
 
-    # TODO: basepath
+    fig = plt.figure()
+    plotstuff.plot_series(df, x, y, label)
+
+    plt.xlabel(x)
+    plt.ylabel(y)
+    plt.grid()
+
+    plt.legend(loc='upper center',
+        bbox_to_anchor=(.5, 1.18),
+        ncol=3,
+        # fancybox=True,
+        # shadow=True,
+    )
+
+    if len(out_exts) == 0:
+        out_exts = ['.png']
+    for ext in out_exts:
+        fig.savefig(outpath + '/' + x + '_' + y + ext)
 
-    for o in args.out_exts:
-        basecommand += [
-            '-O', "'" + str(o) + "'",
-        ]
+    plt.close(fig)
+#-- plot_col_pair
 
+def all_combinations(df, label, args, outpath=''):
     cols = df.columns.to_numpy()
     col_combinations = np.transpose([
         np.tile(cols, len(cols)),
@@ -187,39 +169,54 @@ def plot_all_combinations(df, args, outpath=''):
 
     os.makedirs(outpath, exist_ok=True)
 
-    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-
-    executor = ThreadPoolExecutor()
-    for _ in executor.map(
-            lambda cols: plot_col_pairs(basecommand, outpath, cols),
-            col_combinations
-            ):
-        pass
-    os.unlink(fname)
-#-- plot_all_combinations
+    return [
+        (df, label, args.out_exts, outpath, cols)
+        for cols in col_combinations
+    ]
+#-- all_combinations
 
-def traverse_combinations(df, keys, args, outpath=''):
+def traverse_combinations(df, keys, label, args, outpath=''):
     if len(keys) < 1:
-        plot_all_combinations(df, args, outpath=outpath)
-        return
+        return all_combinations(df, label, args, outpath=outpath)
 
     keys_copy = keys.copy()
     key = keys_copy.pop(0)
 
+    jobs = []
     for value in df[key].unique():
         indf = df[df[key] == value]
         indf = indf.drop(columns=[key])
-        traverse_combinations(indf, keys_copy, args,
+        jobs += traverse_combinations(indf, keys_copy, label, args,
             outpath=outpath + str(value) + '/',
         )
+    return jobs
 #-- traverse_combinations
 
+def plot_all(jobs, args):
+    if args.plot_window:
+        for job in jobs:
+            plot_col_pair(*job)
+            plt.show()
+        return
+
+    # Figures are rendered in-process by a pool of workers, without a display
+    matplotlib.use('Agg')
+    with ProcessPoolExecutor(
+            initializer=matplotlib.use, initargs=('Agg',)) as executor:
+        futures = [executor.submit(plot_col_pair, *job) for job in jobs]
+        for future in futures:
+            future.result()
+#-- plot_all
+
 def main():
     args = parse_cmdline_args()
 
     df = pd.read_csv(args.in_file, index_col=False, float_precision='high')
     df = df.drop(columns=args.ignore_column)
-    traverse_combinations(df, args.key_column, args, outpath=args.out_dir + '/')
+    label = os.path.basename(os.path.realpath(args.in_file.name)).replace('.csv', '')
+    jobs = traverse_combinations(df, args.key_column, label, args,
+        outpath=args.out_dir + '/')
+    plot_all(jobs, args)
 
     return 0
 #-- main
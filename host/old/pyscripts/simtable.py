@@ -75,6 +75,15 @@ options = [
             'default': 'a.out',
         },
     },
+    {
+        'short': '-r',
+        'long': '--residuals-file',
+        'opts': {
+            'help': 'If provided, the file in which the residual errors of all power functions are compared for each configuration',
+            'type': str,
+            'default': None,
+        },
+    },
 ]
 
 
@@ -113,12 +122,54 @@ def safe_save_to_csv(out_df, out_file):
     # (or don't, the program will terminate anyway)
 #-- safe_save_to_csv
 
+# +--------------------------------------------------------+
+# |                         Index                          |
+# +--------------------------------------------------------+
+
+CONFIG = [ISLAND, FREQ, TASK]
+
+
+def build_index(df):
+    """
+    Builds once the table indexed by (island, frequency, task, howmany), used by
+    all time and power functions.
+    """
+    return df.set_index([ISLAND, FREQ, TASK, HOWMANY]).sort_index()
+#-- build_index
+
+
+def configurations(df):
+    """
+    Returns all the (island, frequency, task) configurations in the table,
+    ordered as islands, tasks and frequencies of each island first appear in
+    the table.
+    """
+    configs = df[CONFIG].drop_duplicates()
+    freqs   = df[[ISLAND, FREQ]].drop_duplicates()
+    freqs   = freqs.assign(freq_rank=freqs.groupby(ISLAND).cumcount())
+    configs = configs.merge(freqs, how='left')
+    configs = configs.assign(
+        island_rank=pd.factorize(configs[ISLAND])[0],
+        task_rank=pd.factorize(configs[TASK])[0],
+    )
+    configs = configs.sort_values(['island_rank', 'task_rank', 'freq_rank'])
+    return pd.MultiIndex.from_frame(configs[CONFIG])
+#-- configurations
+
 # +--------------------------------------------------------+
 # |                     Time Functions                     |
 # +--------------------------------------------------------+
 
+# All time functions take the indexed table and return the time of each
+# (island, frequency, task) configuration, zero for the idle task.
+
 
-def time_max(df, island, frequency, task):
+def time_idle_zero(time):
+    return time.where(time.index.get_level_values(TASK) != IDLE, 0)
+#-- time_idle_zero
+
+
+def time_max(index):
     """
     Maximum (average) runtime profiled.
 
@@ -126,39 +177,24 @@ def time_max(df, island, frequency, task):
     given island+frequency configuration when varying number of concurrent
     tasks.
     """
-
-    if (task == IDLE):
-        return 0
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
-    df = df[df[TASK] == task]
-    return df[TIME].max()
+    return time_idle_zero(index[TIME].groupby(level=CONFIG).max())
 #-- time_max
 
 
-def time_single(df, island, frequency, task):
+def time_single(index):
     """
     Runtime profiled using only one task in isolation.
     """
-    if (task == IDLE):
-        return 0
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
-    df = df[df[TASK] == task]
-    return df[df[HOWMANY] == 1][TIME].values[0]
+    time = index[TIME].xs(1, level=HOWMANY)
+    return time_idle_zero(time.groupby(level=CONFIG).first())
 #-- time_one
 
 
-def time_mean(df, island, frequency, task):
+def time_mean(index):
     """
     Average runtime profiled using an increasing number of parallel tasks.
     """
-    if (task == IDLE):
-        return 0
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
-    df = df[df[TASK] == task]
-    return df[TIME].mean()
+    return time_idle_zero(index[TIME].groupby(level=CONFIG).mean())
 #-- time_mean
 
 
@@ -166,25 +202,31 @@ def time_mean(df, island, frequency, task):
 # |                    Power Functions                     |
 # +--------------------------------------------------------+
 
-# def power_rtsim_wrong(df, island, frequency, task):
-#     df = df[df[ISLAND] == island]
-#     df = df[df[FREQ] == frequency]
-#     m = df[df[HOWMANY] == 1][POWER].values[0]
-#     return m, 0
+# All power functions take the indexed table and return the m and q
+# coefficients of each (island, frequency, task) configuration.
 
 # NOTICE: the q values are only for debug purposes, EXCEPT FOR THE IDLE POWER!
 
 
-def power_idle(df):
+def power_idle(index):
     """
-    Returns power of idle task (assumes core type and frequency to be fixed)
+    Returns power of idle task of each (island, frequency).
     """
-    df = df[df[TASK] == IDLE]
-    return df[df[HOWMANY] == 1][POWER].values[0]
+    power = index[POWER].xs((IDLE, 1), level=[TASK, HOWMANY])
+    return power.groupby(level=[ISLAND, FREQ]).first()
 #-- power_idle
 
 
-def power_single(df, island, frequency, task):
+def power_idle_config(index, configs):
+    """
+    Returns the power of the idle task for each of the given (island,
+    frequency, task) configurations.
+    """
+    return power_idle(index).reindex(configs.droplevel(TASK)).to_numpy()
+#-- power_idle_config
+
+
+def power_single(index):
     """
     Returns the m and q coefficients obtained running a single task in
     isolation.
@@ -192,97 +234,118 @@ def power_single(df, island, frequency, task):
     NOTICE: the simulator will ignore this q value and use the IDLE power
     anyway.
     """
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
+    power = index[POWER].xs(1, level=HOWMANY)
+    power = power.groupby(level=CONFIG).first()
 
-    pidle = power_idle(df)
-    if (task == IDLE):
-        return 0, pidle
+    q = power_idle_config(index, power.index)
+    m = power.to_numpy() - q
+    m[power.index.get_level_values(TASK) == IDLE] = 0
+    return pd.DataFrame({'m': m, 'q': q}, index=power.index)
+#-- power_single
 
-    df = df[df[TASK] == task]
 
-    q = pidle
-    m = df[df[HOWMANY] == 1][POWER].values[0] - pidle
-    return m, q
-#-- power_single
+def power_points(index):
+    """
+    Returns the x (number of tasks) and y (power) points of all configurations,
+    including the idle point (0, pidle) of each one, indexed by configuration
+    (together with the idle power of the configuration).
+    """
+    power   = index[POWER].reset_index(HOWMANY)
+    configs = power.index.unique()
 
+    idle = pd.DataFrame({
+        HOWMANY:    0,
+        POWER:      power_idle_config(index, configs),
+    }, index=configs)
 
-def power_getxy(df, pidle):
-    numcores = df[HOWMANY].size
-    x = np.arange(numcores+1)
-    y = np.empty_like(x, dtype=float)  # EXTREMELY IMPORTANT: USE FLOATS!
-    y[0] = pidle
-    for i in x[1:]:
-        y[i] = df[df[HOWMANY] == i][POWER].values[0]
-
-    return (x, y)
-#-- power_getxy
-
-
-# def plot_regression(title, x, y, m, q, qidle):
-#     yq = m * x + q
-#     yqi = m * x + qidle
-
-#     eyq = np.divide(abs(y - yq), y) * 100
-#     eyqi = np.divide(abs(y - yqi), y) * 100
-
-#     if (max(eyqi) > 25):
-#         print('TITLE:\t' + str(title))
-#         print('m:\t' + str(m))
-#         print('q:\t' + str(q))
-#         print('qi:\t' + str(qidle))
-#         print('x:\t' + str(x))
-#         print('y:\t' + str(y))
-#         print('yq:\t' + str(yq))
-#         print('yqi:\t' + str(yqi))
-#         print('eyq:\t' + str(eyq))
-#         print('eyqi:\t' + str(eyqi))
-#         plt.plot(x, y, 'o')
-#         plt.plot(x, yq, 'x', label='q')
-#         plt.plot(x, yqi, 'x', label='qidle')
-#         plt.legend()
-#         plt.title(str(title))
-#         plt.show()
-#         # input()
-#         plt.cla()
-#         print('\n')
-
-
-def true_regression_fun(x, y):
-    m, q = np.polyfit(x, y, 1)
+    points = pd.concat([idle, power])
+    # EXTREMELY IMPORTANT: USE FLOATS!
+    return pd.DataFrame({
+        'x': points[HOWMANY].astype(float),
+        'y': points[POWER].astype(float),
+        'pidle': power_idle_config(index, points.index),
+    }, index=points.index)
+#-- power_points
+
+
+def power_stats(points):
+    """
+    Returns the sufficient statistics (n, sum of x, y, xy and x^2) of the
+    points of each configuration.
+    """
+    x = points['x']
+    y = points['y']
+    terms = pd.DataFrame({
+        'n':    1,
+        'sx':   x,
+        'sy':   y,
+        'sxy':  x * y,
+        'sxx':  x * x,
+    }, index=points.index)
+    return terms.groupby(level=CONFIG).sum()
+#-- power_stats
+
+
+def power_residuals(points, coeffs):
+    """
+    Returns the RMS and maximum absolute residual of each configuration, both
+    for the fitted line (m, q) and for the line actually used by the simulator
+    (m, pidle).
+    """
+    coeffs      = coeffs.reindex(points.index)
+    fit_err     = points['y'] - (coeffs['m'] * points['x'] + coeffs['q'])
+    sim_err     = points['y'] - (coeffs['m'] * points['x'] + points['pidle'])
+
+    errors = pd.DataFrame({
+        'rms':      fit_err**2,
+        'max':      fit_err.abs(),
+        'sim_rms':  sim_err**2,
+        'sim_max':  sim_err.abs(),
+    }, index=points.index).groupby(level=CONFIG)
+
+    out = errors.max()
+    out['rms']      = np.sqrt(errors['rms'].mean())
+    out['sim_rms']  = np.sqrt(errors['sim_rms'].mean())
+    return out[['rms', 'max', 'sim_rms', 'sim_max']]
+#-- power_residuals
+
+
+def true_regression_fun(stats):
+    det = stats['n'] * stats['sxx'] - stats['sx']**2
+    m = (stats['n'] * stats['sxy'] - stats['sx'] * stats['sy']) / det
+    q = (stats['sy'] - m * stats['sx']) / stats['n']
     return m, q
 
 
-def fixed_regression_fun(x, y):
-    q = y[0]
-    m = 1 / np.dot(x, x) * (np.dot(x, y) - q * x.sum())
+def fixed_regression_fun(stats):
+    q = stats['pidle']
+    m = (stats['sxy'] - q * stats['sx']) / stats['sxx']
     return m, q
 
 
-def power_regression(df, island, frequency, task, regfun):
+def power_regression(index, regfun):
     """
-    Returns m and q values obtained using the regression function in input.
+    Returns m and q values obtained using the regression function in input,
+    computed for all configurations at once from their sufficient statistics,
+    together with the residual errors of each configuration.
     """
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
-
-    pidle = power_idle(df)
-    if (task == IDLE):
-        return 0, pidle
-
-    df = df[df[TASK] == task]
-    (x, y) = power_getxy(df, pidle)
-    return regfun(x, y)
-    # m, q = regfun(x, y)
-    # plot_regression(
-    #     str(island) + '-' + str(frequency / 1000000) + '-' + str(task),
-    #     x, y, m, q, pidle,
-    # )
-    # return m, q
+    points  = power_points(index)
+    stats   = power_stats(points)
+    stats['pidle'] = power_idle_config(index, stats.index)
+
+    m, q = regfun(stats)
+
+    is_idle = stats.index.get_level_values(TASK) == IDLE
+    coeffs  = pd.DataFrame({
+        'm': np.where(is_idle, 0, m),
+        'q': np.where(is_idle, stats['pidle'], q),
+    }, index=stats.index)
+
+    return coeffs.join(power_residuals(points, coeffs))
 #-- power_regression
 
 
-def power_true_regression(df, island, frequency, task):
+def power_true_regression(index):
     """
     Returns the m and q coefficients obtained using true regression on the
     measured values (including idle).
@@ -290,18 +353,18 @@ def power_true_regression(df, island, frequency, task):
     NOTICE: the simulator will ignore this q value and use the IDLE power
     instead.
     """
-    return power_regression(df, island, frequency, task, true_regression_fun)
+    return power_regression(index, true_regression_fun)
 #-- power_true_regression
 
 
-def power_fixed_regression(df, island, frequency, task):
+def power_fixed_regression(index):
     """
     Returns the m and q coefficients obtained using a fixed regression, in which q is forced to be equal to the IDLE power.
 
     NOTICE: the simulator will ignore this q value and use the IDLE power
     anyway.
     """
-    return power_regression(df, island, frequency, task, fixed_regression_fun)
+    return power_regression(index, fixed_regression_fun)
 #-- power_fixed_regression
 
 
@@ -311,34 +374,48 @@ def power_fixed_regression(df, island, frequency, task):
 
 
 def simulation_table(df, time_fun, power_fun):
-    islands = df[ISLAND].unique()
-    tasks = df[TASK].unique()
-
     # TODO: add voltage info
     # cols = [ISLAND, FREQ, TASK, 'power', 'time']
-
-    dictionary_list = []
-    for i in islands:
-        for t in tasks:
-            freqs = df[df[ISLAND] == i][FREQ].unique()
-            for f in freqs:
-                time = time_fun(df, i, f, t)
-                power, pidle = power_fun(df, i, f, t)
-                if (t == IDLE):
-                    power = pidle
-
-                dictionary_data = {
-                    ISLAND: i,
-                    FREQ: f,
-                    TASK: t,
-                    'power': power,
-                    'time': time,
-                }
-                dictionary_list.append(dictionary_data)
-
-    return pd.DataFrame.from_dict(dictionary_list)
+    index   = build_index(df)
+    configs = configurations(df)
+
+    time    = time_fun(index).reindex(configs).to_numpy()
+    power   = power_fun(index).reindex(configs)
+
+    # The simulator uses the m coefficient for all tasks but the idle one, for
+    # which it uses the idle power
+    is_idle = configs.get_level_values(TASK) == IDLE
+    power   = np.where(is_idle, power['q'], power['m'])
+
+    return pd.DataFrame({
+        ISLAND: configs.get_level_values(ISLAND),
+        FREQ:   configs.get_level_values(FREQ),
+        TASK:   configs.get_level_values(TASK),
+        'power': power,
+        'time': time,
+    })
 #-- simulation_table
 
+
+def power_comparison(df, power_funs):
+    """
+    Returns, for each configuration, the coefficients and the residual errors
+    obtained by each of the given power functions (columns are prefixed by the
+    name of the function).
+    """
+    index   = build_index(df)
+    configs = configurations(df)
+    points  = power_points(index)
+
+    tables = []
+    for name, power_fun in power_funs.items():
+        coeffs = power_fun(index)[['m', 'q']]
+        coeffs = coeffs.join(power_residuals(points, coeffs))
+        tables.append(coeffs.add_prefix(name + '_'))
+
+    return pd.concat(tables, axis=1).reindex(configs).reset_index()
+#-- power_comparison
+
 # +--------------------------------------------------------+
 # |                          Main                          |
 # +--------------------------------------------------------+
@@ -365,6 +442,10 @@ def main():
     out_df = simulation_table(df, time_fun, power_fun)
     safe_save_to_csv(out_df, args.out_file)
 
+    if args.residuals_file:
+        res_df = power_comparison(df, power_funs)
+        safe_save_to_csv(res_df, args.residuals_file)
+
     return 0
 #-- main
 
@@ -109,78 +109,122 @@ def safe_save_to_csv(out_df, out_file):
     # (or don't, the program will terminate anyway)
 #-- safe_save_to_csv
 
+# +--------------------------------------------------------+
+# |                         Index                          |
+# +--------------------------------------------------------+
+
+
+def build_index(simtable):
+    """
+    Builds once the lookup structures used by all simulations:
+     - the table indexed by (island, frequency, task);
+     - the idle power of each (island, frequency);
+     - the list of all (island, frequency, task) configurations, ordered as
+       islands, tasks and frequencies first appear in the table.
+    """
+    index = simtable.set_index([ISLAND, FREQ, TASK]).sort_index()
+
+    pidle = index.xs(IDLE, level=TASK)[POWER]
+    pidle = pidle.groupby(level=[ISLAND, FREQ]).first()
+
+    # Ordering ranks (islands, tasks and frequencies of each island in order of
+    # appearance in the table)
+    configs = simtable[[ISLAND, FREQ, TASK]].drop_duplicates()
+    freqs   = simtable[[ISLAND, FREQ]].drop_duplicates()
+    freqs   = freqs.assign(freq_rank=freqs.groupby(ISLAND).cumcount())
+    configs = configs.merge(freqs, how='left')
+    configs = configs.assign(
+        island_rank=pd.factorize(configs[ISLAND])[0],
+        task_rank=pd.factorize(configs[TASK])[0],
+    )
+    configs = configs.sort_values(['island_rank', 'task_rank', 'freq_rank'])
+    configs = pd.MultiIndex.from_frame(configs[[ISLAND, FREQ, TASK]])
+
+    return {
+        'index':    index,
+        'pidle':    pidle,
+        'configs':  configs,
+    }
+#-- build_index
+
+
 # +--------------------------------------------------------+
 # |                        Simulate                        |
 # +--------------------------------------------------------+
 
 
-def simulate_time(df, island, frequency, task):
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == frequency]
-    df = df[df[TASK] == task]
-    return df[TIME].values[0]
+def simulate_time(idx, configs):
+    """
+    Returns the time of each of the given (island, frequency, task)
+    configurations.
+    """
+    time = idx['index'][TIME].groupby(level=[ISLAND, FREQ, TASK]).first()
+    return time.reindex(configs).to_numpy()
 #-- simulate_time
 
 
-def simulate_power(df, island, freq, task_list):
-    df = df[df[ISLAND] == island]
-    df = df[df[FREQ] == freq]
-    pidle = df[df[TASK] == IDLE][POWER].values[0]
-    power = pidle
-    for t in task_list:
-        if (t != IDLE):
-            # This factor corresponds to power_workload_i - pidle
-            power += df[df[TASK] == t][POWER].values[0]
-    return power
+def simulate_power(idx, configs):
+    """
+    Returns the idle power and the power increment (power_workload_i - pidle)
+    of each of the given (island, frequency, task) configurations.
+    """
+    power = idx['index'][POWER].groupby(level=[ISLAND, FREQ, TASK]).first()
+    power = power.reindex(configs).to_numpy()
+    pidle = idx['pidle'].reindex(configs.droplevel(TASK)).to_numpy()
+
+    # The idle task does not add anything to the idle power
+    is_idle = configs.get_level_values(TASK) == IDLE
+    m = np.where(is_idle, 0.0, power)
+    return pidle, m
 #-- simulate_power
 
 
 def simulate_homogeneous(simtable, numcores):
     # Columns in output table:
     # HOWMANY, ISLAND, FREQ, TASK, POWER, TIME
-    dictionary_list = []
-    for h in range(1, numcores+1):
-        for i in simtable[ISLAND].unique():
-            for t in simtable[TASK].unique():
-                # In any run, there are "h" active tasks and
-                # "numcores-h" idle tasks
-                task_list = [t    for _ in range(h)] + \
-                            [IDLE for _ in range(numcores-h)]
-
-                freqs = simtable[simtable[ISLAND] == i][FREQ].unique()
-                for f in freqs:
-                    time = simulate_time(simtable, i, f, t)
-                    power = simulate_power(simtable, i, f, task_list)
-                    dictionary_data = {
-                        HOWMANY: h,
-                        ISLAND: i,
-                        FREQ: f,
-                        TASK: t,
-                        POWER: power,
-                        TIME: time,
-                    }
-                    dictionary_list.append(dictionary_data)
-    #---------------
-    return pd.DataFrame.from_dict(dictionary_list)
+    idx     = build_index(simtable)
+    configs = idx['configs']
+
+    time        = simulate_time(idx, configs)
+    pidle, m    = simulate_power(idx, configs)
+
+    # In any run, there are "h" active tasks and "numcores-h" idle tasks,
+    # hence the power is pidle + h * m (all configurations at once)
+    howmany = np.arange(1, numcores+1)
+    nconfigs = len(configs)
+
+    h = np.repeat(howmany, nconfigs)
+    return pd.DataFrame({
+        HOWMANY:    h,
+        ISLAND:     np.tile(configs.get_level_values(ISLAND), numcores),
+        FREQ:       np.tile(configs.get_level_values(FREQ), numcores),
+        TASK:       np.tile(configs.get_level_values(TASK), numcores),
+        POWER:      np.tile(pidle, numcores) + h * np.tile(m, numcores),
+        TIME:       np.tile(time, numcores),
+    })
 #-- simulate_homogeneous
 
 
 def simulate_heterogeneous_power(simtable, task_list):
     # Columns in output table:
     # ISLAND, FREQ, POWER
-    dictionary_list = []
-    for i in simtable[ISLAND].unique():
-        freqs = simtable[simtable[ISLAND]][FREQ].unique()
-        for f in freqs:
-            power = simulate_power(simtable, i, f, task_list)
-            dictionary_data = {
-                ISLAND: i,
-                FREQ: f,
-                POWER: p,
-            }
-            dictionary_list.append(dictionary_data)
-    #-------
-    return pd.DataFram.from_dict(dictionary_list)
+    idx = build_index(simtable)
+
+    # Each task in the list adds its own increment to the idle power of the
+    # island, tasks appearing multiple times are counted multiple times
+    counts = pd.Series(task_list).value_counts()
+    counts = counts[counts.index != IDLE]
+
+    power = idx['index'][POWER].groupby(level=[ISLAND, FREQ, TASK]).first()
+    power = power.unstack(TASK).reindex(columns=counts.index)
+
+    # Same order of islands and frequencies as in the simtable
+    pidle = idx['pidle'].reindex(idx['configs'].droplevel(TASK).unique())
+    increments = power.reindex(pidle.index).to_numpy() @ counts.to_numpy()
+
+    out_df = pidle.reset_index()
+    out_df[POWER] = pidle.to_numpy() + increments
+    return out_df[[ISLAND, FREQ, POWER]]
 #-- simulate_heterogeneous_power
 
 
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Print the measurement files of a results tree matching the given criteria, one
+absolute path per line, as listed by its catalog (see modules/catalog.py).
+
+The catalog index is updated (or created) before answering, so that only the
+repetition directories changed since the last query are listed again.
+"""
+
+from modules import catalog
+from modules import cmdargs
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    "options": [
+        {
+            'short': None,
+            'long': 'root',
+            'opts': {
+                'help': 'The root of the results tree',
+                'type': str,
+            },
+        },
+        {
+            'short': '-n',
+            'long': '--name',
+            'opts': {
+                'help': 'The name of the files, a shell pattern (default: all '
+                    'files)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-z',
+            'long': '--skip-zero',
+            'opts': {
+                'help': 'Skip the files of the 0 repetitions',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': '-i',
+            'long': '--index-file',
+            'opts': {
+                'help': 'The index file (default: ' + catalog.INDEX_FILE +
+                    ' in the root of the tree)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-N',
+            'long': '--no-update',
+            'opts': {
+                'help': 'Use the index as is, without checking the tree for '
+                    'changes (the tree is scanned anyway if there is no index)',
+                'action': 'store_true',
+            },
+        },
+    ]
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    df = catalog.load(args.root, args.index_file, update=not args.no_update)
+    df = catalog.query(df, name=args.name, skip_zero=args.skip_zero)
+
+    for path in df['path']:
+        print(path)
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
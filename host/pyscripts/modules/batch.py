@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+This module runs a conversion on many files at once, in a single pool of
+worker processes, so that starting Python and importing numpy and pandas is
+paid once for all the files instead of once per file.
+
+The work list has one job per line: the input file, the output file and any
+further file the conversion accepts, separated by whitespace. Each job is
+isolated from the others: if one fails, the error is reported and the others
+go on.
+"""
+
+import concurrent.futures
+import sys
+import traceback
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def read_work_list(path):
+    """
+    Returns the jobs in the given work list (- for stdin), as tuples of files.
+    """
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        return [
+            tuple(line.split())
+            for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _run_job(fun, job):
+    try:
+        fun(*job)
+        return None
+    except (Exception, SystemExit) as e:
+        return ''.join(traceback.format_exception_only(type(e), e)).strip()
+
+def run(fun, jobs, workers=None):
+    """
+    Calls fun(*job) for each job in a pool of worker processes (by default, one
+    per cpu). Returns the number of failed jobs, each reported on stderr.
+    """
+    failures = 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers) as executor:
+        futures = {executor.submit(_run_job, fun, job): job for job in jobs}
+
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                error = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OOM killer)
+                error = repr(e)
+
+            if error:
+                failures += 1
+                print('ERR:', job[0] + ':', error, file=sys.stderr)
+
+    return failures
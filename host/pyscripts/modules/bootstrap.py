@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+"""
+This module estimates confidence intervals for the parameters of the thermal
+model by means of bootstrapping.
+
+Each bootstrap resample draws with replacement as many runs as the ones in the
+original db and fits the model on them, starting from the estimate obtained on
+the full data. Resamples are fitted in parallel on a pool of processes and each
+completed fit is appended to a checkpoint file, so that an interrupted job can
+be resumed without re-fitting the resamples that were already completed.
+
+If pars contains the per-run nuisance parameters of a fit (see
+tempmodelmulticore.fit_temp_multirun_sparse), they are applied to the inputs of
+each run and kept fixed, so that resamples fit the same model as the point
+estimate.
+
+The experiment a checkpoint belongs to (seed, number of resamples, runs, model
+and starting parameters) is saved next to it and a job is resumed only from the
+checkpoint of the same experiment.
+"""
+
+import concurrent.futures
+import csv
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import megadb
+from . import tempmodelmulticore as tpfit
+
+# Global state of each worker process, set once by worker_init so that runs and
+# parameters are not pickled again for each resample
+_worker = {}
+
+def resample_indices(num_runs, num_resamples, seed):
+    """
+    Returns the (sorted) indices of the runs selected by each resample.
+
+    Each resample uses its own random generator spawned from the given seed, so
+    the runs selected by a resample do not depend on the order in which
+    resamples are fitted (or on whether the job was resumed).
+    """
+    seeds = np.random.SeedSequence(seed).spawn(num_resamples)
+    return [
+        np.sort(np.random.default_rng(s).choice(
+            num_runs, size=num_runs, replace=True))
+        for s in seeds
+    ]
+
+def shared_param_names(pars):
+    """
+    Returns the names of the parameters fitted by the model (C, Re and R_i_j
+    for i != j).
+    """
+    return [k for k, p in pars.items() if p.vary]
+
+def worker_init(runs, model, pars, method):
+    _worker['runs']     = runs
+    _worker['model']    = model
+    _worker['pars']     = pars
+    _worker['method']   = method
+
+def worker_fit(index, run_indices):
+    runs = [_worker['runs'][i] for i in run_indices]
+    pars = tpfit.fit_temp_runs(runs, _worker['model'],
+        pars=_worker['pars'].copy(),
+        method=_worker['method'],
+        verbose=False,
+    )
+    return index, pars.valuesdict()
+
+def apply_run_nuisance(runs, pars):
+    """
+    Returns the given runs with the nuisance parameters of each run in pars
+    (if any) applied to its inputs.
+    """
+    return [
+        {**run, 'inputs': tpfit.apply_nuisance(run['inputs'],
+            **tpfit.pars2nuisance(pars, run['runid']))}
+        for run in runs
+    ]
+
+def runs_digest(runs):
+    """
+    Returns a digest of the contents of the given runs (instants, inputs and
+    measured temperatures).
+    """
+    h = hashlib.sha1()
+    for run in runs:
+        h.update(str(run['runid']).encode())
+        for a in [run['t'], run['inputs']['U'], run['data']]:
+            h.update(np.ascontiguousarray(a, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+def experiment_info(runs, model, pars, num_resamples, seed, method):
+    """
+    Returns the values that identify a bootstrap experiment, stored with its
+    checkpoint.
+    """
+    return {
+        'seed':             seed,
+        'num_resamples':    num_resamples,
+        'runs':             len(runs),
+        'runs_digest':      runs_digest(runs),
+        'model':            model.__name__,
+        'method':           method,
+        'pars':             { k: float(v) for k, v in pars.valuesdict().items() },
+    }
+
+def checkpoint_info_path(checkpoint_file):
+    return checkpoint_file + '.json'
+
+def checkpoint_check(checkpoint_file, info):
+    """
+    Makes sure that the given checkpoint file (if it exists) belongs to the
+    given experiment; raises a ValueError otherwise. Saves the experiment
+    alongside a new checkpoint file.
+    """
+    if checkpoint_file is None:
+        return
+
+    info_path = checkpoint_info_path(checkpoint_file)
+
+    if os.path.exists(checkpoint_file) and \
+        os.path.getsize(checkpoint_file) > 0:
+        saved = None
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                saved = json.load(f)
+
+        if saved != info:
+            differ = sorted(k for k in info
+                if saved is None or saved.get(k) != info[k])
+            raise ValueError('The checkpoint ' + checkpoint_file +
+                ' belongs to a different experiment (different ' +
+                ', '.join(differ) + '), remove it or use another checkpoint '
+                'file!')
+        return
+
+    tmp_path = info_path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(info, f, indent=4)
+    os.rename(tmp_path, info_path)
+
+def checkpoint_load(checkpoint_file, names):
+    """
+    Returns the parameter values of all the resamples already stored in the
+    checkpoint file, indexed by resample number.
+    """
+    done = {}
+    if checkpoint_file is None or not os.path.exists(checkpoint_file):
+        return done
+
+    with open(checkpoint_file, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                done[int(row['resample'])] = [float(row[k]) for k in names]
+            except (KeyError, TypeError, ValueError):
+                # Line truncated by an interruption, fit it again
+                continue
+    return done
+
+def checkpoint_open(checkpoint_file, names):
+    if checkpoint_file is None:
+        return None, None
+
+    exists = os.path.exists(checkpoint_file) and \
+        os.path.getsize(checkpoint_file) > 0
+
+    f = open(checkpoint_file, 'a+', newline='')
+    writer = csv.writer(f)
+    if not exists:
+        writer.writerow(['resample'] + names)
+        f.flush()
+    else:
+        # Terminate a line truncated by an interruption (it will be ignored)
+        f.seek(f.tell() - 1)
+        if f.read(1) != '\n':
+            f.write('\n')
+    return f, writer
+
+def percentile_intervals(samples, names, estimate, confidence):
+    """
+    Returns a table with the estimate and the percentile confidence interval of
+    each parameter.
+    """
+    alpha = (1.0 - confidence) / 2.0
+    low   = np.percentile(samples, 100 * alpha, axis=0)
+    high  = np.percentile(samples, 100 * (1 - alpha), axis=0)
+    std   = np.std(samples, axis=0, ddof=1) if len(samples) > 1 else np.nan
+
+    return pd.DataFrame({
+        'param':        names,
+        'estimate':     [estimate[k].value for k in names],
+        'ci_low':       low,
+        'ci_high':      high,
+        'std':          std,
+        'resamples':    len(samples),
+        'confidence':   confidence,
+    })
+
+def bootstrap_fit(db, model, pars,
+    num_resamples=1000,
+    seed=0,
+    confidence=0.95,
+    checkpoint_file=None,
+    max_workers=None,
+    method='leastsq',
+    cpu_num=4,
+    ):
+    """
+    Runs num_resamples bootstrap fits of the thermal model on the given db (a
+    MegaDB or a pandas table indexed by runid, type and time), warm-starting
+    each one from the parameters pars (typically the ones fitted on the full
+    db) and returns the percentile confidence intervals of all parameters
+    fitted by the model. Nuisance parameters of each run in pars are applied
+    to its inputs and are not fitted again.
+
+    If a checkpoint file is provided, each completed fit is appended to it and
+    the resamples already present in it are not fitted again. A checkpoint of
+    a different experiment (see experiment_info) is never resumed: a
+    ValueError is raised instead.
+    """
+    runs    = megadb.extract_runs(db, cpu_num)
+    names   = shared_param_names(pars)
+    indices = resample_indices(len(runs), num_resamples, seed)
+
+    checkpoint_check(checkpoint_file,
+        experiment_info(runs, model, pars, num_resamples, seed, method))
+
+    runs    = apply_run_nuisance(runs, pars)
+
+    done = checkpoint_load(checkpoint_file, names)
+    todo = [i for i in range(num_resamples) if i not in done]
+
+    print('bootstrap: %d resamples completed, %d to go' %
+        (len(done), len(todo)))
+
+    f, writer = checkpoint_open(checkpoint_file, names)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=worker_init,
+                initargs=(runs, model, pars, method),
+                ) as executor:
+            futures = [
+                executor.submit(worker_fit, i, indices[i])
+                for i in todo
+            ]
+
+            for future in concurrent.futures.as_completed(futures):
+                index, values = future.result()
+                done[index] = [values[k] for k in names]
+
+                if writer:
+                    writer.writerow([index] + done[index])
+                    f.flush()
+
+                print('bootstrap: resample %d done (%d/%d)' %
+                    (index, len(done), num_resamples))
+    finally:
+        if f:
+            f.close()
+
+    samples = np.array([done[i] for i in range(num_resamples)])
+    return percentile_intervals(samples, names, pars, confidence)
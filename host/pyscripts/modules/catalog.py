@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+This module catalogs the measurement files of a results tree, i.e. all the
+files in directories structured as follows (see embedded/README.md):
+
+    howmany_<H>/policy_<P>/freq_<F>/task_<T>/<R>/<file>
+
+The tree is walked once with os.scandir and the metadata of each file is parsed
+from the names of the directories on its path. The resulting index (one row per
+file, with its metadata, size and modification time) is saved in the root of
+the tree, so that later scans reuse the rows of the repetition directories
+that did not change since then. Since files may also grow in place (e.g. while
+they are followed, see power_samples_to_table.py), the size and modification
+time of each file are checked as well, not only those of its directory.
+"""
+
+import fnmatch
+import os
+import re
+
+import numpy    as np
+import pandas   as pd
+
+from . import maketools
+from . import resultstree
+
+# The name of the index file, saved in the root of the tree
+INDEX_FILE = 'catalog.csv'
+
+COLUMNS = ['path', 'name', *resultstree.METADATA_COLUMNS, 'size', 'mtime_ns',
+    'dir_mtime_ns']
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def _scan_rep_dir(path, metadata, dir_mtime):
+    rows = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            rows.append({
+                'path':         entry.path,
+                'name':         entry.name,
+                **metadata,
+                'size':         st.st_size,
+                'mtime_ns':     st.st_mtime_ns,
+                'dir_mtime_ns': dir_mtime,
+            })
+    return rows
+
+def _same_rep_dir(path, old_rows):
+    num_files = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            num_files += 1
+            old = old_rows.get(entry.path)
+            if old is None:
+                return False
+            st = entry.stat()
+            if st.st_size != old['size'] or st.st_mtime_ns != old['mtime_ns']:
+                return False
+    return num_files == len(old_rows)
+
+def _walk(path, level, metadata, previous, rows):
+    with os.scandir(path) as it:
+        entries = [e for e in it if e.is_dir()]
+
+    for entry in entries:
+        k, regex = resultstree.LEVELS[level]
+        match = regex.fullmatch(entry.name)
+
+        if not match:
+            # Results trees may be nested anywhere below the root
+            if level == 0:
+                _walk(entry.path, 0, metadata, previous, rows)
+            continue
+
+        entry_metadata = {**metadata, k: match.group(1)}
+
+        if level + 1 < len(resultstree.LEVELS):
+            _walk(entry.path, level + 1, entry_metadata, previous, rows)
+            continue
+
+        # Repetition directory: reuse the previous index if unchanged
+        dir_mtime = entry.stat().st_mtime_ns
+        old = previous.get(entry.path)
+        if old is not None and old[0] == dir_mtime and \
+                _same_rep_dir(entry.path, old[1]):
+            rows += old[1].values()
+        else:
+            rows += _scan_rep_dir(entry.path, entry_metadata, dir_mtime)
+
+def scan(root, index=None):
+    """
+    Returns the catalog of the given results tree as a table (see COLUMNS).
+
+    If the index of a previous scan is given, the rows of the repetition
+    directories whose files did not change since then are reused.
+    """
+    root = os.path.realpath(root)
+
+    previous = {}
+    if index is not None and not index.empty:
+        for d, group in index.groupby(index['path'].map(os.path.dirname)):
+            previous[d] = (group['dir_mtime_ns'].iloc[0],
+                {r['path']: r for r in group[COLUMNS].to_dict('records')})
+
+    rows = []
+    _walk(root, 0, {}, previous, rows)
+
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    return df.sort_values('path', ignore_index=True)
+
+def index_path(root):
+    return os.path.join(os.path.realpath(root), INDEX_FILE)
+
+def read_index(path):
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path,
+        dtype={k: str for k in resultstree.METADATA_COLUMNS})
+
+def load(root, index_file=None, update=True):
+    """
+    Returns the catalog of the given results tree, reading the saved index (by
+    default in the root of the tree) and, unless update is False, updating it
+    with the changes in the tree.
+    """
+    if index_file is None:
+        index_file = index_path(root)
+
+    index = read_index(index_file)
+    if index is not None and not update:
+        return index
+
+    df = scan(root, index)
+    if index is None or not same_files(df, index):
+        maketools.df_safe_to_csv(df, index_file)
+    return df
+
+def same_files(a, b):
+    """
+    Returns True if the two catalogs list the same files, unchanged.
+    """
+    if len(a.index) != len(b.index):
+        return False
+    if not (a['path'].to_numpy(str) == b['path'].to_numpy(str)).all():
+        return False
+    return all(
+        np.array_equal(a[c].to_numpy(np.int64), b[c].to_numpy(np.int64))
+        for c in ['size', 'mtime_ns', 'dir_mtime_ns']
+    )
+
+def query(df, name=None, skip_zero=False, **metadata):
+    """
+    Returns the files in the catalog matching the given file name (a shell
+    pattern), excluding the 0 repetitions if requested, and with the given
+    values of metadata (e.g. task='gzip').
+    """
+    mask = np.full(len(df.index), True)
+
+    if name is not None:
+        regex = re.compile(fnmatch.translate(name))
+        mask &= df['name'].map(lambda n: bool(regex.match(n))).to_numpy(bool)
+
+    if skip_zero:
+        mask &= (df['cpu'].astype(int) != 0).to_numpy()
+
+    for k, v in metadata.items():
+        mask &= (df[k] == str(v)).to_numpy()
+
+    return df[mask]
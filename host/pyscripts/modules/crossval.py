@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+This module validates the thermal model on runs that were not used to fit it.
+
+Runs are partitioned into k folds by runid, task or frequency; for each fold
+and each model engine the model is fitted on all the other folds and evaluated
+on the held-out one. Folds are fitted in parallel on a pool of processes.
+
+Since extracting runs from the megadb is by far the slowest part of loading
+it, the extracted runs are cached on disk next to the megadb (or in a given
+directory) and re-used as long as the megadb does not change.
+"""
+
+import concurrent.futures
+import hashlib
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import megadb
+from . import tempmodelmulticore as tpfit
+
+PARTITION_KEYS = ['runid', 'task', 'freq']
+
+# Global state of each worker process, set once by worker_init
+_worker = {}
+
+def cache_path(db_path, cpu_num=4, cache_dir=None):
+    """
+    Returns the path of the cache file associated with the current version of
+    the given megadb (identified by its path, size and modification time) and
+    with the number of cpus the runs are extracted for.
+    """
+    db_path = os.path.realpath(db_path)
+    st      = os.stat(db_path)
+    key     = '%s:%d:%d:%d' % (db_path, st.st_size, st.st_mtime_ns, cpu_num)
+    digest  = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    if cache_dir is None:
+        cache_dir = os.path.dirname(db_path)
+
+    name = os.path.basename(db_path) + '.runs.' + digest + '.pkl'
+    return os.path.join(cache_dir, name)
+
+def load_runs(db_path, cpu_num=4, cache_dir=None):
+    """
+    Returns the list of runs contained in the given megadb (see
+    tempmodelmulticore.db_extract_runs), loading it from the cache if possible.
+    """
+    path = cache_path(db_path, cpu_num, cache_dir)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    runs = megadb.read(db_path).extract_runs(cpu_num)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(runs, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_path, path)
+
+    return runs
+
+def partition_runs(runs, k, by='runid', seed=0):
+    """
+    Partitions the runs in (at most) k folds, so that all runs with the same
+    value of the given key end up in the same fold.
+
+    Returns a list of folds, each one a list of run indices.
+    """
+    if by not in PARTITION_KEYS:
+        raise ValueError('Cannot partition runs by ' + str(by) + '!')
+
+    keys    = np.array([run[by] for run in runs])
+    values  = np.unique(keys)
+    rng     = np.random.default_rng(seed)
+    values  = rng.permutation(values)
+
+    k = min(k, len(values))
+    if k < 2:
+        raise ValueError('At least two distinct values of ' + str(by) +
+            ' are needed to cross-validate!')
+
+    folds = []
+    for fold_values in np.array_split(values, k):
+        folds.append(np.flatnonzero(np.isin(keys, fold_values)).tolist())
+    return folds
+
+def heldout_errors(pars, runs, model):
+    """
+    Returns the (flattened) differences between the simulated and the measured
+    temperatures of all the given runs.
+    """
+    return np.concatenate([
+        (model(pars, run['t'], run['inputs']) - run['data']).flatten()
+        for run in runs
+    ])
+
+def worker_init(runs, folds, method, pars):
+    _worker['runs']     = runs
+    _worker['folds']    = folds
+    _worker['method']   = method
+    _worker['pars']     = pars
+
+def worker_fold(engine, fold):
+    model   = tpfit.MODEL_ENGINES[engine]
+    runs    = _worker['runs']
+    test    = set(_worker['folds'][fold])
+
+    runs_train  = [r for i, r in enumerate(runs) if i not in test]
+    runs_test   = [r for i, r in enumerate(runs) if i in test]
+
+    start = time.perf_counter()
+    pars = tpfit.fit_temp_runs(runs_train, model,
+        pars=_worker['pars'],
+        method=_worker['method'],
+        verbose=False,
+    )
+    fit_time = time.perf_counter() - start
+
+    errors = heldout_errors(pars, runs_test, model)
+
+    row = {
+        'engine':       engine,
+        'fold':         fold,
+        'runs_train':   len(runs_train),
+        'runs_test':    len(runs_test),
+        'rms_error':    np.sqrt(np.mean(errors**2)),
+        'max_error':    np.max(np.abs(errors)),
+        'fit_time':     fit_time,
+    }
+    row.update(pars.valuesdict())
+    return row
+
+def cross_validate(runs, engines,
+    k=5,
+    by='runid',
+    seed=0,
+    method='leastsq',
+    cpu_num=4,
+    max_workers=None,
+    ):
+    """
+    Cross-validates each of the given model engines (names in
+    tempmodelmulticore.MODEL_ENGINES) on the given runs, extracted for the
+    given number of cpus.
+
+    Returns a table with one row per engine and fold, reporting the held-out
+    RMS and maximum absolute temperature errors and the fitted parameters.
+    """
+    for engine in engines:
+        if engine not in tpfit.MODEL_ENGINES:
+            raise ValueError('Unknown model engine ' + str(engine) + '!')
+
+    folds = partition_runs(runs, k, by=by, seed=seed)
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=worker_init,
+            initargs=(runs, folds, method, tpfit.build_params(cpu_num)),
+            ) as executor:
+        futures = [
+            executor.submit(worker_fold, engine, fold)
+            for engine in engines
+            for fold in range(len(folds))
+        ]
+        rows = [f.result() for f in futures]
+
+    out = pd.DataFrame(rows)
+    out.insert(2, 'partition', by)
+    out.insert(3, 'heldout', [
+        ' '.join(str(v) for v in np.unique([runs[i][by] for i in folds[f]]))
+        for f in out['fold']
+    ])
+    return out
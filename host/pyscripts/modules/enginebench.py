@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+"""
+This module measures accuracy and cost of the thermal model engines (see
+tempmodelmulticore.MODEL_ENGINES) over a grid of workloads: number of cores,
+number of time instants per run, stiffness of the RC network and number of
+runs fitted together.
+
+For each workload, runs with random power and initial temperatures are solved
+by a high-precision reference (an implicit integrator with tight tolerances)
+and used as measured data. Each engine is then timed on a single evaluation of
+the model, on a single evaluation of the residual over all runs and on a fit of
+the parameters starting from a perturbation of the true ones; its accuracy is
+the maximum deviation from the reference.
+"""
+
+import time
+
+import lmfit
+import numpy as np
+import pandas as pd
+import scipy.integrate
+
+from . import tempmodelmulticore as tpfit
+
+# Thermal parameters of each stiffness regime: capacitance, resistance towards
+# the environment and between each pair of cores
+REGIMES = {
+    'nominal':  { 'C': tpfit.DEFAULTS['C'], 'Re': tpfit.DEFAULTS['Re'],
+                  'R': tpfit.DEFAULTS['R_0_1'] },
+    # Strongly coupled cores with a small capacitance: time constants span
+    # several orders of magnitude
+    'small-rc': { 'C': 0.01, 'Re': 20.0, 'R': 0.05 },
+    # Weakly coupled cores with a large capacitance: slow dynamics, far from
+    # steady state for the whole run
+    'large-rc': { 'C': 5.0, 'Re': 50.0, 'R': 100.0 },
+}
+
+# Tolerances of the reference solution
+REFERENCE_RTOL = 1e-12
+REFERENCE_ATOL = 1e-12
+
+# Relative perturbation of the true parameters at the start of each fit
+FIT_PERTURBATION = 0.3
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def build_params(cpu_num, C, Re, R):
+    """
+    Returns the parameters of the model with the given number of cores, named
+    as in tempmodelmulticore.build_params, with the same resistance between
+    each pair of cores.
+    """
+    pars = lmfit.Parameters()
+    pars.add('C',   value=C,  min=tpfit.EPS, max=tpfit.INF)
+    pars.add('Re',  value=Re, min=tpfit.EPS, max=tpfit.INF)
+    for i in range(cpu_num):
+        for j in range(i, cpu_num):
+            Rij = 'R_%d_%d' % (i, j)
+            if i == j:
+                pars.add(Rij, value=0, vary=False)
+            else:
+                pars.add(Rij, value=R, min=tpfit.EPS, max=tpfit.INF)
+    return pars
+
+def perturb_params(pars, rng):
+    pars = pars.copy()
+    for p in pars.values():
+        if p.vary:
+            p.value = np.clip(
+                p.value * (1 + rng.uniform(-1, 1) * FIT_PERTURBATION),
+                p.min, p.max)
+    return pars
+
+def reference_solution(pars, t, inputs):
+    """
+    Returns the temperatures of the model at the given instants, integrated
+    with tight tolerances by an implicit method (the reference of accuracy).
+    """
+    cpu_num = tpfit.pars2cpunum(pars)
+    A, B    = tpfit.pars2AB(pars, cpu_num)
+    BU      = B @ inputs['U']
+
+    solution = scipy.integrate.solve_ivp(
+        lambda _, y: A @ y + BU,
+        (0, np.max(t)), inputs['T0'],
+        method='Radau',
+        t_eval=np.sort(t),
+        jac=A,
+        rtol=REFERENCE_RTOL,
+        atol=REFERENCE_ATOL,
+    )
+    return solution.y
+
+def make_runs(pars, cpu_num, points, runs_num, horizon, rng):
+    """
+    Returns runs_num runs (as returned by tempmodelmulticore.db_extract_runs)
+    with random power and initial temperatures, whose data is the reference
+    solution of the given parameters.
+    """
+    t = np.linspace(0, horizon, points)
+    runs = []
+    for runid in range(runs_num):
+        P   = rng.uniform(0.2, 3.0, cpu_num)
+        T0  = rng.uniform(30.0, 50.0, cpu_num)
+        inputs = tpfit.build_inputs(cpu_num, P, T0, tpfit.Te)
+        runs.append({
+            'runid':    runid,
+            'task':     None,
+            'freq':     None,
+            't':        t,
+            'inputs':   inputs,
+            'data':     reference_solution(pars, t, inputs),
+        })
+    return runs
+
+def best_time(fun, repeat):
+    """
+    Returns the shortest wall time of repeat calls of fun.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def max_deviation(pars, runs, model):
+    return max(
+        np.max(np.abs(model(pars, run['t'], run['inputs']) - run['data']))
+        for run in runs
+    )
+
+def fit(pars, runs, model, max_nfev):
+    """
+    Fits the parameters on the given runs (as in
+    tempmodelmulticore.fit_temp_runs). Returns the wall time, the number of
+    evaluations of the residual and whether the fit converged.
+    """
+    minimizer = lmfit.Minimizer(
+        tpfit.residual_runs, pars,
+        fcn_args=(runs, model),
+        fcn_kws={ 'should_print': False })
+
+    start = time.perf_counter()
+    result = minimizer.minimize(method='leastsq', max_nfev=max_nfev)
+    return time.perf_counter() - start, result.nfev, bool(result.success)
+
+def bench_workload(engines, cpu_num, points, regime, runs_num,
+    horizon=30.0,
+    repeat=3,
+    fit_evals=100,
+    seed=0,
+    ):
+    """
+    Returns one row per engine for the given workload (see bench_matrix).
+    """
+    rng     = np.random.default_rng(seed)
+    pars    = build_params(cpu_num, **REGIMES[regime])
+    runs    = make_runs(pars, cpu_num, points, runs_num, horizon, rng)
+    start   = perturb_params(pars, rng)
+
+    rows = []
+    for engine in engines:
+        model = tpfit.MODEL_ENGINES[engine]
+        run = runs[0]
+
+        row = {
+            'engine':       engine,
+            'cores':        cpu_num,
+            'points':       points,
+            'regime':       regime,
+            'runs':         runs_num,
+            'eval_time':    best_time(
+                lambda: model(pars, run['t'], run['inputs']), repeat),
+            'residual_time': best_time(
+                lambda: tpfit.residual_runs(pars, runs, model,
+                    should_print=False), repeat),
+            'max_deviation': max_deviation(pars, runs, model),
+        }
+
+        if fit_evals > 0:
+            row['fit_time'], row['fit_nfev'], row['fit_success'] = fit(
+                start, runs, model, fit_evals)
+
+        rows.append(row)
+    return rows
+
+def bench_matrix(engines, cores, points, regimes, runs,
+    tolerance=1e-3,
+    **kwargs,
+    ):
+    """
+    Benchmarks each of the given model engines (names in
+    tempmodelmulticore.MODEL_ENGINES) on each combination of number of cores,
+    time instants, stiffness regime (names in REGIMES) and number of runs.
+
+    Returns a table with one row per engine and workload: the wall time of an
+    evaluation of the model (a single run), of the residual (all runs) and of
+    the fit, with the maximum deviation from the reference solution (in degrees
+    Celsius). For each workload, the fastest engine (by residual time) whose
+    deviation is within the given tolerance is marked as the best one.
+    """
+    for engine in engines:
+        if engine not in tpfit.MODEL_ENGINES:
+            raise ValueError('Unknown model engine ' + str(engine) + '!')
+    for regime in regimes:
+        if regime not in REGIMES:
+            raise ValueError('Unknown stiffness regime ' + str(regime) + '!')
+
+    rows = []
+    for c in cores:
+        for p in points:
+            for regime in regimes:
+                for r in runs:
+                    rows += bench_workload(engines, c, p, regime, r, **kwargs)
+
+    out = pd.DataFrame(rows)
+
+    workload = ['cores', 'points', 'regime', 'runs']
+    accurate = out['max_deviation'] <= tolerance
+    fastest = (out[accurate].groupby(workload)['residual_time'].idxmin())
+    out['best'] = out.index.isin(fastest)
+    return out
@@ -8,8 +8,10 @@ eligible for use with GNU Make.
 
 import os
 import pathlib
-import re
 import sys
+import uuid
+
+from . import resultstree
 
 def safe_write(outfun, outfile, *args, **kwargs):
     """
@@ -37,11 +39,19 @@ def safe_write(outfun, outfile, *args, **kwargs):
     outdir = os.path.dirname(os.path.abspath(outfile))
     pathlib.Path(outdir).mkdir(parents=True, exist_ok=True)
 
-    # Choose the temporary file name using process id
-    tmpfile_name = outdir + '/tmp_' + str(os.getpid()) + '.tmp'
+    # Choose the temporary file name using process id and a random suffix, so
+    # that the same process can write multiple files in the same directory at
+    # the same time (e.g. in batch mode)
+    tmpfile_name = outdir + '/tmp_' + str(os.getpid()) + '_' + \
+        uuid.uuid4().hex + '.tmp'
 
     # Write to temporary file
-    outfun(tmpfile_name, *args, **kwargs)
+    try:
+        outfun(tmpfile_name, *args, **kwargs)
+    except BaseException:
+        if os.path.exists(tmpfile_name):
+            os.remove(tmpfile_name)
+        raise
 
     # NOTE: A simple rename like this should be enough "atomic". If you have
     # problems, try disabling signal handlers here.
@@ -64,30 +74,12 @@ def df_safe_to_csv(df,
     pass
 
 
-FILENAME_REGEXES = {
-    'howmany':      r'howmany_(\d+)/',
-    'island':       r'policy_(\w+)/',
-    'frequency':    r'freq_(\d+)/',
-    'task':         r'task_([\w-]+)/',
-    'cpu':          r'(\d+)/',
-}
-
-for k in FILENAME_REGEXES:
-    FILENAME_REGEXES[k] = re.compile(FILENAME_REGEXES[k])
-
-
-def match_last(regex: re.Pattern, string: str):
-    match = None
-    *_, match = regex.finditer(string)
-    return match
-#-- match_last
-
 def extract_metadata(file, policy_island_map, island_cpus_map):
     filepath = os.path.realpath(file.name)
 
-    metadata = {}
-    for k in FILENAME_REGEXES:
-        metadata[k] = match_last(FILENAME_REGEXES[k], filepath).group(1)
+    metadata = resultstree.parse_path(filepath)
+    if metadata is None:
+        sys.exit("File " + filepath + " is not part of a results tree!")
 
     # Map policy to correct island name
     if not metadata['island'] in policy_island_map:
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+This module loads the thermal "megadb" (one row per sample of each phase of
+each run, see thermal_model_fit.py) in a compact representation:
+
+ - task, island and type are categorical (one byte code per row);
+ - measured temperatures and powers are float32;
+ - runid is a 32 bits integer;
+ - rows are sorted by run and phase, and the offsets of the rows of each
+   (runid, type) block are computed once, together with a table of the values
+   that are constant within each block (task, frequency, inputs).
+
+Runs are filtered on the table of blocks (comparing integer codes) and their
+rows are then gathered by slicing, instead of comparing strings over all the
+rows of the megadb. The pandas table expected by the db_* functions of
+tempmodelmulticore is still available (see MegaDB.frame).
+"""
+
+import numpy    as np
+import pandas   as pd
+
+from . import tabletools
+from . import tempmodelmulticore as tpfit
+
+INDEX = ['runid', 'type', 'time']
+
+COLS_CATEGORICAL    = ['type', 'task', 'island']
+COLS_FLOAT32        = ('temp_', 'power_')
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def column_dtypes(columns):
+    dtypes = {}
+    for c in columns:
+        if c in COLS_CATEGORICAL:
+            dtypes[c] = 'category'
+        elif c.startswith(COLS_FLOAT32):
+            dtypes[c] = np.float32
+    if 'runid' in columns:
+        dtypes['runid'] = np.int32
+    return dtypes
+
+def read(path_or_buf):
+    """
+    Returns the megadb in the given CSV file as a MegaDB.
+    """
+    columns = tabletools.pd_read_csv(path_or_buf, nrows=0).columns
+    if hasattr(path_or_buf, 'seek'):
+        path_or_buf.seek(0)
+    df = tabletools.pd_read_csv(path_or_buf, dtype=column_dtypes(columns))
+    return MegaDB(df)
+
+def extract_runs(db, cpunum):
+    """
+    Same as tempmodelmulticore.db_extract_runs, for either a MegaDB or a pandas
+    table indexed by runid, type and time.
+    """
+    if isinstance(db, MegaDB):
+        return db.extract_runs(cpunum)
+    return tpfit.db_extract_runs(db, cpunum)
+
+class MegaDB:
+    """
+    A megadb, sorted by run and phase, with the offsets of each block of rows
+    of the same (runid, type).
+    """
+
+    def __init__(self, df, sort=True):
+        # Tables indexed by runid, type and time (see frame) are accepted too
+        df = df.reset_index(drop=df.index.names == [None])
+
+        if sort:
+            keys = self.block_keys(df)
+            if len(df.index) > 1 and np.any(np.diff(keys) < 0):
+                df = df.iloc[np.argsort(keys, kind='stable')]
+                df = df.reset_index(drop=True)
+
+        self.df = df
+
+        keys = self.block_keys(df)
+        starts = np.flatnonzero(np.diff(keys, prepend=-1) != 0)
+        self.offsets = np.append(starts, len(df.index))
+
+        # The values that are constant within each block, read from its first
+        # row (time excluded)
+        self.blocks = df.iloc[starts].drop(columns='time')
+        self.blocks = self.blocks.reset_index(drop=True)
+
+    @staticmethod
+    def block_keys(df):
+        """
+        Returns a key per row, equal for rows of the same (runid, type) and
+        increasing with runid and type.
+        """
+        types = df['type']
+        if not isinstance(types.dtype, pd.CategoricalDtype):
+            types = types.astype('category')
+        codes = types.cat.codes.to_numpy(np.int64)
+        return df['runid'].to_numpy(np.int64) * (len(types.cat.categories) + 1) \
+            + codes
+
+    def __len__(self):
+        return len(self.blocks.index)
+
+    def code(self, column, value):
+        """
+        Returns the integer code of the given value of a categorical column
+        (-1 if not present).
+        """
+        categories = self.df[column].cat.categories
+        return categories.get_loc(value) if value in categories else -1
+
+    def mask(self, **values):
+        """
+        Returns the mask of the blocks with the given values (e.g. task='gzip'),
+        comparing integer codes for categorical columns.
+        """
+        mask = np.full(len(self), True)
+        for k, v in values.items():
+            column = self.blocks[k]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                mask &= column.cat.codes.to_numpy() == self.code(k, v)
+            else:
+                mask &= column.to_numpy() == v
+        return mask
+
+    def select(self, mask):
+        """
+        Returns a new MegaDB with only the blocks in the given mask.
+        """
+        blocks = np.flatnonzero(mask)
+        if len(blocks) == 0:
+            return MegaDB(self.df.iloc[:0], sort=False)
+        rows = np.concatenate([
+            np.arange(self.offsets[b], self.offsets[b+1]) for b in blocks
+        ])
+        return MegaDB(self.df.iloc[rows], sort=False)
+
+    def where(self, **values):
+        return self.select(self.mask(**values))
+
+    def runids(self):
+        return np.unique(self.blocks['runid'].to_numpy())
+
+    def block(self, b):
+        return self.df.iloc[self.offsets[b]:self.offsets[b+1]]
+
+    def frame(self):
+        """
+        Returns the megadb as a pandas table indexed by runid, type and time,
+        as expected by the db_* functions of tempmodelmulticore.
+        """
+        return self.df.set_index(INDEX)
+
+    def extract_runs(self, cpunum):
+        """
+        Same as tempmodelmulticore.db_extract_runs, slicing the rows of each
+        block.
+        """
+        time    = self.df['time'].to_numpy()
+        data    = self.df[['temp_tz%d' % i for i in range(cpunum)]].to_numpy()
+        T0      = self.blocks[['temp_tz%d_0' % i for i in range(cpunum)]] \
+            .to_numpy(np.float64)
+        P       = self.blocks[['power_cpu%d' % i for i in range(cpunum)]] \
+            .to_numpy(np.float64)
+
+        def value(column, b):
+            if column not in self.blocks.columns:
+                return None
+            return self.blocks[column].iloc[b]
+
+        runs = []
+        for b in range(len(self)):
+            # FIXME: for now the cooldown does not work well!
+            if self.blocks['type'].iloc[b] == 'cooldown':
+                continue
+
+            start, stop = self.offsets[b], self.offsets[b+1]
+            runs.append({
+                'runid':  self.blocks['runid'].iloc[b],
+                'task':   value('task', b),
+                'freq':   value('freq', b),
+                't':      time[start:stop],
+                'inputs': tpfit.build_inputs(cpunum, P[b], T0[b], tpfit.Te),
+                'data':   data[start:stop].T,
+            })
+        return runs
+
+    def memory_usage(self):
+        """
+        Returns the memory used by the rows of the megadb, in bytes.
+        """
+        return int(self.df.memory_usage(deep=True).sum())
+#-- MegaDB
@@ -1,7 +1,25 @@
 #!/usr/bin/env python3
 
+"""
+This module collects the helpers shared by the plotting scripts:
+
+ - figures are rendered without a display (Agg backend), each one in a worker
+   of a pool of processes (see render), and closed as soon as they are saved;
+ - each figure is written to a file of its own, named after the run or the
+   configuration it shows (see out_path);
+ - long series are downsampled before being drawn with the Largest-Triangle-
+   Three-Buckets algorithm (see lttb), which keeps peaks and steps of the
+   series while drawing only a few hundred points of each line.
+"""
+
+import functools
+import re
+
+import matplotlib
 import numpy as np
 
+from . import batch
+
 # from . import timetools
 
 DEFAULT_PLOT_OPTIONS = {
@@ -10,8 +28,104 @@ DEFAULT_PLOT_OPTIONS = {
     'linewidth': 1,
 }
 
+# The number of points each series is downsampled to before being drawn
+MAX_POINTS = 1000
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def headless():
+    """
+    Selects the Agg backend, which renders figures to files only. Must be
+    called before any figure is created.
+    """
+    matplotlib.use('Agg')
+
+def lttb(x, y, threshold):
+    """
+    Returns the indices of the threshold points of the series (x, y) selected
+    by the Largest-Triangle-Three-Buckets algorithm (all of them if the series
+    is not longer than threshold). x must be sorted.
+
+    The first and last points are always kept; the others are split in
+    threshold - 2 buckets and from each bucket the point that forms the largest
+    triangle with the point selected in the previous bucket and the average of
+    the next bucket is selected.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for b in range(threshold - 2):
+        start, stop = edges[b], edges[b+1]
+
+        # The average point of the next bucket (the last point for the last
+        # bucket)
+        next_start = stop
+        next_stop = edges[b+2] if b + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        # Twice the area of each triangle, no need to halve it
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a]) -
+            (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + np.argmax(area)
+        selected[b+1] = a
+
+    return selected
+
+def decimate(x, y, threshold=MAX_POINTS):
+    """
+    Returns the series (x, y) downsampled to threshold points (see lttb).
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    selected = lttb(x, y, threshold)
+    return x[selected], y[selected]
+
+def out_path(basename, parts, ext):
+    """
+    Returns the name of the file of a figure: the basename followed by the
+    given parts (e.g. run, task and frequency), each one reduced to letters,
+    digits, dots and dashes, and by the extension.
+    """
+    parts = [re.sub(r'[^\w.-]+', '-', str(p)) for p in parts]
+    return '_'.join([basename, *parts]) + ext
+
+def _render_job(fun, *job):
+    import matplotlib.pyplot as plt
+
+    # Workers may not inherit the backend of the parent (e.g. when spawned)
+    headless()
+    try:
+        fun(*job)
+    finally:
+        plt.close('all')
+
+def render(fun, jobs, workers=None):
+    """
+    Calls fun(out_file, *args) for each job (out_file, *args) in a pool of
+    worker processes (by default, one per cpu) using the Agg backend. fun
+    shall create its own figure and save it in out_file. Returns the number of
+    failed jobs, each reported on stderr.
+    """
+    headless()
+    return batch.run(functools.partial(_render_job, fun), jobs, workers)
+
 def plot_y(axis, yvals,
     sampling_time=1,
     **kwargs):
     xvals = np.arange(yvals.shape[0]) * sampling_time
-    return axis.plot_xy(xvals, yvals, **DEFAULT_PLOT_OPTIONS, **kwargs)
+    return axis.plot(xvals, yvals, **DEFAULT_PLOT_OPTIONS, **kwargs)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+
+"""
+This module reads the files produced by the power sampler, either in text
+format (one "key value" line per value, samples separated by empty lines) or in
+binary format (sampler -b, see embedded/apps/sampler/include/sample_binary.h).
+
+Both readers return the same table: one row for the update period, one row per
+sample and one row for each breakpoint, as expected by table_convert_form in
+power_samples_to_table.py.
+
+Power files that are still being written (or pipes) can be parsed
+incrementally with a PowerFileFollower.
+"""
+
+import os
+import stat
+
+import numpy    as np
+import pandas   as pd
+
+from . import si
+
+# +--------------------------------------------------------+
+# |             Units Management in line names             |
+# +--------------------------------------------------------+
+
+# TODO: use the new si.py module
+def cartesian_prod(x, y):
+    return np.transpose([np.tile(x, len(y)), np.repeat(y, len(x))])
+
+base_units = ['W', 'A', 'V', 'C', 's']
+unit_modifiers = ['', 'm', 'u']
+
+# Examples: W, mW, uW
+known_units = [
+    ''.join(map(str, x)) for x in cartesian_prod(unit_modifiers, base_units)
+]
+
+known_units_underscore = tuple(["_" + x for x in known_units])
+
+# Ignored columns
+# TODO: check again this list
+ignore_list = ['FOREVER:', 'gzip:', 'Command', 'Run']
+
+# +--------------------------------------------------------+
+# |                      Text Format                       |
+# +--------------------------------------------------------+
+
+def line_to_kvalues(split, column_map):
+    """
+    Returns the list of (key, value) pairs contained in a line of the text
+    format, already split in tokens.
+    """
+    k = split[0].strip()
+    vv = split[1:]
+
+    if (k.startswith('----------')):
+        k = 'breakpoint'
+        vv = '1'
+
+    # Some columns are already in the _ format, but I don't like it,
+    # I prefer to do it manually in python so that I can change the
+    # mapping
+    # TODO:
+
+    if k.endswith(known_units_underscore):
+        ssplit = k.split('_')
+        k = '_'.join(ssplit[0:-1])
+        vv = [ssplit[-1]] + vv
+
+    # Remap columns based on the configured mapping
+    if k in column_map:
+        k = column_map[k]
+
+    # Units will be embedded in column names
+    if len(vv) > 1 and vv[0].strip() in known_units:
+        k += '_' + vv[0].strip()
+        vv = vv[1:]
+
+    needs_suffix = len(vv) > 1
+
+    if k in ignore_list:
+        return []
+
+    # Keys with multiple values will be split
+    # into multiple columns in the resulting CSV
+    kvalues = []
+    for idx, v in enumerate(vv):
+        key = k + '_' + str(idx) if needs_suffix else k
+
+        if ('time' in key and float(v.strip()) < 0.05):
+            continue
+
+        kvalues.append((key, v.strip()))
+    return kvalues
+#-- line_to_kvalues
+
+def powerfile_to_table(inf, column_map):
+    """
+    Parses a power file in text format, values are returned as strings.
+    """
+    rows = []
+    kvalues = {}
+
+    for line in inf:
+        if len(line.strip()) < 1:
+            # Append to dataframe
+            if kvalues:
+                rows.append(kvalues)
+            kvalues = {}
+        else:
+            # Parse line and add it to the dictionary
+            kvalues.update(line_to_kvalues(line.split(), column_map))
+
+    # Append to dataframe
+    if kvalues:
+        rows.append(kvalues)
+
+    return pd.DataFrame(rows)
+#-- powerfile_to_table
+
+# +--------------------------------------------------------+
+# |                     Binary Format                      |
+# +--------------------------------------------------------+
+
+# NOTE: the sampler writes in host byte order, all supported boards are little
+# endian
+BINARY_MAGIC    = b'SMPLBIN\0'
+BINARY_VERSION  = 1
+
+FLAG_BREAKPOINT = 0x1
+
+HEADER_DTYPE = np.dtype([
+    ('magic',       'S8'),
+    ('version',     '<u4'),
+    ('ncols',       '<u4'),
+    ('period_us',   '<i8'),
+])
+
+COLUMN_DTYPE = np.dtype([
+    ('name',        'S46'),
+    ('unit',        'S16'),
+    ('sep',         'S1'),
+    ('type',        'u1'),
+])
+
+def record_dtype(ncols):
+    return np.dtype([
+        ('flags',   '<u8'),
+        ('values',  '<f8', (ncols,)),
+    ])
+
+def is_binary(path):
+    """
+    Returns True if the given power file is in binary format.
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def binary_read(path):
+    """
+    Returns the header, the column descriptions and the records of a power file
+    in binary format. Records are memory-mapped, a record truncated at the end
+    of the file (sampler interrupted while writing) is ignored.
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) < 1 or header[0]['magic'] != BINARY_MAGIC.rstrip(b'\0'):
+        raise ValueError(str(path) + ' is not a binary power file!')
+
+    header = header[0]
+    if header['version'] != BINARY_VERSION:
+        raise ValueError('Unsupported binary power file version ' +
+            str(header['version']) + '!')
+
+    ncols   = int(header['ncols'])
+    columns = np.fromfile(path, dtype=COLUMN_DTYPE, count=ncols,
+        offset=HEADER_DTYPE.itemsize)
+
+    offset  = HEADER_DTYPE.itemsize + ncols * COLUMN_DTYPE.itemsize
+    dtype   = record_dtype(ncols)
+    count   = (os.path.getsize(path) - offset) // dtype.itemsize
+
+    if count < 1:
+        records = np.empty(0, dtype=dtype)
+    else:
+        records = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+            shape=(count,))
+
+    return header, columns, records
+#-- binary_read
+
+def column_tokens(column):
+    """
+    Returns the tokens that precede the value of the given column in a line of
+    the text format.
+    """
+    name = column['name'].decode()
+    unit = column['unit'].decode()
+    sep  = column['sep'].decode()
+    label = name + sep + unit if unit else name
+    return label.split()
+
+def binary_records_to_table(header, columns, records, column_map,
+    with_period=True):
+    """
+    Converts the given records of a power file in binary format to the same
+    table produced by powerfile_to_table (with numeric values). The update
+    period row is added only if with_period is True.
+    """
+    # Map each column to the key it would have in the text format (later
+    # columns with the same key overwrite earlier ones, as in the text format)
+    keys = {}
+    for idx, col in enumerate(columns):
+        kvalues = line_to_kvalues(column_tokens(col) + ['1'], column_map)
+        if kvalues:
+            keys[kvalues[0][0]] = idx
+
+    # Row 0 holds the update period, each breakpoint takes one row before the
+    # first record that follows it
+    first = 1 if with_period else 0
+    is_break = (records['flags'] & FLAG_BREAKPOINT) != 0
+    numrecords = len(records)
+    positions = first + np.arange(numrecords) + np.cumsum(is_break)
+    numrows = first + numrecords + np.count_nonzero(is_break)
+
+    data = {}
+
+    if with_period:
+        period_key, period = line_to_kvalues(
+            ['UPDATE_PERIOD_us', str(header['period_us'])], column_map)[0]
+        col = np.full(numrows, np.nan)
+        col[0] = float(period)
+        data[period_key] = col
+
+    values = records['values']
+    for key, idx in keys.items():
+        col = np.full(numrows, np.nan)
+        col[positions] = values[:, idx]
+        if 'time' in key:
+            col[col < 0.05] = np.nan
+        data[key] = col
+
+    col = np.full(numrows, np.nan)
+    col[positions[is_break] - 1] = 1
+    data['breakpoint'] = col
+
+    return pd.DataFrame(data)
+#-- binary_records_to_table
+
+def binary_to_table(path, column_map):
+    """
+    Reads a power file in binary format, producing the same table as
+    powerfile_to_table (with numeric values).
+    """
+    header, columns, records = binary_read(path)
+    return binary_records_to_table(header, columns, records, column_map)
+#-- binary_to_table
+
+def read_powerfile(path, column_map):
+    """
+    Reads a power file in either format (detected automatically), returning a
+    table with numeric values.
+    """
+    if is_binary(path):
+        return binary_to_table(path, column_map)
+
+    with open(path) as inf:
+        df = powerfile_to_table(inf, column_map)
+
+    for c in df.columns:
+        df[c] = pd.to_numeric(df[c])
+    return df
+#-- read_powerfile
+
+# +--------------------------------------------------------+
+# |                 Incremental Parsing                    |
+# +--------------------------------------------------------+
+
+class PowerFileFollower:
+    """
+    Parses a power file while the sampler is still writing it, in either
+    format (detected from the first bytes).
+
+    Each call to poll reads only the bytes written since the previous call
+    and parses the samples they complete; bytes of an incomplete sample are
+    kept until the rest of it is available. Parsed samples are kept as a
+    numeric table, no raw input is retained: all of them by default (see
+    get_table), only the last max_rows if given, or none if max_rows is 0 (each
+    row is then returned once by get_new).
+
+    The follower also tracks the update period and the position of the first
+    breakpoint, so that callers can tell when the cooldown phase of the run
+    is over (see cooldown_elapsed).
+    """
+
+    READ_SIZE = 1 << 20
+
+    def __init__(self, path, column_map, max_rows=None):
+        self.column_map = column_map
+        self.max_rows   = max_rows
+        self.fd         = os.open(path, os.O_RDONLY) if path != '-' else 0
+        self.is_pipe    = not stat.S_ISREG(os.fstat(self.fd).st_mode)
+        self.finished   = False
+        self.buffer     = b''
+        self.binary     = None
+        self.header     = None
+        self.columns    = None
+        self.dtype      = None
+        self.chunks     = []
+        self.kept_rows  = 0
+        self.table      = None
+        self.rows       = 0
+        self.period     = None
+        self.breakpoint = None
+
+    def close(self):
+        if self.fd > 0:
+            os.close(self.fd)
+        self.fd = -1
+
+    def read_available(self):
+        """
+        Returns the bytes written since the last call. On a pipe, it blocks
+        until some data is available and marks the follower as finished when
+        the writer closes it.
+        """
+        data = []
+        while True:
+            chunk = os.read(self.fd, self.READ_SIZE)
+            if not chunk:
+                if self.is_pipe:
+                    self.finished = True
+                break
+            data.append(chunk)
+            if self.is_pipe or len(chunk) < self.READ_SIZE:
+                break
+        return b''.join(data)
+
+    def parse_text(self):
+        # Only whole samples (terminated by an empty line) are parsed, unless
+        # the pipe was closed
+        end = len(self.buffer) if self.finished else \
+            self.buffer.rfind(b'\n\n') + 2
+        if end < 2:
+            return None
+
+        complete    = self.buffer[:end]
+        self.buffer = self.buffer[end:]
+
+        df = powerfile_to_table(complete.decode().splitlines(),
+            self.column_map)
+        for c in df.columns:
+            df[c] = pd.to_numeric(df[c])
+        return df
+
+    def parse_binary(self):
+        if self.header is None:
+            if len(self.buffer) < HEADER_DTYPE.itemsize:
+                return None
+            header = np.frombuffer(self.buffer, dtype=HEADER_DTYPE, count=1)[0]
+            ncols  = int(header['ncols'])
+            offset = HEADER_DTYPE.itemsize + ncols * COLUMN_DTYPE.itemsize
+            if len(self.buffer) < offset:
+                return None
+
+            if header['version'] != BINARY_VERSION:
+                raise ValueError('Unsupported binary power file version ' +
+                    str(header['version']) + '!')
+
+            self.header  = header
+            self.columns = np.frombuffer(self.buffer, dtype=COLUMN_DTYPE,
+                count=ncols, offset=HEADER_DTYPE.itemsize)
+            self.dtype   = record_dtype(ncols)
+            self.buffer  = self.buffer[offset:]
+            self.period  = header['period_us'] * 10**-6
+            with_period  = True
+        else:
+            with_period  = False
+
+        # Only whole records are parsed
+        count = len(self.buffer) // self.dtype.itemsize
+        if count < 1 and not with_period:
+            return None
+
+        size        = count * self.dtype.itemsize
+        records     = np.frombuffer(self.buffer[:size], dtype=self.dtype)
+        self.buffer = self.buffer[size:]
+
+        return binary_records_to_table(self.header, self.columns, records,
+            self.column_map, with_period=with_period)
+
+    def track(self, df):
+        """
+        Updates the update period and the position of the first breakpoint
+        with the given new rows.
+        """
+        if self.period is None:
+            for c in df.columns:
+                if not c.startswith('UPDATE_PERIOD_'):
+                    continue
+                prefix = c[len('UPDATE_PERIOD_'):-len(si.units['second'])]
+                values = df[c].dropna()
+                if c.endswith(si.units['second']) and prefix in si.prefixes \
+                    and len(values.index):
+                    self.period = values.iloc[0] * si.prefixes[prefix]
+
+        if self.breakpoint is None and 'breakpoint' in df.columns:
+            rows = np.flatnonzero(df['breakpoint'].notna().to_numpy())
+            if len(rows):
+                self.breakpoint = self.rows + rows[0]
+
+    def poll(self):
+        """
+        Parses the data written since the last call, returns the number of
+        new rows added to the table.
+        """
+        self.buffer += self.read_available()
+
+        if self.binary is None:
+            if len(self.buffer) < len(BINARY_MAGIC) and not self.finished:
+                return 0
+            self.binary = self.buffer.startswith(BINARY_MAGIC)
+
+        df = self.parse_binary() if self.binary else self.parse_text()
+        if df is None or len(df.index) < 1:
+            return 0
+
+        self.track(df)
+        self.rows += len(df.index)
+        self.chunks.append(df)
+        self.kept_rows += len(df.index)
+
+        # Old rows are dropped once twice as many as needed are kept, so that
+        # rows are not copied at each call (rows are dropped by get_new if no
+        # row is kept)
+        if self.max_rows and self.kept_rows > 2 * self.max_rows:
+            self.get_table()
+
+        return len(df.index)
+
+    def finish(self):
+        """
+        Parses all the data left once the writer is gone (e.g. the sampler
+        exited), including an incomplete last sample. Returns the number of
+        new rows.
+        """
+        self.finished = True
+        return self.poll()
+
+    def get_new(self):
+        """
+        Returns the table of the samples parsed since the previous call, for
+        followers that keep no rows (max_rows is 0).
+        """
+        if not self.chunks:
+            return pd.DataFrame()
+        df = pd.concat(self.chunks, ignore_index=True)
+        self.chunks     = []
+        self.kept_rows  = 0
+        return df
+
+    def get_table(self):
+        """
+        Returns the table of all the samples parsed so far (the same returned
+        by read_powerfile once the whole file is available), or of the last
+        max_rows of them.
+        """
+        if self.chunks:
+            if self.table is not None:
+                self.chunks.insert(0, self.table)
+            self.table      = pd.concat(self.chunks, ignore_index=True)
+            self.chunks     = []
+            if self.max_rows is not None:
+                self.table  = self.table.tail(self.max_rows) \
+                    .reset_index(drop=True)
+            self.kept_rows  = len(self.table.index)
+        return self.table if self.table is not None else pd.DataFrame()
+
+    def cooldown_elapsed(self):
+        """
+        Returns the duration of the samples parsed after the first breakpoint
+        (i.e. of the cooldown phase so far), in seconds, or None if there is
+        no breakpoint yet.
+        """
+        if self.breakpoint is None or self.period is None:
+            return None
+        return (self.rows - self.breakpoint - 1) * self.period
+#-- PowerFileFollower
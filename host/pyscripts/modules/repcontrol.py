@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+This module decides how many times each configuration shall be repeated.
+
+The results of each run (task time and steady-state power) are summarized as
+soon as the run ends and fed to a streaming estimator (Welford's algorithm),
+whose state is kept in a small JSON file per configuration. Repetitions stop
+once the half-width of the t confidence interval of every metric is below a
+target fraction of its mean, within a minimum and a maximum number of runs.
+"""
+
+import glob
+import json
+import os
+import re
+
+import numpy as np
+from scipy import stats
+
+from . import powerfile
+from . import tabletools
+from . import timetools
+
+# Lines printed by forever after each completed execution of the task, either
+# "time <seconds>" or (when wrapping perf) the value after 8 separators
+TIME_LINE_REGEX = re.compile(r'^(?:time |,{8})(\d+(?:\.\d+)?)\s*$', re.M)
+
+class RunningStats:
+    """
+    Mean and variance of a stream of values, updated one value at a time.
+    """
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n      = n
+        self.mean   = mean
+        self.m2     = m2
+
+    def update(self, x):
+        self.n      += 1
+        delta       = x - self.mean
+        self.mean   += delta / self.n
+        self.m2     += delta * (x - self.mean)
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    def ci_halfwidth(self, confidence):
+        """
+        Returns the half-width of the t confidence interval of the mean.
+        """
+        if self.n < 2:
+            return np.inf
+        t = stats.t.ppf(0.5 + confidence / 2, self.n - 1)
+        return t * np.sqrt(self.variance() / self.n)
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['n'], d['mean'], d['m2'])
+#-- RunningStats
+
+def summarize_time(test_dir, time_prefix='measure_time.txt'):
+    """
+    Returns the mean duration of the task executions completed in the given
+    test directory (over all task instances), NaN if none completed.
+    """
+    times = []
+    for path in glob.glob(os.path.join(test_dir, time_prefix + '.*')):
+        with open(path) as f:
+            times += [float(v) for v in TIME_LINE_REGEX.findall(f.read())]
+    return np.mean(times) if times else np.nan
+
+def summarize_power(test_dir, power_file='measure_power.txt'):
+    """
+    Returns the steady-state value of each power sensor during the active phase
+    of the test in the given directory (see timetools.steady_value).
+    """
+    df = powerfile.read_powerfile(os.path.join(test_dir, power_file), {})
+    df, _           = tabletools.extract_update_period(df)
+    df, breakpoint  = tabletools.extract_breakpoint(df)
+
+    if not np.isnan(breakpoint):
+        df = df.loc[:int(breakpoint)]
+
+    cols = tabletools.select_cols_endswith(
+        tabletools.select_cols_startwith(df.columns, 'sensor'), 'W')
+    return {
+        'power_' + c: timetools.steady_value(df[c].dropna().to_numpy())
+        for c in cols
+    }
+
+def summarize_run(test_dir):
+    """
+    Returns the metrics of the run in the given test directory.
+    """
+    return {'time': summarize_time(test_dir), **summarize_power(test_dir)}
+
+def state_load(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file) as f:
+        return {k: RunningStats.from_dict(v) for k, v in json.load(f).items()}
+
+def state_save(state, state_file):
+    tmp_file = state_file + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump({k: v.to_dict() for k, v in state.items()}, f, indent=4)
+    os.rename(tmp_file, state_file)
+
+def state_update(state, metrics):
+    for k, v in metrics.items():
+        if np.isnan(v):
+            continue
+        state.setdefault(k, RunningStats()).update(v)
+    return state
+
+def relative_halfwidths(state, confidence):
+    """
+    Returns the half-width of the confidence interval of each metric, as a
+    fraction of its mean.
+    """
+    return {
+        k: s.ci_halfwidth(confidence) / abs(s.mean) if s.mean else np.inf
+        for k, s in state.items()
+    }
+
+def enough_repetitions(state, runs, confidence=0.95, target=0.02,
+    min_runs=3, max_runs=20):
+    """
+    Returns True if no more runs are needed: either the maximum was reached or,
+    after the minimum, all metrics are known within the target precision.
+    """
+    if runs >= max_runs:
+        return True
+    if runs < min_runs or not state:
+        return False
+    return all(h <= target
+        for h in relative_halfwidths(state, confidence).values())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+"""
+This module describes the layout of a results tree (see embedded/README.md):
+
+    howmany_<H>/policy_<P>/freq_<F>/task_<T>/<R>/<file>
+
+and parses the metadata of a file from the names of the directories on its
+path. It has no dependencies on the other modules, so that any of them can
+use it (see catalog.py and maketools.extract_metadata).
+"""
+
+import os
+import re
+
+# Metadata parsed from each level of the tree, in order (same names as in
+# maketools.extract_metadata)
+LEVELS = [
+    ('howmany',     re.compile(r'howmany_(\d+)')),
+    ('island',      re.compile(r'policy_(\w+)')),
+    ('frequency',   re.compile(r'freq_(\d+)')),
+    ('task',        re.compile(r'task_([\w-]+)')),
+    ('cpu',         re.compile(r'(\d+)')),
+]
+
+METADATA_COLUMNS = [k for k, _ in LEVELS]
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def parse_path(path):
+    """
+    Returns the metadata of the given file from the directories on its path, or
+    None if the file is not in a repetition directory of a results tree.
+    """
+    parts = os.path.normpath(path).split(os.sep)[:-1]
+    if len(parts) < len(LEVELS):
+        return None
+
+    metadata = {}
+    for (k, regex), part in zip(LEVELS, parts[-len(LEVELS):]):
+        match = regex.fullmatch(part)
+        if not match:
+            return None
+        metadata[k] = match.group(1)
+    return metadata
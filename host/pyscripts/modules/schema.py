@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+This module compiles the header of a table of power samples (as returned by
+powerfile, i.e. after the column map was applied) into a conversion plan: which
+columns are selected, the factor each of them is scaled by and its name in the
+output table (see table_convert_form in power_samples_to_table.py).
+
+All the power files produced on the same board share the same header, so plans
+are cached by the hash of the header, both in memory and in a JSON file saved
+in the root of the results tree (next to the catalog index). The conversion of
+each file is then a single scale of the selected columns.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy    as np
+import pandas   as pd
+
+from . import maketools
+from . import resultstree
+from . import si
+from . import tabletools
+
+# The name of the cache file, saved in the root of the results tree
+CACHE_FILE = 'schemas.json'
+
+# Fixed output columns, filled by apply_plan
+COLS_FIXED = ['time', 'sampling_time', 'breakpoint']
+
+REGEX_POWER = re.compile(r'sensor_([a-z]+)_.*', re.I)
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def header_hash(columns):
+    return hashlib.sha1('\n'.join(columns).encode()).hexdigest()
+
+def compile_plan(columns):
+    """
+    Returns the conversion plan of the given header (without the update period
+    and breakpoint columns): for each output column, its input column, scale
+    factor and name (frequencies in Hz, temperatures in degrees Celsius, power
+    in Watts).
+    """
+    cols_freq, magnitude_freq = tabletools.select_sample_cols_freq(columns)
+    cols_temp, magnitude_temp = tabletools.select_sample_cols_temp(columns)
+    cols_power = tabletools.select_cols_endswith(
+        tabletools.select_cols_startwith(columns, 'sensor'), si.units['watt'])
+
+    plan = {'in': [], 'scale': [], 'out': []}
+
+    def add(c, scale, out):
+        plan['in'].append(c)
+        plan['scale'].append(scale)
+        plan['out'].append(out)
+
+    for c in cols_freq:
+        add(c, magnitude_freq, c.replace('cpu_freq', 'freq_cpu'))
+
+    for c in cols_temp:
+        add(c, magnitude_temp, c.replace('thermal_zone_temp', 'temp_tz'))
+
+    for c in cols_power:
+        prefix = si.extractprefix(c, si.units['watt'])
+        add(c, si.prefixes[prefix], REGEX_POWER.sub(r'power_\1', c))
+
+    return plan
+
+def apply_plan(plan, df, update_period, breakpoint):
+    """
+    Returns the converted table of the given samples (without the update period
+    and breakpoint rows and columns).
+    """
+    numrows = len(df.index)
+
+    empty = np.full(numrows, np.nan)
+    up = empty.copy()
+    bp = empty.copy()
+    if numrows > 0:
+        up[0] = update_period
+        bp[0] = breakpoint
+
+    values = df[plan['in']].to_numpy(dtype=float) * np.asarray(plan['scale'],
+        dtype=float)
+
+    outdf = pd.DataFrame(values, columns=plan['out'])
+    outdf.insert(0, 'time', np.arange(numrows) * update_period)
+    outdf.insert(1, 'sampling_time', up)
+    outdf.insert(2, 'breakpoint', bp)
+    return outdf
+
+def cache_path(path):
+    """
+    Returns the path of the cache file for the given power file, in the root
+    of its results tree (None if the file is not part of one).
+    """
+    path = os.path.realpath(path)
+    if resultstree.parse_path(path) is None:
+        return None
+    root = path
+    for _ in range(len(resultstree.LEVELS) + 1):
+        root = os.path.dirname(root)
+    return os.path.join(root, CACHE_FILE)
+
+class PlanCache:
+    """
+    Conversion plans by header hash, optionally persisted in a JSON file.
+    """
+
+    def __init__(self, path=None):
+        self.path   = path
+        self.plans  = {}
+        self.dirty  = False
+
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.plans = json.load(f)
+            except ValueError:
+                # Corrupted cache, plans are compiled again
+                self.plans = {}
+
+    def get(self, columns):
+        key = header_hash(columns)
+        if key not in self.plans:
+            self.plans[key] = compile_plan(columns)
+            self.dirty = True
+        return self.plans[key]
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+
+        # Keep plans saved by other processes in the meantime
+        plans = PlanCache(self.path).plans
+        plans.update(self.plans)
+
+        def write(out_file):
+            with open(out_file, 'w') as f:
+                json.dump(plans, f, indent=4)
+        maketools.safe_write(write, self.path)
+        self.dirty = False
+#-- PlanCache
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import functools
 import re
 
 units = {
@@ -64,19 +65,20 @@ prefixes = {
 
 LETTERS_ROMAN_GREEK = 'A-Za-zΑ-Ωα-ω'
 
+# Regexes are compiled once per unit
+@functools.lru_cache(maxsize=None)
+def re_unit_group(unit: str):
+    return re.compile('.*_([' + LETTERS_ROMAN_GREEK + ']+)' + unit + '$', re.I)
+
+@functools.lru_cache(maxsize=None)
+def re_unit_suffix(unit: str):
+    return re.compile('_[' + LETTERS_ROMAN_GREEK + ']+' + unit + '$')
+
 def re_match_unit_group(s: str, unit: str):
-    return re.match(
-        '.*_([' + LETTERS_ROMAN_GREEK + ']+)' + unit + '$',
-        s,
-        re.I,
-    )
+    return re_unit_group(unit).match(s)
 
 def re_strip_unit_suffix(s: str, unit: str, replace: str):
-    return re.sub(
-        '_[' + LETTERS_ROMAN_GREEK + ']+' + unit + '$',
-        replace,
-        s,
-    )
+    return re_unit_suffix(unit).sub(replace, s)
 
 def extractprefix(string: str, unit: str):
     string = string.strip()
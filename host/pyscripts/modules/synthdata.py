@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+"""
+This module synthesizes results trees with the same layout and file formats
+produced by the embedded component (see embedded/README.md), so that the host
+pipeline can be run and measured without a real board dataset:
+
+    howmany_<H>/policy_<P>/freq_<F>/task_<T>/<R>/measure_power.txt
+                                                 measure_power.txt.err
+                                                 measure_time.txt.<1-H>
+                                                 cooldown.txt
+
+Temperatures are simulated with the RC thermal model of tempmodelmulticore
+(one node per thermal zone, with its default parameters), driven by a power
+model of the cores that depends on frequency, task and number of parallel
+tasks; measured values are affected by noise and by the resolution of the
+sensors. Performance counters follow the same frequency and task.
+
+The column map needed to read the power files (power sensors are written as
+the SmartPower ones) is saved in the root of the tree, together with the
+thermal "megadb" of all the simulated runs (the input of thermal_model_fit.py).
+"""
+
+import os
+import zlib
+
+import numpy    as np
+import pandas   as pd
+import scipy.linalg
+
+from . import maketools
+from . import tempmodelmulticore as tpfit
+
+# Name of the files saved in the root of the tree
+CMAP_FILE   = 'synth.cmap'
+MEGADB_FILE = 'th_megadb.csv'
+
+# Default description of a tree, each key can be overridden
+DEFAULTS = {
+    'howmany':          [1],
+    'policies':         ['4'],
+    'freqs':            [800000, 1400000, 2000000],     # kHz
+    'tasks':            ['gzip', 'bzip2'],
+    'repetitions':      3,
+    'warmup':           True,       # also write the 0 (warm-up) repetitions
+    'period_us':        100000,
+    'active_s':         20.0,
+    'cooldown_s':       10.0,
+    'zones':            4,          # thermal zones (nodes of the RC model)
+    'cpus':             8,          # cpus reporting their frequency
+    'power_sensors':    ['smartpower'],
+    'noise_temp':       0.3,        # degrees Celsius (standard deviation)
+    'temp_resolution':  1.0,        # degrees Celsius
+    'noise_power':      0.02,       # relative (standard deviation)
+    'ambient':          tpfit.Te,   # degrees Celsius
+    'perf_events':      ['cycles', 'instructions', 'branches',
+                         'branch-misses', 'cache-references', 'cache-misses'],
+    'perf_interval_s':  1.0,
+    'megadb':           True,
+    'seed':             19940913,
+}
+
+# Power model of a core: static + dynamic (cubic in the frequency, in GHz)
+POWER_IDLE      = 0.3       # W
+POWER_DYN       = 0.25      # W / GHz^3
+POWER_BOARD     = 2.0       # W, measured by the first power sensor only
+POWER_RAIL      = 0.5       # W, measured by each other power sensor
+
+# Duration of a task at the highest frequency and its counters per cycle
+TASK_DURATION_S = 2.0
+
+# Counters of each event per cycle (other events get OTHER_PER_CYCLE)
+EVENTS_PER_CYCLE = {
+    'cycles':           1.0,
+    'instructions':     1.2,
+    'branches':         0.24,
+    'branch-misses':    0.0024,
+    'cache-references': 0.036,
+    'cache-misses':     0.0018,
+}
+OTHER_PER_CYCLE = 0.01
+
+# -------------------------------------------------------- #
+#                        Functions                         #
+# -------------------------------------------------------- #
+
+def make_spec(**kwargs):
+    """
+    Returns the description of a tree: the defaults, updated with the given
+    values (None values are ignored).
+    """
+    spec = dict(DEFAULTS)
+    spec.update({k: v for k, v in kwargs.items() if v is not None})
+    return spec
+
+def task_factor(task):
+    """
+    Returns a factor in [0.6, 1.0] that characterizes the given task (its
+    activity and its instructions per cycle), stable across runs.
+    """
+    return 0.6 + 0.4 * (zlib.crc32(task.encode()) % 1000) / 999
+
+def thermal_matrices(zones):
+    """
+    Returns the A and B matrices of the RC model with the given number of
+    nodes (the default parameters of tempmodelmulticore).
+    """
+    if zones == 4:
+        return tpfit.pars2AB(tpfit.build_params(zones), zones)
+
+    d = tpfit.DEFAULTS
+    R = np.full((zones, zones), d['R_0_1'])
+    return (tpfit.matrix_A(d['C'], d['Re'], R),
+        tpfit.matrix_B(d['C'], d['Re'], zones))
+
+def core_power(spec, freq, task, howmany):
+    """
+    Returns the power of each core (one per thermal zone) in Watts while the
+    given number of instances of the task run at the given frequency (kHz).
+    """
+    dynamic = POWER_DYN * (freq / 1e6) ** 3 * task_factor(task)
+    P = np.full(spec['zones'], POWER_IDLE)
+    P[:min(howmany, spec['zones'])] += dynamic
+    return P
+
+def steady_temperature(A, B, P, Te):
+    return -np.linalg.solve(A, B @ np.append(P, Te))
+
+def simulate(A, B, T0, P, Te, dt, n):
+    """
+    Returns the temperature of each node (columns) at each of the n sampling
+    instants, with constant power P starting from T0.
+    """
+    zones   = T0.size
+    Ad      = scipy.linalg.expm(A * dt)
+    forced  = tpfit.model_AB_Uconst(A, B, np.zeros(zones), np.append(P, Te),
+        dt)
+
+    T = np.empty((n, zones))
+    T[0] = T0
+    for k in range(1, n):
+        T[k] = Ad @ T[k-1] + forced
+    return T
+
+def measure_temperature(spec, T, rng):
+    T = T + rng.normal(0, spec['noise_temp'], T.shape)
+    resolution = spec['temp_resolution']
+    if resolution > 0:
+        T = np.round(T / resolution) * resolution
+    return T
+
+def measure_power(spec, P, n, rng):
+    """
+    Returns the power measured by each sensor (columns) at each sampling
+    instant: the first one measures the cores and the board, the others a
+    constant rail.
+    """
+    nominal = np.full(len(spec['power_sensors']), POWER_RAIL)
+    nominal[0] = POWER_BOARD + np.sum(P)
+    noise = rng.normal(1, spec['noise_power'], (n, nominal.size))
+    return nominal * noise
+
+def power_samples_text(spec, freq, temps, powers, breakpoint):
+    """
+    Returns the content of a power file in text format, with a breakpoint
+    before the given sample.
+    """
+    lines = ['UPDATE_PERIOD_us %d' % spec['period_us'], '']
+
+    freq_lines = ['cpu_freq%d %d' % (i, freq) for i in range(spec['cpus'])]
+
+    for k in range(len(temps)):
+        if k == breakpoint:
+            lines += ['-' * 44, '']
+
+        lines += freq_lines
+        lines += [
+            'thermal_zone_temp%d %d' % (i, round(t * 1000))
+            for i, t in enumerate(temps[k])
+        ]
+        for name, p in zip(spec['power_sensors'], powers[k]):
+            lines += [
+                '%s uV %d' % (name, 5000000),
+                '%s uA %d' % (name, round(p / 5 * 1e6)),
+                '%s uW %d' % (name, round(p * 1e6)),
+            ]
+        lines.append('')
+
+    return '\n'.join(lines) + '\n'
+
+def perf_samples_text(spec, freq, task, rng):
+    """
+    Returns the content of a time file of a task instance during the active
+    phase: the counters of each perf interval and the duration of each
+    execution of the task (forever + perf -x, in CSV format).
+    """
+    interval    = spec['perf_interval_s']
+    fmax        = max(spec['freqs'])
+    factor      = task_factor(task)
+    duration    = TASK_DURATION_S * fmax / freq
+
+    lines   = []
+    tstamp  = 0.0
+    elapsed = 0.0
+    while elapsed < spec['active_s']:
+        d = duration * rng.normal(1, 0.01)
+        for _ in range(max(1, round(d / interval))):
+            tstamp += interval
+            cycles = freq * 1e3 * interval * rng.normal(0.99, 0.005)
+            for e in spec['perf_events']:
+                per_cycle = EVENTS_PER_CYCLE.get(e, OTHER_PER_CYCLE)
+                if e != 'cycles':
+                    per_cycle *= factor * rng.normal(1, 0.01)
+                lines.append('%16.9f,%d,,%s,%d,100.00,,' % (tstamp,
+                    cycles * per_cycle, e, interval * 1e9))
+        lines += ['', ',' * 8 + '%.9f' % d]
+        elapsed += d
+
+    return '\n'.join(lines) + '\n'
+
+def write_text(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+def megadb_rows(spec, runid, task, freq, P, phases):
+    """
+    Returns the rows of the megadb of a single test, one table per phase
+    (active and cooldown) with the inputs of the thermal model and the measured
+    temperatures.
+    """
+    dt = spec['period_us'] / 1e6
+    zones = spec['zones']
+
+    tables = []
+    for runtype, power, temps in zip(['active', 'cooldown'], P, phases):
+        n = len(temps)
+        table = {
+            'runid':    np.full(n, runid),
+            'type':     np.full(n, runtype),
+            'time':     np.arange(n) * dt,
+            'task':     np.full(n, task),
+            'freq':     np.full(n, freq * 1000),
+        }
+        for i in range(zones):
+            table['temp_tz%d_0' % i] = np.full(n, temps[0, i])
+        for i in range(zones):
+            table['power_cpu%d' % i] = np.full(n, power[i])
+        for i in range(zones):
+            table['temp_tz%d' % i] = temps[:, i]
+        tables.append(pd.DataFrame(table))
+    return tables
+
+def test_directory(root, howmany, policy, freq, task, rep):
+    return os.path.join(root, 'howmany_%d' % howmany, 'policy_%s' % policy,
+        'freq_%d' % freq, 'task_%s' % task, str(rep))
+
+def generate_tree(root, spec):
+    """
+    Writes a whole results tree in the given root directory. Returns the
+    number of tests (repetition directories) and of files written.
+    """
+    A, B    = thermal_matrices(spec['zones'])
+    Te      = spec['ambient']
+    dt      = spec['period_us'] / 1e6
+    n_on    = max(1, round(spec['active_s'] / dt))
+    n_off   = max(1, round(spec['cooldown_s'] / dt))
+    P_idle  = np.full(spec['zones'], POWER_IDLE)
+    T_idle  = steady_temperature(A, B, P_idle, Te)
+
+    first_rep = 0 if spec['warmup'] else 1
+
+    os.makedirs(root, exist_ok=True)
+    write_text(os.path.join(root, CMAP_FILE), ''.join(
+        '%s=sensor_%s\n' % (s, s) for s in spec['power_sensors']))
+
+    tests   = 0
+    files   = 0
+    runid   = 0
+    megadb  = []
+
+    for howmany in spec['howmany']:
+        for policy in spec['policies']:
+            for freq in spec['freqs']:
+                for task in spec['tasks']:
+                    P_on = core_power(spec, freq, task, howmany)
+
+                    for rep in range(first_rep, spec['repetitions'] + 1):
+                        rng = np.random.default_rng([spec['seed'], tests])
+                        path = test_directory(root, howmany, policy, freq,
+                            task, rep)
+                        os.makedirs(path, exist_ok=True)
+
+                        # Each test starts from the idle steady state, as
+                        # reached after the sleep between tests
+                        T_on  = simulate(A, B, T_idle, P_on, Te, dt, n_on)
+                        T_end = tpfit.model_AB_Uconst(A, B, T_on[-1],
+                            np.append(P_on, Te), dt)
+                        T_off = simulate(A, B, T_end, P_idle, Te, dt, n_off)
+
+                        temps   = measure_temperature(spec,
+                            np.concatenate([T_on, T_off]), rng)
+                        powers  = np.concatenate([
+                            measure_power(spec, P_on, n_on, rng),
+                            measure_power(spec, P_idle, n_off, rng),
+                        ])
+
+                        write_text(os.path.join(path, 'measure_power.txt'),
+                            power_samples_text(spec, freq, temps, powers,
+                                n_on))
+                        write_text(os.path.join(path, 'measure_power.txt.err'),
+                            '')
+                        write_text(os.path.join(path, 'cooldown.txt'),
+                            'cooldown_s %g\n' % spec['cooldown_s'])
+                        files += 3
+
+                        for i in range(1, howmany + 1):
+                            write_text(
+                                os.path.join(path, 'measure_time.txt.%d' % i),
+                                perf_samples_text(spec, freq, task, rng))
+                            files += 1
+
+                        if spec['megadb'] and rep > 0:
+                            megadb += megadb_rows(spec, runid, task, freq,
+                                [P_on, P_idle], [temps[:n_on], temps[n_on:]])
+                            runid += 1
+
+                        tests += 1
+
+    if megadb:
+        maketools.df_safe_to_csv(pd.concat(megadb, ignore_index=True),
+            os.path.join(root, MEGADB_FILE))
+        files += 1
+
+    return tests, files
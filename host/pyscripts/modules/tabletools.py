@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
 import re
+import numpy as np
 import pandas as pd
 
 from . import si
+from . import timetools
 
 def pd_read_csv(
         *args,
@@ -32,8 +34,9 @@ def extract_update_period(df):
     the_col = ''
     error_on_find = False
 
-    # Find update period column with unit
-    for c in df.columns:
+    # Find update period column with unit (other columns may be in seconds as
+    # well, e.g. the sampler instrumentation)
+    for c in select_cols_startwith(df.columns, 'UPDATE_PERIOD'):
         prefix = si.extractprefix(c, si.units['second'])
         if len(prefix):
             if error_on_find:
@@ -65,6 +68,12 @@ def extract_breakpoint(df):
     the breakpoint as a fraction of a second.
     """
     the_col='breakpoint'
+
+    # No breakpoint yet (e.g. the run is still in its active phase)
+    if the_col not in df.columns or df[the_col].count() < 1:
+        df = df.drop(the_col, axis='columns', errors='ignore')
+        return df.reset_index(drop=True), np.nan
+
     df_breakpoint = df[ df[the_col] > 0 ]
     if (df[the_col].count() != 1):
         # TODO: raise an error and terminate
@@ -119,3 +128,83 @@ def select_table_cols_temp(cols):
 
 def select_table_cols_power(cols):
     return select_cols_startwith(cols, 'power_')
+
+# The length of the window used to smooth temperatures (see timetools.smooth)
+SMOOTH_WINDOW = 11
+
+def power_table_to_row(df):
+    """
+    Summarizes a power table (see power_samples_to_table.py) in a single row:
+    fixed frequencies, steady-state temperatures and their time constants in
+    both phases of the run and steady-state power in the active phase.
+
+    Temperatures of a phase shorter than SMOOTH_WINDOW samples (e.g. a cooldown
+    interrupted right after the breakpoint) are NaN, as well as time constants
+    if either phase is too short.
+    """
+    sampling_time   = df['sampling_time'].dropna()[0]
+    breakpoint      = df['breakpoint'].dropna()[0]
+
+    columns         = df.columns
+    cols_freq       = select_table_cols_freq(columns)
+    cols_temp       = select_table_cols_temp(columns)
+    cols_power      = select_table_cols_power(columns)
+
+    df_active       = df.loc[:int(breakpoint)]
+    df_cooldown     = df.loc[int(breakpoint):]
+
+    time_active     = df_active['time'].to_numpy()
+    time_cooldown   = df_cooldown['time'].to_numpy()
+
+    # Steps:
+    #  - a. check that cpu_freq for all cpus is fixed
+    #  - b. get steady state temperature in active phase
+    #  - c. get steady state temperature in cooldown phase
+    #  - d. get time constant temperature in active phase
+    #  - e. get steady state power in active phase
+
+    row = { 'sampling_time': sampling_time }
+
+    # a.
+    for c in cols_freq:
+        freq_mean  = c.replace('freq_cpu', 'freq_cpu')
+        freq_check = c.replace('freq_cpu', 'freq_cpu_check')
+        row[freq_mean]  = df[c].mean()
+        row[freq_check] = timetools.is_unique_value(df[c])
+
+    # b., c., d.
+    for c in cols_temp:
+        temp_high       = c.replace('temp_tz', 'temp_tz_high')
+        temp_low        = c.replace('temp_tz', 'temp_tz_low')
+        temp_tau_rise   = c.replace('temp_tz', 'temp_tz_tau_rise')
+        temp_tau_fall   = c.replace('temp_tz', 'temp_tz_tau_fall')
+
+        row[temp_high]      = np.nan
+        row[temp_low]       = np.nan
+        row[temp_tau_rise]  = np.nan
+        row[temp_tau_fall]  = np.nan
+
+        if len(time_active) >= SMOOTH_WINDOW:
+            time_series_active = timetools.smooth(df_active[c].to_numpy(),
+                SMOOTH_WINDOW)
+            row[temp_high] = timetools.steady_value(time_series_active)
+
+        if len(time_cooldown) >= SMOOTH_WINDOW:
+            time_series_cooldown = timetools.smooth(df_cooldown[c].to_numpy(),
+                SMOOTH_WINDOW)
+            row[temp_low] = timetools.steady_value(time_series_cooldown)
+
+        if np.isnan(row[temp_high]) or np.isnan(row[temp_low]):
+            continue
+
+        row[temp_tau_rise]  = timetools.time_constant(
+            time_active, time_series_active, row[temp_low], row[temp_high])
+
+        row[temp_tau_fall]  = timetools.time_constant(
+            time_cooldown, time_series_cooldown, row[temp_high], row[temp_low])
+
+    # e.
+    for c in cols_power:
+        row[c] = timetools.steady_value(df_active[c])
+
+    return row
@@ -3,6 +3,8 @@
 import lmfit
 import numpy as np
 import scipy
+import scipy.optimize
+import scipy.sparse
 import matplotlib.pyplot as plt
 
 from . import timetools
@@ -297,6 +299,12 @@ def tempmodel_ode(pars, t, inputs):
 
     return y
 
+# All the model engines that can be used to simulate the temperature evolution
+MODEL_ENGINES = {
+    'ode':      tempmodel_ode,
+    'direct':   tempmodel_direct,
+}
+
 def get_asymptote(data):
     return timetools.steady_value(data)
 
@@ -377,6 +385,43 @@ def db_get_inputs(db, cpunum):
     Te  = db_get_Te(db)
     return build_inputs(cpunum, P, T0, Te)
 
+def db_get_run_value(db, column):
+    if column not in db.columns:
+        return None
+    return db[column].to_numpy()[0]
+
+def db_extract_runs(db, cpunum):
+    """
+    Select once all the (active) runs in the given db, returning a list of
+    dictionaries with the runid, the time values, the inputs and the measured
+    data of each run.
+
+    Residual functions that iterate over this list avoid selecting again each
+    run from the db at each invocation.
+    """
+    runids   = db_get_runids(db)
+    runtypes = db_get_runtypes(db)
+
+    runs = []
+
+    for runid in runids:
+        for runtype in runtypes:
+            # FIXME: for now the cooldown does not work well!
+            if runtype == 'cooldown':
+                continue
+
+            selection = db_select_run(db, runid, runtype)
+            runs.append({
+                'runid':  runid,
+                'task':   db_get_run_value(selection, 'task'),
+                'freq':   db_get_run_value(selection, 'freq'),
+                't':      db_get_t(selection),
+                'inputs': db_get_inputs(selection, cpunum),
+                'data':   db_get_data(selection, cpunum),
+            })
+
+    return runs
+
 def residual_multirun(pars, sampledb, model, should_print=True, plot=False):
     runids   = db_get_runids(sampledb)
     runtypes = db_get_runtypes(sampledb)
@@ -407,6 +452,20 @@ def residual_multirun(pars, sampledb, model, should_print=True, plot=False):
     print_max_abs_error(out, should_print)
     return out
 
+def residual_runs(pars, runs, model, should_print=True):
+    """
+    Same as residual_multirun, but operating on a list of runs extracted using
+    db_extract_runs. The same run can appear multiple times in the list.
+    """
+    out = np.concatenate([
+        residual_single_run(pars, run['t'], run['inputs'], run['data'], model,
+            should_print=False)
+        for run in runs
+    ])
+
+    print_max_abs_error(out, should_print)
+    return out
+
 def residual_asymptote(pars, sampledb, model,
     should_print=True,
     ):
@@ -519,12 +578,24 @@ def fit_temp_multirun(sampledb, model,
     fit_asymptote=False,
     skip_fit = False,
     method = 'leastsq',
+    nuisance = None,
     ):
     pars = build_params(cpu_num=4)
 
     if skip_fit:
         return pars
 
+    # Per-run nuisance parameters require the block-sparse solver, which fits
+    # the measured temperatures only, with its own least-squares method
+    if nuisance:
+        if fit_asymptote or method != 'leastsq':
+            raise ValueError('Nuisance parameters can only be fitted with the '
+                'leastsq method and without fit_asymptote!')
+        return fit_temp_multirun_sparse(sampledb, model,
+            nuisance=nuisance,
+            pars=pars,
+        )
+
     residual_fun = residual_multirun
 
     if fit_asymptote:
@@ -554,6 +625,179 @@ def fit_temp_multirun(sampledb, model,
 
     return fitresult.params
 
+def fit_temp_runs(runs, model,
+    pars=None,
+    method='leastsq',
+    verbose=True,
+    max_nfev=None,
+    ):
+    """
+    Fits the thermal parameters over a list of runs extracted using
+    db_extract_runs, starting from the given parameters (if any) and stopping
+    after max_nfev evaluations of the residual (if given).
+    """
+    if pars is None:
+        pars = build_params(cpu_num=4)
+
+    minimizer = lmfit.Minimizer(
+        residual_runs, pars,
+        fcn_args=(runs, model),
+        fcn_kws={ 'should_print': verbose })
+
+    fitresult = minimizer.minimize(method=method, max_nfev=max_nfev)
+
+    if verbose:
+        print(lmfit.fit_report(fitresult))
+
+    return fitresult.params
+
+# Per-run nuisance parameters that can be fitted alongside the thermal
+# parameters shared by all runs:
+#  - dTe is an offset added to the ambient temperature Te of the run;
+#  - kP  is a scale factor applied to the measured power of each CPU in the run.
+NUISANCE_PARAMS = {
+    'dTe': { 'value': 0.0, 'min': -10.0, 'max': 10.0 },
+    'kP':  { 'value': 1.0, 'min':   0.5, 'max':  2.0 },
+}
+
+def nuisance_name(name, runid):
+    return '%s_%d' % (name, runid)
+
+def apply_nuisance(inputs, dTe=0.0, kP=1.0):
+    """
+    Returns a copy of the given inputs in which the nuisance parameters of a
+    run are applied to the measured power and ambient temperature.
+    """
+    cpu_num = inputs['P'].size
+    return build_inputs(cpu_num, inputs['P'] * kP, inputs['T0'],
+        inputs['Te'] + dTe)
+
+def pars2nuisance(pars, runid):
+    """
+    Returns the nuisance parameters fitted for the given run (if any) as a
+    dictionary that can be passed to apply_nuisance.
+    """
+    values = {}
+    for name in NUISANCE_PARAMS:
+        key = nuisance_name(name, runid)
+        if key in pars:
+            values[name] = pars[key].value
+    return values
+
+def nuisance_columns(runs, shared_num, nuisance_num):
+    """
+    Returns the distinct runids in the given runs and, for each run, the index
+    of its first nuisance parameter in the vector of all parameters (shared
+    ones first). Nuisance parameters belong to a runid, so all the blocks of
+    the same run (e.g. repeated ones) share the same columns.
+    """
+    runids  = list(dict.fromkeys(run['runid'] for run in runs))
+    index   = {runid: i for i, runid in enumerate(runids)}
+    cols    = [shared_num + index[run['runid']] * nuisance_num for run in runs]
+    return runids, cols
+
+def jacobian_sparsity_multirun(runs, shared_num, nuisance_num):
+    """
+    Returns the sparsity structure of the Jacobian of the joint residual: each
+    block of residuals of a run depends on all the shared parameters, but only
+    on the nuisance parameters of that run (see nuisance_columns).
+    """
+    sizes   = [run['data'].size for run in runs]
+    offsets = np.cumsum([0] + sizes)
+
+    runids, cols = nuisance_columns(runs, shared_num, nuisance_num)
+
+    sparsity = scipy.sparse.lil_matrix(
+        (offsets[-1], shared_num + nuisance_num * len(runids)), dtype=int)
+    sparsity[:, :shared_num] = 1
+
+    for r, col in enumerate(cols):
+        sparsity[offsets[r]:offsets[r+1], col:col + nuisance_num] = 1
+
+    return sparsity, offsets
+
+def fit_temp_multirun_sparse(sampledb, model,
+    nuisance=('dTe', 'kP'),
+    pars=None,
+    cpu_num=4,
+    ):
+    """
+    Fits the thermal parameters shared by all runs in the db together with the
+    requested per-run nuisance parameters (see NUISANCE_PARAMS).
+
+    The residual vector is made of one block per run, hence its Jacobian has a
+    dense block for the shared parameters and one small diagonal block per run.
+    The fit uses a trust-region solver that exploits this structure, so that
+    the cost of each Jacobian evaluation does not depend on the number of runs.
+
+    Returns the fitted parameters: the shared ones use the same names as
+    build_params, the nuisance ones are named after nuisance_name.
+    """
+    for name in nuisance:
+        if name not in NUISANCE_PARAMS:
+            raise ValueError('Unknown nuisance parameter ' + str(name) + '!')
+
+    if pars is None:
+        pars = build_params(cpu_num)
+
+    pars    = pars.copy()
+    runs    = db_extract_runs(sampledb, cpu_num)
+    shared  = [k for k, p in pars.items() if p.vary]
+
+    shared_num   = len(shared)
+    nuisance_num = len(nuisance)
+
+    runids, cols = nuisance_columns(runs, shared_num, nuisance_num)
+
+    x0 = [pars[k].value for k in shared]
+    lb = [pars[k].min   for k in shared]
+    ub = [pars[k].max   for k in shared]
+    for _ in runids:
+        x0 += [NUISANCE_PARAMS[n]['value'] for n in nuisance]
+        lb += [NUISANCE_PARAMS[n]['min']   for n in nuisance]
+        ub += [NUISANCE_PARAMS[n]['max']   for n in nuisance]
+
+    sparsity, offsets = jacobian_sparsity_multirun(runs, shared_num,
+        nuisance_num)
+
+    def residual(x):
+        for k, v in zip(shared, x[:shared_num]):
+            pars[k].value = v
+
+        out = np.empty(offsets[-1])
+        for r, (run, col) in enumerate(zip(runs, cols)):
+            values  = dict(zip(nuisance, x[col:col + nuisance_num]))
+            inputs  = apply_nuisance(run['inputs'], **values)
+            out[offsets[r]:offsets[r+1]] = residual_single_run(
+                pars, run['t'], inputs, run['data'], model,
+                should_print=False)
+
+        print_max_abs_error(out, True)
+        return out
+
+    result = scipy.optimize.least_squares(residual, np.array(x0),
+        jac_sparsity=sparsity,
+        bounds=(lb, ub),
+        method='trf',
+        tr_solver='lsmr',
+        x_scale='jac',
+    )
+
+    for k, v in zip(shared, result.x[:shared_num]):
+        pars[k].value = v
+
+    for i, runid in enumerate(runids):
+        col = shared_num + i * nuisance_num
+        for name, v in zip(nuisance, result.x[col:col + nuisance_num]):
+            spec = NUISANCE_PARAMS[name]
+            pars.add(nuisance_name(name, runid), value=v,
+                min=spec['min'], max=spec['max'], vary=False)
+
+    print(result.message)
+    print(lmfit.fit_report(pars))
+
+    return pars
+
 # # NOTE: x and y are numpy arrays
 # # NOTE: assumes x is already cut and y is already smoothened if necessary
 # def fit_temp_single_run(x, y, cpu_num, P, T0, model, Te=25.0):
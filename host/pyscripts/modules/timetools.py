@@ -197,3 +197,84 @@ def smooth(values, window_len=11, window='flat', samelen=True):
         y = y[(int(window_len/2)):-int(window_len/2)]
 
     return y
+
+
+def is_steady(values, tolerance, relative=False, window_len=11):
+    """
+    Returns True if the given time series (typically the last window of
+    samples of a signal) is in steady state, i.e. if its values, once
+    smoothed (see smooth), stay within the given tolerance.
+
+    If relative is True, the tolerance is a fraction of the mean value.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+
+    if values.size < max(window_len, 2):
+        return False
+
+    smoothed = smooth(values, window_len)
+    spread = np.max(smoothed) - np.min(smoothed)
+
+    if relative:
+        mean = abs(np.mean(smoothed))
+        if mean == 0:
+            return spread == 0
+        spread /= mean
+
+    return spread <= tolerance
+
+def jitter_histogram(lateness, bin_width, max_value=None):
+    """
+    Returns the histogram of the wakeup lateness of a periodic activity, as a
+    pair (counts, edges) with bins of the given width starting from zero.
+
+    Values above max_value (default: the maximum lateness) are counted in the
+    last bin.
+    """
+    lateness = np.asarray(lateness, dtype=float)
+    lateness = lateness[~np.isnan(lateness)]
+
+    if max_value is None:
+        max_value = lateness.max() if len(lateness) else 0
+
+    nbins = max(1, int(np.ceil(max_value / bin_width)))
+    edges = np.arange(nbins + 1) * bin_width
+    counts, _ = np.histogram(np.clip(lateness, 0, edges[-1]), bins=edges)
+    return counts, edges
+
+def missed_deadlines(lateness, busy, period):
+    """
+    Returns a boolean array telling which activations of a periodic activity
+    missed their deadline, i.e. did not complete before the beginning of the
+    next period.
+
+    The busy time of each activation is the one reported by the following
+    activation (as done by the sampler instrumentation), so the last
+    activation is never considered missed.
+    """
+    lateness = np.asarray(lateness, dtype=float)
+    busy = np.asarray(busy, dtype=float)
+
+    finish = np.full(len(lateness), np.nan)
+    finish[:-1] = lateness[:-1] + busy[1:]
+    return finish > period
+
+def cost_stats(values, period, quantile=0.99):
+    """
+    Returns the mean, the given quantile and the maximum of a series of costs
+    (e.g. read latencies), along with the mean share of the period they take.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+
+    if len(values) < 1:
+        return {'mean': np.nan, 'q': np.nan, 'max': np.nan, 'share': np.nan}
+
+    mean = np.mean(values)
+    return {
+        'mean':     mean,
+        'q':        np.quantile(values, quantile),
+        'max':      np.max(values),
+        'share':    mean / period,
+    }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+"""
+Split a list of perf events into the minimum number of groups that can be
+counted at the same time (i.e. without multiplexing) by the hardware counters
+of a board, one group per line in the format accepted by `perf stat -e`.
+
+Events whose ratio is meaningful (e.g. L1-dcache-load-misses and
+L1-dcache-loads, cache-misses and cache-references) are always put in the same
+group. Groups are built by placing pairs first and then filling the remaining
+counters with single events (first-fit decreasing), which is optimal when items
+take at most two counters. On boards that reserve one counter to cycles in any
+group, cycles are added to every group, which also allows to compare groups
+measured in different runs.
+"""
+
+import re
+import sys
+
+import numpy    as np
+
+from modules import cmdargs
+from modules import maketools
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    "options": [
+        {
+            'short': None,
+            'long': 'in_file',
+            'opts': {
+                'metavar': 'in-file',
+                'help': 'The events to count, separated by spaces, commas or '
+                    'newlines (lines starting with # are ignored)',
+                'type': str,
+            },
+        },
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The output file',
+                'type': str,
+                'default': 'a.out',
+            },
+        },
+        {
+            'short': '-n',
+            'long': '--counters',
+            'opts': {
+                'help': 'The number of hardware counters of the board',
+                'type': int,
+                'default': 6,
+            },
+        },
+        {
+            'short': '-C',
+            'long': '--cycles-always',
+            'opts': {
+                'help': 'One of the counters counts cycles in every group '
+                    '(e.g. the big cluster of the Odroid-XU4)',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': '-a',
+            'long': '--available',
+            'opts': {
+                'help': 'The events supported by the board, in the same format '
+                    'as the input (e.g. the output of pmc-load-events.sh); '
+                    'the others are dropped',
+                'type': str,
+                'default': None,
+            },
+        },
+    ]
+}
+
+CYCLES = 'cycles'
+
+# Aliases used by perf for the same event
+ALIASES = {
+    'cpu-cycles':           CYCLES,
+    'branch-instructions':  'branches',
+}
+
+# Events that must be counted together with another one, beside the generic
+# <name>-misses with <name>s (e.g. L1-dcache-load-misses with L1-dcache-loads)
+PARTNERS = {
+    'branch-misses':    'branches',
+    'cache-misses':     'cache-references',
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def read_events(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            if line.lstrip().startswith('#'):
+                continue
+            for e in re.split(r'[\s,]+', line.strip()):
+                if e:
+                    e = ALIASES.get(e, e)
+                    if e not in events:
+                        events.append(e)
+    return events
+
+def partner(event, events):
+    """
+    Returns the event that must be counted together with the given one, if it
+    is among the given events.
+    """
+    if event in PARTNERS:
+        other = PARTNERS[event]
+    elif event.endswith('-misses'):
+        other = event[:-len('-misses')] + 's'
+    else:
+        return None
+    return other if other in events else None
+
+def clusters(events):
+    """
+    Returns the events as a list of clusters (lists of one or two events that
+    must be in the same group), in input order.
+    """
+    result  = []
+    placed  = set()
+    for e in events:
+        if e in placed:
+            continue
+        cluster = [e]
+        other = partner(e, events)
+        if other and other not in placed:
+            cluster.append(other)
+        else:
+            # The event may be the reference of a later one
+            for o in events:
+                if o not in placed and o != e and partner(o, events) == e:
+                    cluster.append(o)
+                    break
+        placed.update(cluster)
+        result.append(cluster)
+    return result
+
+def make_groups(events, counters, cycles_always=False):
+    """
+    Returns the fewest groups of at most `counters` events (each a list) that
+    cover all the given events.
+    """
+    events = [e for e in events if not (cycles_always and e == CYCLES)]
+    capacity = counters - 1 if cycles_always else counters
+    if capacity < 2:
+        raise ValueError('at least two free counters are needed per group!')
+
+    groups = []
+    for cluster in sorted(clusters(events), key=len, reverse=True):
+        for g in groups:
+            if len(g) + len(cluster) <= capacity:
+                g += cluster
+                break
+        else:
+            groups.append(list(cluster))
+
+    if cycles_always:
+        groups = [[CYCLES] + g for g in groups] if groups else [[CYCLES]]
+    return groups
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    events = read_events(args.in_file)
+
+    if args.available:
+        available = read_events(args.available)
+        dropped = [e for e in events if e not in available]
+        if dropped:
+            print('Events not available on this board:', ' '.join(dropped),
+                file=sys.stderr)
+        events = [e for e in events if e in available]
+
+    groups = make_groups(events, args.counters, args.cycles_always)
+
+    def write(out_file):
+        with open(out_file, 'w') as f:
+            for g in groups:
+                f.write(','.join(g) + '\n')
+    maketools.safe_write(write, args.out_file)
+
+    if args.cycles_always:
+        events = [e for e in events if e != CYCLES]
+    capacity = args.counters - (1 if args.cycles_always else 0)
+    print(len(events), 'events in', len(groups), 'groups (at least',
+        int(np.ceil(len(events) / capacity)), 'needed)', file=sys.stderr)
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,18 @@ This file comes embedded with some regexes used to filter out lines before
 reading the original table. If you encounter problems, check that the
 troublesome lines are removed accordingly or provide approproiate regexes if
 needed.
+
+With --merge, multiple input files (typically all the runs of the same
+configuration, each counting a different group of events, see perf_groups.py)
+are merged into a single row with the average count of each event per task
+execution, so that events counted in different runs can be compared.
 """
 
 import io
 import re
+import sys
 
+from modules import batch
 from modules import cmdargs
 from modules import maketools
 
@@ -26,10 +33,43 @@ cmdargs_conf = {
     'options': [
         {
             'short': None,
-            'long': 'in_file',
+            'long': 'in_files',
+            'opts': {
+                'metavar': 'in-files',
+                'help': 'The perf files (one, unless merging; none in batch '
+                    'mode)',
+                'type': str,
+                'nargs': '*',
+            },
+        },
+        {
+            'short': '-b',
+            'long': '--batch',
+            'opts': {
+                'help': 'Convert all the files in the given work list (- for '
+                    'stdin) in a pool of worker processes; each line is '
+                    '"<in-file> <out-file>"',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'In batch mode, the number of parallel processes '
+                    '(default: all cpus)',
+                'type': int,
+                'default': None,
+            },
+        },
+        {
+            'short': '-m',
+            'long': '--merge',
             'opts': {
-                'metavar': 'in-file',
-                'type': cmdargs.argparse.FileType('r'),
+                'help': 'Merge all the input files into a single row, with '
+                    'the average count of each event per task execution',
+                'action': 'store_true',
             },
         },
         {
@@ -52,12 +92,12 @@ def getcolmap(df, colname, colval):
     return colmap
 #-- getcolmap
 
-def perf_file_to_csv(inf):
+def perf_file_read(inf):
     # Preprocess file to eliminate unwanted lines
     def read_processed_csv(inf, *args, **kwargs):
-        lines = ''.join(
-            [re.sub('^stress-ng:', '# ', line, flags=re.M)
-                for line in open(inf)])
+        with open(inf) as f:
+            lines = ''.join(
+                [re.sub('^stress-ng:', '# ', line, flags=re.M) for line in f])
         return pd.read_csv(io.StringIO(lines), *args, comment='#', **kwargs)
     #--
 
@@ -97,6 +137,12 @@ def perf_file_to_csv(inf):
     # 2.
     df = df.replace(to_replace="<not counted>", value=0)
 
+    return df
+#-- perf_file_read
+
+def perf_file_to_csv(inf):
+    df = perf_file_read(inf)
+
     # 3.
 
     # First, let's extract perf values
@@ -138,13 +184,66 @@ def perf_file_to_csv(inf):
     return outdf
 #-- perf_file_to_csv
 
+def perf_files_merge(in_files):
+    """
+    Returns a single-row table with the average count of each event per task
+    execution (over all the files that counted it) and the average duration of
+    each execution.
+    """
+    counts      = {}
+    executions  = {}
+    times       = []
+
+    for inf in in_files:
+        df = perf_file_read(inf)
+
+        file_times = df['time'].dropna().to_numpy(dtype=float)
+        times += list(file_times)
+
+        values = pd.to_numeric(df['cvalue'], errors='coerce')
+        for cname, total in values.groupby(df['cname']).sum().items():
+            counts[cname]       = counts.get(cname, 0) + total
+            executions[cname]   = executions.get(cname, 0) + len(file_times)
+
+    row = {
+        'time':     np.mean(times) if times else np.nan,
+        'runs':     len(in_files),
+    }
+    for cname in counts:
+        row[cname] = counts[cname] / executions[cname] \
+            if executions[cname] else np.nan
+
+    return pd.DataFrame([row])
+#-- perf_files_merge
+
+def convert(in_file, out_file):
+    """
+    Converts a single perf file (the job of batch mode).
+    """
+    df = perf_file_to_csv(in_file)
+    maketools.df_safe_to_csv(df, out_file)
+
 def main():
     args = cmdargs.parse_args(cmdargs_conf)
-    df = perf_file_to_csv(args.in_file)
+
+    if args.batch:
+        jobs = batch.read_work_list(args.batch)
+        return 1 if batch.run(convert, jobs, args.jobs) else 0
+
+    if not args.in_files:
+        sys.exit('An input file is required (or a work list, see --batch)!')
+
+    if args.merge:
+        df = perf_files_merge(args.in_files)
+    elif len(args.in_files) == 1:
+        df = perf_file_to_csv(args.in_files[0])
+    else:
+        sys.exit('Multiple input files can only be merged (use --merge)!')
+
     maketools.df_safe_to_csv(df, args.out_file)
     return 0
 #-- main
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the stages of the host pipeline on synthetic results trees of
+increasing size (see synth_tree.py) and compare them with a baseline.
+
+Stages:
+    parse       conversion of all power and time files to tables (in batch
+                mode, see power_samples_to_table.py and perf_samples_to_table.py)
+    collect     collection of all power tables (power_tables_collect.py)
+    megadb      loading of the thermal megadb and extraction of its runs
+    fit         fit of the thermal model on some of those runs, for a fixed
+                number of evaluations of the residual
+
+Each stage runs in a child process of its own, forked after its inputs are
+ready, for the given number of times: the shortest wall time and the largest
+peak resident memory used by the stage are reported. The memory is the peak of
+the child and its workers minus the resident memory of the child right after
+the fork, which it shares with the parent (the interpreter, the libraries
+already imported and the inputs of the stage).
+
+Results can be saved and compared with a baseline: stages whose time or memory
+grew more than the given tolerance are reported as regressions and the exit
+status is 1.
+"""
+
+import importlib
+import math
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import pandas   as pd
+
+from modules import catalog
+from modules import cmdargs
+from modules import maketools
+from modules import megadb
+from modules import schema
+from modules import synthdata
+from modules import tabletools
+from modules import tempmodelmulticore as tpfit
+
+STAGES = ['parse', 'collect', 'megadb', 'fit']
+
+# Memory increases are compared with the baseline as if they were at least this
+# large (in MiB), so that stages using almost no memory are not reported as
+# regressions for a few pages
+RSS_MIN_MB = 1.0
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    'options': [
+        {
+            'short': '-s',
+            'long': '--sizes',
+            'opts': {
+                'help': 'The sizes of the datasets, in number of tests '
+                    '(repetition directories, rounded up to whole tasks)',
+                'type': int,
+                'nargs': '+',
+                'default': [12, 48],
+            },
+        },
+        {
+            'short': '-S',
+            'long': '--stages',
+            'opts': {
+                'help': 'The stages to benchmark',
+                'type': str,
+                'nargs': '+',
+                'choices': STAGES,
+                'default': STAGES,
+            },
+        },
+        {
+            'short': '-r',
+            'long': '--repeat',
+            'opts': {
+                'help': 'The number of times each stage is run',
+                'type': int,
+                'default': 3,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'The number of parallel processes of the parse stage',
+                'type': int,
+                'default': 1,
+            },
+        },
+        {
+            'short': None,
+            'long': '--fit-runs',
+            'opts': {
+                'help': 'The number of runs used by the fit stage',
+                'type': int,
+                'default': 8,
+            },
+        },
+        {
+            'short': None,
+            'long': '--fit-evals',
+            'opts': {
+                'help': 'The number of evaluations of the residual in the fit '
+                    'stage',
+                'type': int,
+                'default': 50,
+            },
+        },
+        {
+            'short': '-m',
+            'long': '--model',
+            'opts': {
+                'help': 'The thermal model engine used by the fit stage',
+                'type': str,
+                'choices': list(tpfit.MODEL_ENGINES),
+                'default': 'ode',
+            },
+        },
+        {
+            'short': '-d',
+            'long': '--work-dir',
+            'opts': {
+                'help': 'The directory where datasets are generated and kept '
+                    '(default: a temporary directory, removed at the end)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The file where results are saved (default: none)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-B',
+            'long': '--baseline',
+            'opts': {
+                'help': 'The baseline to compare the results with',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-u',
+            'long': '--update-baseline',
+            'opts': {
+                'help': 'Save the results as the new baseline',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': '-t',
+            'long': '--tolerance',
+            'opts': {
+                'help': 'The relative increase of time or memory over the '
+                    'baseline reported as a regression',
+                'type': float,
+                'default': 0.25,
+            },
+        },
+    ],
+}
+
+#----------------------------------------------------------#
+#                       Measurement                        #
+#----------------------------------------------------------#
+
+def measure(fun, *args):
+    """
+    Runs fun(*args) in a forked child process with its output discarded.
+    Returns the wall time in seconds, the increase of the peak resident memory
+    over the one of the child right after the fork in MiB and the exit status
+    of the child (the value returned by fun, 1 if it raised).
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    rfd, wfd = os.pipe()
+
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # The peak so far is the memory inherited from the parent
+            os.close(rfd)
+            os.write(wfd, str(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss).encode())
+            os.close(wfd)
+
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            status = fun(*args) or 0
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stderr.flush()
+            os._exit(status)
+
+    os.close(wfd)
+    with os.fdopen(rfd) as f:
+        forked = int(f.read() or 0)
+
+    _, status, usage = os.wait4(pid, 0)
+    seconds = time.perf_counter() - start
+
+    # NOTE: ru_maxrss is in KiB on Linux
+    return (seconds, max(usage.ru_maxrss - forked, 0) / 1024,
+        os.waitstatus_to_exitcode(status))
+
+def run_script(name, argv):
+    """
+    Runs the main function of the given script with the given arguments.
+    """
+    module = importlib.import_module(name)
+    sys.argv = [name + '.py', *argv]
+    return module.main()
+
+#----------------------------------------------------------#
+#                          Stages                          #
+#----------------------------------------------------------#
+
+def write_work_list(path, pairs):
+    with open(path, 'w') as f:
+        for in_file, out_file in pairs:
+            f.write(in_file + ' ' + out_file + '\n')
+
+def prepare_parse(root, files, args):
+    work_power = os.path.join(root, 'bench_power.list')
+    work_perf = os.path.join(root, 'bench_perf.list')
+
+    write_work_list(work_power, [
+        (p, os.path.join(os.path.dirname(p), 'table_power.csv'))
+        for p in catalog.query(files, name='measure_power.txt')['path']
+    ])
+    write_work_list(work_perf, [
+        (p, os.path.join(os.path.dirname(p),
+            'table_perf.' + p.rsplit('.', 1)[-1] + '.csv'))
+        for p in catalog.query(files, name='measure_time.txt.*')['path']
+    ])
+
+    def stage():
+        # Each run starts without cached conversion plans
+        cache = os.path.join(root, schema.CACHE_FILE)
+        if os.path.exists(cache):
+            os.remove(cache)
+
+        jobs = ['-j', str(args.jobs)]
+        cmap_file = os.path.join(root, synthdata.CMAP_FILE)
+        return (
+            run_script('power_samples_to_table',
+                ['-c', cmap_file, *jobs, '--batch', work_power]) or
+            run_script('perf_samples_to_table', [*jobs, '--batch', work_perf])
+        )
+
+    return stage
+
+def prepare_collect(root, files, spec, args):
+    tables = [
+        os.path.join(os.path.dirname(p), 'table_power.csv')
+        for p in catalog.query(files, name='measure_power.txt')['path']
+    ]
+
+    islands = []
+    for p in spec['policies']:
+        islands += ['-i', 'island' + p, '-c', '0-%d' % (spec['cpus'] - 1),
+            '-p', p]
+
+    def stage():
+        return run_script('power_tables_collect',
+            ['-o', os.path.join(root, 'collapsed_table_power.csv'),
+                *tables, *islands])
+
+    return stage
+
+def load_megadb(path, zones):
+    return megadb.read(path).extract_runs(zones)
+
+def prepare_megadb(root, spec, args):
+    path = os.path.join(root, synthdata.MEGADB_FILE)
+    return lambda: load_megadb(path, spec['zones']) and 0
+
+def prepare_fit(root, spec, args):
+    runs = load_megadb(os.path.join(root, synthdata.MEGADB_FILE),
+        spec['zones'])
+    runs = runs[:args.fit_runs]
+    model = tpfit.MODEL_ENGINES[args.model]
+
+    def stage():
+        tpfit.fit_temp_runs(runs, model, verbose=False,
+            max_nfev=args.fit_evals)
+        return 0
+
+    return stage
+
+#----------------------------------------------------------#
+#                         Datasets                         #
+#----------------------------------------------------------#
+
+def dataset_spec(size):
+    """
+    Returns the description of a tree with at least the given number of
+    tests, adding tasks to the default configurations.
+    """
+    spec = synthdata.make_spec()
+    tests_per_task = (len(spec['howmany']) * len(spec['policies']) *
+        len(spec['freqs']) * spec['repetitions'])
+    tasks = math.ceil(size / tests_per_task)
+    spec['tasks'] = ['task%d' % i for i in range(tasks)]
+    spec['warmup'] = False
+    return spec
+
+def benchmark(root, size, args):
+    spec = dataset_spec(size)
+
+    print('bench: generating', size, 'tests in', root)
+    tests, _ = synthdata.generate_tree(root, spec)
+    files = catalog.load(root)
+
+    prepare = {
+        'parse':    lambda: prepare_parse(root, files, args),
+        'collect':  lambda: prepare_collect(root, files, spec, args),
+        'megadb':   lambda: prepare_megadb(root, spec, args),
+        'fit':      lambda: prepare_fit(root, spec, args),
+    }
+
+    rows = []
+    for name in STAGES:
+        if name not in args.stages:
+            continue
+
+        stage = prepare[name]()
+        seconds = []
+        rss = []
+        for _ in range(args.repeat):
+            s, m, status = measure(stage)
+            if status != 0:
+                sys.exit('Stage ' + name + ' failed on ' + root + '!')
+            seconds.append(s)
+            rss.append(m)
+
+        print('bench: %-8s %6d tests %10.3f s %10.1f MiB' % (name, tests,
+            min(seconds), max(rss)))
+        rows.append({
+            'stage':    name,
+            'size':     size,
+            'tests':    tests,
+            'seconds':  min(seconds),
+            'rss_mb':   max(rss),
+        })
+
+    return rows
+
+#----------------------------------------------------------#
+#                        Baselines                         #
+#----------------------------------------------------------#
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the results joined with the baseline, with the ratio of time and
+    memory of each stage and whether it regressed.
+    """
+    df = results.merge(baseline[['stage', 'size', 'seconds', 'rss_mb']],
+        on=['stage', 'size'], how='left', suffixes=('', '_base'))
+    df['seconds_ratio'] = df['seconds'] / df['seconds_base']
+    df['rss_ratio'] = (df['rss_mb'].clip(lower=RSS_MIN_MB) /
+        df['rss_mb_base'].clip(lower=RSS_MIN_MB))
+    df['regression'] = ((df['seconds_ratio'] > 1 + tolerance) |
+        (df['rss_ratio'] > 1 + tolerance))
+    return df
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='pipeline_bench_')
+
+    rows = []
+    try:
+        for size in args.sizes:
+            root = os.path.join(work_dir, 'size_%d' % size)
+            rows += benchmark(root, size, args)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = pd.DataFrame(rows)
+
+    if args.out_file:
+        maketools.df_safe_to_csv(results, args.out_file)
+
+    status = 0
+    if args.baseline and os.path.exists(args.baseline):
+        df = compare(results, tabletools.pd_read_csv(args.baseline),
+            args.tolerance)
+        print(df.to_string(index=False, float_format='%.3f'))
+
+        regressions = df[df['regression']]
+        for row in regressions.itertuples():
+            print('REGRESSION:', row.stage, 'with', row.size, 'tests',
+                file=sys.stderr)
+        status = 1 if len(regressions.index) else 0
+
+    if args.baseline and args.update_baseline:
+        maketools.df_safe_to_csv(results, args.baseline)
+
+    return status
+#-- main
+
+if __name__ == "__main__":
+    sys.exit(main())
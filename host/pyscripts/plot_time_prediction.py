@@ -8,11 +8,16 @@ This script accepts two input files and a bunch of configuration options:
  2. the CSV file containing the parameters to use to predict the evolution over
     time of a similar task.
 
+More than one original CSV file can be given: each one is plotted by a pool of
+worker processes (see modules/plotting.py) in a file of its own, named after
+the output file basename and the configuration of the table.
+
 Among the assumptions that this script makes:
  1. the first CSV file is produced using power_samples_to_table.py
  2. the second CSV file is produced using power_tables_collect.py
 """
 
+import os
 import sys
 
 import matplotlib.pyplot as plt
@@ -26,6 +31,7 @@ from modules import cmdargs
 # from modules import cpuislands
 from modules import maketools
 from modules import plotting
+from modules import resultstree
 from modules import tabletools
 from modules import timetools
 from modules import tempmodelmulticore as tpfit
@@ -39,10 +45,11 @@ cmdargs_conf = {
     "options": [
         {
             'short': None,
-            'long': 'table_file',
+            'long': 'table_files',
             'opts': {
                 'metavar': 'table-file',
-                'type': cmdargs.argparse.FileType('r'),
+                'type': str,
+                'nargs': '+',
             },
         },
         {
@@ -117,6 +124,16 @@ cmdargs_conf = {
                 'action': 'store_false',
             },
         },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'The number of parallel processes used to plot many '
+                    'tables (default: all cpus)',
+                'type': int,
+                'default': None,
+            },
+        },
         {
             'short': '-y2',
             'long': '--y2columns',
@@ -232,15 +249,17 @@ def plot_from_params(axis, x, params, sampling_time):
     pass
 
 
-def main():
-    args = cmdargs.parse_args(cmdargs_conf)
-    args = args_fix_default(args)
+def plot_table(out_file, table_file, params, options):
+    """
+    Plots the time series in the given table against the prediction obtained
+    from the given params and saves the figure in out_file (once per extension
+    in options.out_exts).
+    """
+    with open(table_file) as f:
+        metadata = maketools.extract_metadata(f,
+            {'4': 'big'}, {'big': [4,5,6,7]})
 
-    metadata = maketools.extract_metadata(args.table_file,
-        {'4': 'big'}, {'big': [4,5,6,7]})
-
-    table = tabletools.pd_read_csv(args.table_file)
-    params = tabletools.pd_read_csv(args.params_file)
+    table = tabletools.pd_read_csv(table_file)
     params_idle = params
     params = params_select(params, metadata)
     metadata_idle = dict(metadata)
@@ -261,13 +280,13 @@ def main():
     fig.set_figwidth(12)
 
     x = table['time'].to_numpy()
-    # plot_cols(ax1, x, table, args.y1columns,
+    # plot_cols(ax1, x, table, options.y1columns,
     #     color='red', **plotting.DEFAULT_PLOT_OPTIONS)
 
     ax1.grid()
     # ax1.axvline(breakpoint * sampling_time)
-    ax1.set_xlabel(args.xlabel)
-    ax1.set_ylabel(args.y1label)
+    ax1.set_xlabel(options.xlabel)
+    ax1.set_ylabel(options.y1label)
     ax1.legend(loc='upper left',
         bbox_to_anchor=(0, 1.1),
         ncol=3,
@@ -275,12 +294,12 @@ def main():
         # shadow=True,
     )
 
-    if len(args.y2columns):
+    if len(options.y2columns):
         ax2 = ax1.twinx()
 
         offset_begin    = 32
         offset_end      = 5
-        y = table[args.y2columns].to_numpy().T
+        y = table[options.y2columns].to_numpy().T
 
         cpu_num = y.shape[0]
 
@@ -313,8 +332,9 @@ def main():
         print(P)
         print('CHECK ZERO:', np.sum(P) - params['power_cpu'].to_numpy()[0])
 
-        result, inputs = tpfit.fit_temp_single_run(x, y, cpu_num, P, T0,
-            tpfit.tempmodel_direct,
+        inputs = tpfit.build_inputs(cpu_num, P, T0, tpfit.Te)
+        result = tpfit.fit_temp_single_run(x, y, inputs,
+            tpfit.tempmodel_direct, tpfit.build_params(cpu_num),
         )
         y2 = tpfit.tempmodel_direct(result.params, x, inputs)
 
@@ -323,13 +343,13 @@ def main():
         # # y2 = tpfit.tempmodel_direct(pars, x, inputs)
 
         for i in range(cpu_num):
-            ax2.plot(x, y[i, :], label='Y_%d' % i)
-            ax2.plot(x, y2[i, :], label='FIT_%d' % i)
+            ax2.plot(*plotting.decimate(x, y[i, :]), label='Y_%d' % i)
+            ax2.plot(*plotting.decimate(x, y2[i, :]), label='FIT_%d' % i)
 
-        # # plot_cols(ax2, x, table, args.y2columns,
+        # # plot_cols(ax2, x, table, options.y2columns,
         # #     **plotting.DEFAULT_PLOT_OPTIONS)
 
-        ax2.set_ylabel(args.y2label)
+        ax2.set_ylabel(options.y2label)
         ax2.legend(loc='upper right',
             bbox_to_anchor=(1, 1.1),
             ncol=3,
@@ -339,19 +359,59 @@ def main():
 
     # plot_from_params(ax2, x, params, sampling_time)
 
-    if args.plot_window:
+    if options.plot_window:
         plt.show()
 
+    for ext in options.out_exts:
+        fig.savefig(out_file + ext)
+    plt.close(fig)
+
+def out_file_of(table_file, args):
+    """
+    Returns the output file basename of the given table: the one given on the
+    command line if there is only one table, followed by the configuration of
+    the table otherwise.
+    """
+    if len(args.table_files) == 1:
+        return args.out_file
+
+    metadata = resultstree.parse_path(os.path.realpath(table_file))
+    if metadata is None:
+        sys.exit("File " + table_file + " is not part of a results tree!")
+    return plotting.out_path(args.out_file, metadata.values(), '')
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+    args = args_fix_default(args)
+
+    params = tabletools.pd_read_csv(args.params_file)
+
     if len(args.out_exts) == 0:
         args.out_exts=['.png']
-    for ext in args.out_exts:
-        fig.savefig(args.out_file + ext)
 
-    return 0
+    # Only the options used by plot_table, since open files cannot be sent to
+    # the workers
+    options = cmdargs.argparse.Namespace(**{
+        k: v for k, v in vars(args).items()
+        if k not in ['table_files', 'params_file']
+    })
+
+    jobs = [
+        (out_file_of(table_file, args), table_file, params, options)
+        for table_file in args.table_files
+    ]
+
+    if args.plot_window:
+        for job in jobs:
+            plot_table(*job)
+        return 0
+
+    failures = plotting.render(plot_table, jobs, args.jobs)
+    return 1 if failures else 0
 #-- main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
         # xx = x
@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
-import re
+import functools
+import os
+import sys
+import time
 
-import numpy    as np
 import pandas   as pd
 
+from modules import batch
 from modules import cmap
 from modules import cmdargs
 from modules import maketools
+from modules import powerfile
+from modules import schema
 from modules import tabletools
 
 # +--------------------------------------------------------+
@@ -21,7 +26,32 @@ cmdargs_conf = {
             'long': 'in_file',
             'opts': {
                 'metavar': 'in-file',
-                'type': cmdargs.argparse.FileType('r'),
+                'help': 'The power file, either in text or binary format '
+                    '(- for stdin); not used in batch mode',
+                'type': str,
+                'nargs': '?',
+                'default': None,
+            },
+        },
+        {
+            'short': '-b',
+            'long': '--batch',
+            'opts': {
+                'help': 'Convert all the files in the given work list (- for '
+                    'stdin) in a pool of worker processes; each line is '
+                    '"<in-file> <out-file> [<summary-file>]"',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'In batch mode, the number of parallel processes '
+                    '(default: all cpus)',
+                'type': int,
+                'default': None,
             },
         },
         {
@@ -43,150 +73,219 @@ cmdargs_conf = {
                 'default': 'a.out',
             },
         },
+        {
+            'short': '-s',
+            'long': '--summary-file',
+            'opts': {
+                'help': 'The file in which the summary of the run (one row, as '
+                    'in power_tables_collect.py) is saved (default: not saved)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-S',
+            'long': '--schema-cache',
+            'opts': {
+                'help': 'The file in which the conversion plans of the headers '
+                    'are cached (default: ' + schema.CACHE_FILE + ' in the '
+                    'root of the results tree, if the input file is in one)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-f',
+            'long': '--follow',
+            'opts': {
+                'help': 'Follow the power file while the sampler is still '
+                    'writing it (or read it from a pipe), updating the '
+                    'output files as new samples arrive',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': None,
+            'long': '--update-interval',
+            'opts': {
+                'help': 'In follow mode, the minimum interval between two '
+                    'updates of the output files, in seconds',
+                'type': float,
+                'default': 5.0,
+            },
+        },
+        {
+            'short': None,
+            'long': '--poll-interval',
+            'opts': {
+                'help': 'In follow mode, the interval between two checks for '
+                    'new data in the power file, in seconds',
+                'type': float,
+                'default': 0.5,
+            },
+        },
+        {
+            'short': None,
+            'long': '--pid',
+            'opts': {
+                'help': 'In follow mode, the PID of the sampler writing the '
+                    'power file: the run is over as soon as it exits',
+                'type': int,
+                'default': None,
+            },
+        },
+        {
+            'short': None,
+            'long': '--cooldown',
+            'opts': {
+                'help': 'In follow mode, the run is over once the samples '
+                    'after the breakpoint span this many seconds',
+                'type': float,
+                'default': None,
+            },
+        },
+        {
+            'short': None,
+            'long': '--idle-timeout',
+            'opts': {
+                'help': 'In follow mode, the run is considered over when the '
+                    'power file does not grow for this many seconds (pipes '
+                    'end when closed); only a fallback when the end of the '
+                    'run is not detected by --pid or --cooldown',
+                'type': float,
+                'default': 30.0,
+            },
+        },
     ]
 }
 
-# +--------------------------------------------------------+
-# |             Units Management in line names             |
-# +--------------------------------------------------------+
-
-# TODO: use the new si.py module
-def cartesian_prod(x, y):
-    return np.transpose([np.tile(x, len(y)), np.repeat(y, len(x))])
-
-base_units = ['W', 'A', 'V', 'C', 's']
-unit_modifiers = ['', 'm', 'u']
-
-# Examples: W, mW, uW
-known_units = [
-    ''.join(map(str, x)) for x in cartesian_prod(unit_modifiers, base_units)
-]
-
-known_units_underscore = tuple(["_" + x for x in known_units])
-
-
-# +--------------------------------------------------------+
-# |                          Body                          |
-# +--------------------------------------------------------+
-
-# Ignored columns
-# TODO: check again this list
-ignore_list = ['FOREVER:', 'gzip:', 'Command', 'Run']
-
-def powerfile_to_table(inf, column_map):
-    df = pd.DataFrame()
-    kvalues = {}
-
-    for line in inf:
-        if len(line.strip()) < 1:
-            # Append to dataframe
-            if kvalues:
-                df = df.append(kvalues, ignore_index=True)
-            kvalues = {}
-        else:
-            # Parse line and add it to the dictionary
-            split = line.split()
-            k = split[0].strip()
-            vv = split[1:]
-
-            if (k.startswith('----------')):
-                k = 'breakpoint'
-                vv = '1'
-
-            # Some columns are already in the _ format, but I don't like it,
-            # I prefer to do it manually in python so that I can change the
-            # mapping
-            # TODO:
-
-            if k.endswith(known_units_underscore):
-                ssplit = k.split('_')
-                k = '_'.join(ssplit[0:-1])
-                vv = [ssplit[-1]] + vv
-
-            # Remap columns based on the configured mapping
-            if k in column_map:
-                k = column_map[k]
-
-            # Units will be embedded in column names
-            if len(vv) > 1 and vv[0].strip() in known_units:
-                k += '_' + vv[0].strip()
-                vv = vv[1:]
-
-            needs_suffix = len(vv) > 1
-
-            if k in ignore_list:
-                continue
-
-            # Keys with multiple values will be split
-            # into multiple columns in the resulting CSV
-            for idx, v in enumerate(vv):
-                key = k + '_' + str(idx) if needs_suffix else k
-
-                if ('time' in key and float(v.strip()) < 0.05):
-                    continue
-
-                kvalues[key] = v.strip()
-
-    # Append to dataframe
-    if kvalues:
-        df = df.append(kvalues, ignore_index=True)
-    kvalues = {}
-
-    return df
-#-- powerfile_to_table
+# Minimum number of samples in each phase of the run needed to summarize it
+# (the size of the window used by timetools.smooth)
+SUMMARY_MIN_SAMPLES = 11
 
 #----------------------------------------------------------#
 #                           Main                           #
 #----------------------------------------------------------#
 
 
-def table_convert_form(df):
+def table_convert_form(df, plans):
     df, update_period = tabletools.extract_update_period(df)
     df, breakpoint    = tabletools.extract_breakpoint(df)
 
-    columns = df.columns
-    cols_in_freq,  magnitude_freq  = tabletools.select_sample_cols_freq(columns)
-    cols_in_temp,  magnitude_temp  = tabletools.select_sample_cols_temp(columns)
-    cols_in_power, magnitude_power = tabletools.select_sample_cols_power(columns)
-
-    df = tabletools.apply_magnitudes(df, cols_in_freq, magnitude_freq)
-    df = tabletools.apply_magnitudes(df, cols_in_temp, magnitude_temp)
-    df = tabletools.apply_magnitudes(df, cols_in_power, magnitude_power)
-
-    numrows = len(df.index)
-
-    outdf = pd.DataFrame()
-    outdf['time'] = np.arange(numrows) * update_period
-
-    empty = np.full(numrows, np.nan)
-    up = empty.copy()
-    up[0] = update_period
-    bp = empty.copy()
-    bp[0] = breakpoint
-
-    outdf['sampling_time']  = up
-    outdf['breakpoint']     = bp
-
-    cols_out_freq = [
-        c.replace('cpu_freq', 'freq_cpu')
-        for c in cols_in_freq
-    ]
-
-    cols_out_temp = [
-        c.replace('thermal_zone_temp', 'temp_tz')
-        for c in cols_in_temp
-    ]
-
-    cols_out_power = [
-        re.sub(r'sensor_([a-z]+)_.*', r'power_\1', c, flags=re.I)
-        for c in cols_in_power
-    ]
-
-    outdf[cols_out_freq]    = df[cols_in_freq]
-    outdf[cols_out_temp]    = df[cols_in_temp]
-    outdf[cols_out_power]   = df[cols_in_power]
-
-    return outdf
+    plan = plans.get(list(df.columns))
+    return schema.apply_plan(plan, df, update_period, breakpoint)
+
+
+def table_summary(outdf):
+    """
+    Returns the summary of the run as a single-row table, or None if the run
+    did not reach its cooldown phase yet.
+    """
+    breakpoint = outdf['breakpoint'].dropna()
+    if breakpoint.empty:
+        return None
+
+    breakpoint = int(breakpoint.iloc[0])
+    if breakpoint < SUMMARY_MIN_SAMPLES or \
+        len(outdf.index) - breakpoint < SUMMARY_MIN_SAMPLES:
+        return None
+
+    return pd.DataFrame([tabletools.power_table_to_row(outdf)])
+
+
+def write_outputs(df, out_file, summary_file, plans):
+    outdf = table_convert_form(df, plans)
+    maketools.df_safe_to_csv(outdf, out_file)
+
+    if summary_file:
+        summary = table_summary(outdf)
+        if summary is not None:
+            maketools.df_safe_to_csv(summary, summary_file)
+
+
+def plan_cache(in_file, schema_cache):
+    if schema_cache is None and in_file != '-':
+        schema_cache = schema.cache_path(in_file)
+    return schema.PlanCache(schema_cache)
+
+
+def convert(in_file, out_file, summary_file=None, column_map={},
+    schema_cache=None):
+    """
+    Converts a whole power file (the job of batch mode).
+    """
+    plans = plan_cache(in_file, schema_cache)
+    df = powerfile.read_powerfile(in_file, column_map)
+    write_outputs(df, out_file, summary_file, plans)
+    plans.save()
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def cooldown_over(follower, cooldown):
+    """
+    Returns True if the samples after the breakpoint span the given duration
+    (within half a sampling period).
+    """
+    elapsed = follower.cooldown_elapsed()
+    if cooldown is None or elapsed is None:
+        return False
+    return elapsed >= cooldown - follower.period / 2
+
+
+def follow(args, column_map, plans):
+    """
+    Parses the power file incrementally, updating the output files at most
+    once every update interval, until the run is over.
+    """
+    follower    = powerfile.PowerFileFollower(args.in_file, column_map)
+    last_data   = time.monotonic()
+    last_write  = None
+    updated     = False
+
+    try:
+        while not follower.finished:
+            now = time.monotonic()
+
+            if follower.poll() > 0:
+                last_data   = now
+                updated     = True
+            elif not follower.is_pipe and now - last_data > args.idle_timeout:
+                break
+
+            if args.pid is not None and not is_running(args.pid):
+                # Anything written before the sampler exited is parsed too
+                follower.finish()
+                break
+
+            if cooldown_over(follower, args.cooldown):
+                break
+
+            if updated and (last_write is None or
+                    now - last_write >= args.update_interval):
+                write_outputs(follower.get_table(), args.out_file,
+                    args.summary_file, plans)
+                last_write  = now
+                updated     = False
+
+            if not follower.is_pipe:
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+    follower.close()
+
+    df = follower.get_table()
+    if len(df.index) > 0:
+        write_outputs(df, args.out_file, args.summary_file, plans)
 
 
 def main():
@@ -196,16 +295,25 @@ def main():
     if args.col_map:
         column_map = cmap.loadmap(args.col_map.readlines())
 
-    df = powerfile_to_table(args.in_file, column_map)
+    if args.batch:
+        jobs = batch.read_work_list(args.batch)
+        fun = functools.partial(convert, column_map=column_map,
+            schema_cache=args.schema_cache)
+        return 1 if batch.run(fun, jobs, args.jobs) else 0
+
+    if args.in_file is None:
+        sys.exit('An input file is required (or a work list, see --batch)!')
 
-    for c in df.columns:
-        outc = pd.to_numeric(df[c])
-        df[c] = outc
+    if args.follow:
+        plans = plan_cache(args.in_file, args.schema_cache)
+        follow(args, column_map, plans)
+        plans.save()
+    else:
+        convert(args.in_file, args.out_file, args.summary_file, column_map,
+            args.schema_cache)
 
-    outdf = table_convert_form(df)
-    maketools.df_safe_to_csv(outdf, args.out_file)
     return 0
 #-- main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
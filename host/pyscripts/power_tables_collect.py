@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
+import os
+
+import numpy as np
 import pandas as pd
 
 from modules import cmdargs
 from modules import cpuislands
 from modules import maketools
 from modules import tabletools
-from modules import timetools
 
 # +--------------------------------------------------------+
 # |          Command-line Arguments Configuration          |
@@ -72,61 +74,27 @@ cmdargs_conf = {
 #----------------------------------------------------------#
 
 
-def power_table_to_row(df):
-    sampling_time   = df['sampling_time'].dropna()[0]
-    breakpoint      = df['breakpoint'].dropna()[0]
-
-    columns         = df.columns
-    cols_freq       = tabletools.select_table_cols_freq(columns)
-    cols_temp       = tabletools.select_table_cols_temp(columns)
-    cols_power      = tabletools.select_table_cols_power(columns)
-
-    df_active       = df.loc[:int(breakpoint)]
-    df_cooldown     = df.loc[int(breakpoint):]
-
-    time_active     = df_active['time'].to_numpy()
-    time_cooldown   = df_cooldown['time'].to_numpy()
-
-    # Steps:
-    #  - a. check that cpu_freq for all cpus is fixed
-    #  - b. get steady state temperature in active phase
-    #  - c. get steady state temperature in cooldown phase
-    #  - d. get time constant temperature in active phase
-    #  - e. get steady state power in active phase
-
-    row = { 'sampling_time': sampling_time }
-
-    # a.
-    for c in cols_freq:
-        freq_mean  = c.replace('freq_cpu', 'freq_cpu')
-        freq_check = c.replace('freq_cpu', 'freq_cpu_check')
-        row[freq_mean]  = df[c].mean()
-        row[freq_check] = timetools.is_unique_value(df[c])
-
-    # b., c., d.
-    for c in cols_temp:
-        temp_high       = c.replace('temp_tz', 'temp_tz_high')
-        temp_low        = c.replace('temp_tz', 'temp_tz_low')
-        temp_tau_rise   = c.replace('temp_tz', 'temp_tz_tau_rise')
-        temp_tau_fall   = c.replace('temp_tz', 'temp_tz_tau_fall')
-
-        time_series_active   = timetools.smooth(df_active[c].to_numpy())
-        time_series_cooldown = timetools.smooth(df_cooldown[c].to_numpy())
-
-        row[temp_high]      = timetools.steady_value(time_series_active)
-        row[temp_low]       = timetools.steady_value(time_series_cooldown)
-
-        row[temp_tau_rise]  = timetools.time_constant(
-            time_active, time_series_active, row[temp_low], row[temp_high])
+# Written by run.sh next to the samples of each test
+COOLDOWN_FILE = 'cooldown.txt'
 
-        row[temp_tau_fall]  = timetools.time_constant(
-            time_cooldown, time_series_cooldown, row[temp_high], row[temp_low])
+def read_cooldown(in_file):
+    """
+    Returns the duration in seconds of the cooldown that followed the test, as
+    recorded by run.sh, or NaN if it was not recorded.
+    """
+    path = os.path.join(os.path.dirname(os.path.realpath(in_file.name)),
+        COOLDOWN_FILE)
 
-    # e.
-    for c in cols_power:
-        row[c] = timetools.steady_value(df_active[c])
+    try:
+        with open(path) as f:
+            for line in f:
+                split = line.split()
+                if len(split) == 2 and split[0] == 'cooldown_s':
+                    return float(split[1])
+    except (OSError, ValueError):
+        pass
 
-    return row
+    return np.nan
 
 
 def main():
@@ -143,8 +111,8 @@ def main():
         metadata = maketools.extract_metadata(in_file, policy_island_map, island_cpus_map)
         print(metadata)
 
-        row = power_table_to_row(df)
-        row = {**metadata, **row}
+        row = tabletools.power_table_to_row(df)
+        row = {**metadata, **row, 'cooldown': read_cooldown(in_file)}
 
         for c in row:
             if c in rows:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Decide whether a configuration shall be repeated again, after each of its runs.
+
+The run in the given test directory is summarized (task time and steady-state
+power), added to the estimates kept in the state file of the configuration and
+"stop" or "continue" is printed, depending on whether the confidence intervals
+of all metrics are already narrow enough (see modules/repcontrol.py).
+"""
+
+from modules import cmdargs
+from modules import repcontrol
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    'options': [
+        {
+            'short': None,
+            'long': 'test_dir',
+            'opts': {
+                'metavar': 'test-dir',
+                'help': 'The directory of the run that just ended',
+                'type': str,
+            },
+        },
+        {
+            'short': '-s',
+            'long': '--state-file',
+            'opts': {
+                'help': 'The file holding the estimates of the configuration',
+                'type': str,
+                'required': True,
+            },
+        },
+        {
+            'short': '-n',
+            'long': '--runs',
+            'opts': {
+                'help': 'The number of runs completed so far (default: the '
+                    'number of runs in the state file)',
+                'type': int,
+                'default': None,
+            },
+        },
+        {
+            'short': '-c',
+            'long': '--confidence',
+            'opts': {
+                'help': 'The confidence level of the intervals',
+                'type': float,
+                'default': 0.95,
+            },
+        },
+        {
+            'short': '-t',
+            'long': '--target',
+            'opts': {
+                'help': 'The target half-width of the intervals, as a fraction '
+                    'of the mean',
+                'type': float,
+                'default': 0.02,
+            },
+        },
+        {
+            'short': '-m',
+            'long': '--min-runs',
+            'opts': {
+                'help': 'The minimum number of runs',
+                'type': int,
+                'default': 3,
+            },
+        },
+        {
+            'short': '-M',
+            'long': '--max-runs',
+            'opts': {
+                'help': 'The maximum number of runs',
+                'type': int,
+                'default': 20,
+            },
+        },
+    ],
+}
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    state = repcontrol.state_load(args.state_file)
+    state = repcontrol.state_update(state,
+        repcontrol.summarize_run(args.test_dir))
+    repcontrol.state_save(state, args.state_file)
+
+    runs = args.runs
+    if runs is None:
+        runs = max([s.n for s in state.values()], default=0)
+
+    enough = repcontrol.enough_repetitions(state, runs,
+        confidence=args.confidence,
+        target=args.target,
+        min_runs=args.min_runs,
+        max_runs=args.max_runs,
+    )
+
+    print('stop' if enough else 'continue')
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
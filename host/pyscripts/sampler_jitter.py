@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+"""
+Analyze the self-instrumentation of the power sampler (sampler -i) in a batch
+of power files.
+
+For each run it reports the wakeup lateness of the sampling loop, the number
+of missed deadlines (samples whose processing did not end before the next
+period) and the read latency of each sensor, both in absolute terms and as a
+share of the sampling period. The histograms of the wakeup lateness of all
+runs can be saved in a separate table.
+"""
+
+import concurrent.futures
+
+import numpy    as np
+import pandas   as pd
+
+from modules import cmdargs
+from modules import maketools
+from modules import powerfile
+from modules import tabletools
+from modules import timetools
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    "options": [
+        {
+            'short': None,
+            'long': 'in_files',
+            'opts': {
+                'metavar': 'in-files',
+                'help': 'The power files, either in text or binary format',
+                'type': str,
+                'nargs': '+',
+            },
+        },
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The output file',
+                'type': str,
+                'default': 'a.out',
+            },
+        },
+        {
+            'short': '-H',
+            'long': '--histogram-file',
+            'opts': {
+                'help': 'The file in which the histograms of the wakeup '
+                    'lateness are saved (default: not saved)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-w',
+            'long': '--bin-width',
+            'opts': {
+                'help': 'The width of each bin of the histograms, in '
+                    'microseconds',
+                'type': float,
+                'default': 10.0,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'The number of parallel processes (default: all cpus)',
+                'type': int,
+                'default': None,
+            },
+        },
+    ]
+}
+
+# Instrumentation columns, as parsed by powerfile (all in microseconds)
+COL_LATE = 'sampler_wakeup_late_us'
+COL_BUSY = 'sampler_busy_us'
+SUFFIX_READ = '_read_us'
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def analyze_run(path, bin_width):
+    """
+    Returns the summary row and the lateness histogram of a single run.
+    """
+    df = powerfile.read_powerfile(path, {})
+    df, update_period = tabletools.extract_update_period(df)
+
+    if COL_LATE not in df.columns:
+        raise ValueError(path + ' has no instrumentation data (sampler -i)!')
+
+    # Skip breakpoint rows
+    df = df[df[COL_LATE].notna()]
+
+    period_us = update_period * 10**6
+    late = df[COL_LATE].to_numpy()
+    busy = df[COL_BUSY].to_numpy()
+    missed = timetools.missed_deadlines(late, busy, period_us)
+
+    row = {
+        'file':                 path,
+        'period_us':            period_us,
+        'samples':              len(df.index),
+        'missed_deadlines':     np.count_nonzero(missed),
+        'missed_fraction':      np.count_nonzero(missed) / max(1, len(missed)),
+    }
+
+    for prefix, values in [('late', late), ('busy', busy[1:])]:
+        stats = timetools.cost_stats(values, period_us)
+        row[prefix + '_mean_us']    = stats['mean']
+        row[prefix + '_p99_us']     = stats['q']
+        row[prefix + '_max_us']     = stats['max']
+
+    for c in tabletools.select_cols_endswith(df.columns, SUFFIX_READ):
+        sensor = c[:-len(SUFFIX_READ)]
+        stats = timetools.cost_stats(df[c], period_us)
+        row[sensor + '_read_mean_us']   = stats['mean']
+        row[sensor + '_read_p99_us']    = stats['q']
+        row[sensor + '_read_max_us']    = stats['max']
+        row[sensor + '_read_share']     = stats['share']
+
+    counts, edges = timetools.jitter_histogram(late, bin_width)
+    histogram = pd.DataFrame({
+        'file':         path,
+        'bin_start_us': edges[:-1],
+        'bin_end_us':   edges[1:],
+        'count':        counts,
+    })
+
+    return row, histogram
+#-- analyze_run
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.jobs) as executor:
+        results = list(executor.map(analyze_run, args.in_files,
+            [args.bin_width] * len(args.in_files)))
+
+    outdf = pd.DataFrame([row for row, _ in results])
+    maketools.df_safe_to_csv(outdf, args.out_file)
+
+    if args.histogram_file:
+        histdf = pd.concat([h for _, h in results], ignore_index=True)
+        maketools.df_safe_to_csv(histdf, args.histogram_file)
+
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+"""
+Follow the output of the power sampler while a test is running and return as
+soon as all temperatures and power values are in steady state, so that the
+active phase of the test can be ended early.
+
+Only samples written after the detector started are considered. The detector
+returns when, after at least the minimum duration, all the thermal zones and
+power sensors have been steady (see timetools.is_steady) over the last window,
+or in any case once the maximum duration elapsed. If a PID is given, SIGUSR1
+is sent to it before returning (i.e. the sampler prints the breakpoint).
+
+The exit status is EXIT_STEADY (zero) if the steady state was detected,
+EXIT_TIMEOUT (three) if the maximum duration elapsed before. Any other status
+(e.g. one, for an uncaught exception, or two, for wrong arguments) means that
+the detector failed and the caller should wait the full duration instead.
+"""
+
+import os
+import signal
+import sys
+import time
+
+import numpy    as np
+import pandas   as pd
+
+from modules import cmdargs
+from modules import powerfile
+from modules import tabletools
+from modules import timetools
+
+EXIT_STEADY     = 0
+EXIT_TIMEOUT    = 3
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    "options": [
+        {
+            'short': None,
+            'long': 'in_file',
+            'opts': {
+                'metavar': 'in-file',
+                'help': 'The power file the sampler is writing, either in '
+                    'text or binary format',
+                'type': str,
+            },
+        },
+        {
+            'short': '-m',
+            'long': '--min-duration',
+            'opts': {
+                'help': 'The minimum duration of the active phase, in seconds',
+                'type': float,
+                'default': 10.0,
+            },
+        },
+        {
+            'short': '-M',
+            'long': '--max-duration',
+            'opts': {
+                'help': 'The maximum duration of the active phase, in seconds',
+                'type': float,
+                'default': 40.0,
+            },
+        },
+        {
+            'short': '-w',
+            'long': '--window',
+            'opts': {
+                'help': 'The duration of the window in which all values must '
+                    'be steady, in seconds',
+                'type': float,
+                'default': 5.0,
+            },
+        },
+        {
+            'short': '-t',
+            'long': '--temp-tolerance',
+            'opts': {
+                'help': 'The maximum variation of each (smoothed) temperature '
+                    'within the window, in degrees Celsius',
+                'type': float,
+                'default': 0.5,
+            },
+        },
+        {
+            'short': '-P',
+            'long': '--power-tolerance',
+            'opts': {
+                'help': 'The maximum variation of each (smoothed) power value '
+                    'within the window, as a fraction of its mean',
+                'type': float,
+                'default': 0.05,
+            },
+        },
+        {
+            'short': '-p',
+            'long': '--pid',
+            'opts': {
+                'help': 'The PID of the sampler, signaled with SIGUSR1 before '
+                    'returning (default: none)',
+                'type': int,
+                'default': None,
+            },
+        },
+        {
+            'short': None,
+            'long': '--poll-interval',
+            'opts': {
+                'help': 'The interval between two checks, in seconds',
+                'type': float,
+                'default': 0.5,
+            },
+        },
+    ]
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def steady_columns(df):
+    """
+    Returns the temperature (in degrees Celsius) and power columns of the
+    given sampler table.
+    """
+    cols_temp, magnitude_temp = tabletools.select_sample_cols_temp(df.columns)
+    cols_power = tabletools.select_cols_endswith(
+        tabletools.select_cols_startwith(df.columns, 'sensor'), 'W')
+
+    temps = df[cols_temp] * magnitude_temp
+    return temps, df[cols_power]
+
+def is_table_steady(df, args):
+    """
+    Returns True if all temperatures and power values in the given samples
+    (the last window) are steady.
+    """
+    temps, powers = steady_columns(df)
+    if len(temps.columns) + len(powers.columns) < 1:
+        return False
+
+    for c in temps.columns:
+        if not timetools.is_steady(temps[c], args.temp_tolerance):
+            return False
+
+    for c in powers.columns:
+        if not timetools.is_steady(powers[c], args.power_tolerance,
+            relative=True):
+            return False
+
+    return True
+
+def window_rows(df):
+    """
+    Returns the samples of the given table, without the rows of the update
+    period and of the breakpoint.
+    """
+    mask = np.full(len(df.index), True)
+    for c in df.columns:
+        if c == 'breakpoint' or c.startswith('UPDATE_PERIOD_'):
+            mask &= df[c].isna().to_numpy()
+    return df[mask]
+
+def detect(args):
+    """
+    Returns True as soon as the steady state is detected (after the minimum
+    duration), False if the maximum duration elapses before.
+
+    Only the rows of the last window are kept: each check parses the samples
+    written since the previous one and appends them to the window.
+    """
+    start       = time.monotonic()
+    follower    = powerfile.PowerFileFollower(args.in_file, {}, max_rows=0)
+    window      = None
+
+    try:
+        while time.monotonic() - start < args.max_duration:
+            follower.poll()
+            df = window_rows(follower.get_new())
+
+            # Samples written before the detector started are ignored
+            if window is None:
+                window = df.iloc[:0]
+            elif window.empty:
+                window = df
+            elif len(df.index):
+                window = pd.concat([window, df], ignore_index=True)
+
+            if follower.period:
+                numsamples  = int(np.ceil(args.window / follower.period))
+                window      = window.tail(numsamples)
+
+                if time.monotonic() - start >= args.min_duration and \
+                    len(window.index) >= numsamples and \
+                    is_table_steady(window, args):
+                    return True
+
+            time.sleep(args.poll_interval)
+    finally:
+        follower.close()
+
+    return False
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    steady = detect(args)
+
+    if args.pid:
+        os.kill(args.pid, signal.SIGUSR1)
+
+    return EXIT_STEADY if steady else EXIT_TIMEOUT
+#-- main
+
+if __name__ == "__main__":
+    sys.exit(main())
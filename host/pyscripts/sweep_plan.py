@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+Order the configurations of an experiment (policy, frequency and task, as
+enumerated by run.sh from the confdir files) to minimize thermal transitions
+between consecutive tests.
+
+Configurations of the same policy are kept together (switching policy requires
+setting up the platform again) and, within each policy, they are run from the
+coldest to the hottest. The steady temperature of each configuration is
+predicted from the results of previous experiments, if any; configurations
+without a prediction are ordered by frequency (the hotter the higher).
+
+Each line of both the input and the output file is:
+    <policy> <frequency> <task index> <task name>
+"""
+
+import os
+
+import numpy    as np
+
+from modules import catalog
+from modules import cmdargs
+from modules import maketools
+from modules import powerfile
+from modules import tabletools
+from modules import timetools
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    "options": [
+        {
+            'short': None,
+            'long': 'in_file',
+            'opts': {
+                'metavar': 'in-file',
+                'help': 'The configurations to run, one per line, in the '
+                    'default order',
+                'type': str,
+            },
+        },
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The output file (the plan)',
+                'type': str,
+                'default': 'a.out',
+            },
+        },
+        {
+            'short': '-H',
+            'long': '--history',
+            'opts': {
+                'help': 'The results directory of previous experiments (the '
+                    'one containing the howmany_* directories), used to '
+                    'predict steady temperatures (default: none)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-n',
+            'long': '--howmany',
+            'opts': {
+                'help': 'The number of parallel tasks of the experiment; '
+                    'previous results with the same number are preferred',
+                'type': int,
+                'default': None,
+            },
+        },
+    ]
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def read_configurations(path):
+    confs = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 4:
+                continue
+            confs.append({
+                'policy':       fields[0],
+                'freq':         int(fields[1]),
+                'task_index':   int(fields[2]),
+                'task':         fields[3],
+            })
+    return confs
+
+def write_plan(confs, path):
+    def write(out_file):
+        with open(out_file, 'w') as f:
+            for c in confs:
+                f.write('{policy} {freq} {task_index} {task}\n'.format(**c))
+    maketools.safe_write(write, path)
+
+def steady_temperature(path):
+    """
+    Returns the steady temperature of the hottest thermal zone during the
+    active phase of the given power file (in degrees Celsius).
+    """
+    df = powerfile.read_powerfile(path, {})
+    df, _           = tabletools.extract_update_period(df)
+    df, breakpoint  = tabletools.extract_breakpoint(df)
+
+    if not np.isnan(breakpoint):
+        df = df.loc[:int(breakpoint)]
+
+    cols, magnitude = tabletools.select_sample_cols_temp(df.columns)
+    return max(
+        timetools.steady_value(df[c].dropna().to_numpy()) * magnitude
+        for c in cols
+    )
+
+def history_temperatures(history_dir):
+    """
+    Returns the steady temperature of each (howmany, policy, frequency, task)
+    found in the given results directory, using the last run of each.
+    """
+    last_runs = {}
+    df = catalog.load(history_dir)
+    for row in catalog.query(df, name='measure_power.txt').itertuples():
+        key = (int(row.howmany), row.island, int(row.frequency), row.task)
+        run = int(row.cpu)
+        if key not in last_runs or run > last_runs[key][0]:
+            last_runs[key] = (run, row.path)
+
+    temperatures = {}
+    for key, (_, path) in last_runs.items():
+        try:
+            temperatures[key] = steady_temperature(path)
+        except (OSError, ValueError, IndexError, KeyError):
+            # Incomplete or unreadable runs give no prediction
+            pass
+    return temperatures
+
+def predict_temperature(conf, temperatures, howmany):
+    """
+    Returns the predicted steady temperature of the given configuration, NaN if
+    it was never measured.
+    """
+    key = (conf['policy'], conf['freq'], conf['task'])
+    if (howmany, *key) in temperatures:
+        return temperatures[(howmany, *key)]
+
+    values = [v for k, v in temperatures.items() if k[1:] == key]
+    return np.mean(values) if values else np.nan
+
+def order_configurations(confs):
+    """
+    Returns the configurations grouped by policy and, within each policy,
+    sorted from the coldest to the hottest.
+    """
+    for i, c in enumerate(confs):
+        c['index'] = i
+
+    policies = {}
+    for c in confs:
+        policies.setdefault(c['policy'], []).append(c)
+
+    def policy_key(policy):
+        temps = [c['temp'] for c in policies[policy]]
+        known = np.all(~np.isnan(temps))
+        return (np.mean(temps) if known else np.inf, policies[policy][0]['index'])
+
+    def conf_key(c):
+        temp = c['temp'] if not np.isnan(c['temp']) else np.inf
+        return (temp, c['index'])
+
+    def conf_key_freq(c):
+        return (c['freq'], *conf_key(c))
+
+    plan = []
+    for policy in sorted(policies, key=policy_key):
+        group = policies[policy]
+        known = all(not np.isnan(c['temp']) for c in group)
+        plan += sorted(group, key=conf_key if known else conf_key_freq)
+
+    return plan
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    confs = read_configurations(args.in_file)
+
+    temperatures = {}
+    if args.history and os.path.isdir(args.history):
+        temperatures = history_temperatures(args.history)
+
+    for c in confs:
+        c['temp'] = predict_temperature(c, temperatures, args.howmany)
+
+    plan = order_configurations(confs)
+    write_plan(plan, args.out_file)
+
+    predicted = sum(1 for c in confs if not np.isnan(c['temp']))
+    print('Planned', len(plan), 'configurations,', predicted,
+        'with a predicted temperature')
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+"""
+Generate a synthetic results tree, with the same layout and file formats of
+the ones produced by the embedded component, to run and benchmark the host
+pipeline without a real board dataset (see modules/synthdata.py).
+
+The tree can be processed as any other, using the column map saved in its root:
+    build.sh -c <out-dir>/synth.cmap -C <out-dir>
+"""
+
+import os
+
+from modules import cmdargs
+from modules import synthdata
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    'options': [
+        {
+            'short': None,
+            'long': 'out_dir',
+            'opts': {
+                'metavar': 'out-dir',
+                'help': 'The root of the tree to generate',
+                'type': str,
+            },
+        },
+        {
+            'short': '-H',
+            'long': '--howmany',
+            'opts': {
+                'help': 'The numbers of parallel tasks',
+                'type': int,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['howmany'],
+            },
+        },
+        {
+            'short': '-p',
+            'long': '--policies',
+            'opts': {
+                'help': 'The policies',
+                'type': str,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['policies'],
+            },
+        },
+        {
+            'short': '-f',
+            'long': '--freqs',
+            'opts': {
+                'help': 'The frequencies (in kHz)',
+                'type': int,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['freqs'],
+            },
+        },
+        {
+            'short': '-t',
+            'long': '--tasks',
+            'opts': {
+                'help': 'The task names',
+                'type': str,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['tasks'],
+            },
+        },
+        {
+            'short': '-r',
+            'long': '--repetitions',
+            'opts': {
+                'help': 'The repetitions of each test (besides the warm-up)',
+                'type': int,
+                'default': synthdata.DEFAULTS['repetitions'],
+            },
+        },
+        {
+            'short': '-W',
+            'long': '--no-warmup',
+            'opts': {
+                'help': 'Do not write the 0 (warm-up) repetitions',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': '-P',
+            'long': '--period-us',
+            'opts': {
+                'help': 'The sampling period of the power sampler',
+                'type': int,
+                'default': synthdata.DEFAULTS['period_us'],
+            },
+        },
+        {
+            'short': '-a',
+            'long': '--active',
+            'opts': {
+                'help': 'The duration of the active phase of each test (in '
+                    'seconds)',
+                'type': float,
+                'default': synthdata.DEFAULTS['active_s'],
+            },
+        },
+        {
+            'short': '-c',
+            'long': '--cooldown',
+            'opts': {
+                'help': 'The duration of the cooldown phase of each test (in '
+                    'seconds)',
+                'type': float,
+                'default': synthdata.DEFAULTS['cooldown_s'],
+            },
+        },
+        {
+            'short': '-z',
+            'long': '--zones',
+            'opts': {
+                'help': 'The number of thermal zones (one per simulated core)',
+                'type': int,
+                'default': synthdata.DEFAULTS['zones'],
+            },
+        },
+        {
+            'short': '-n',
+            'long': '--cpus',
+            'opts': {
+                'help': 'The number of cpus reporting their frequency',
+                'type': int,
+                'default': synthdata.DEFAULTS['cpus'],
+            },
+        },
+        {
+            'short': '-s',
+            'long': '--power-sensors',
+            'opts': {
+                'help': 'The names of the power sensors, the first one '
+                    'measures the cores',
+                'type': str,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['power_sensors'],
+            },
+        },
+        {
+            'short': None,
+            'long': '--noise-temp',
+            'opts': {
+                'help': 'The standard deviation of the temperature noise (in '
+                    'degrees Celsius)',
+                'type': float,
+                'default': synthdata.DEFAULTS['noise_temp'],
+            },
+        },
+        {
+            'short': None,
+            'long': '--noise-power',
+            'opts': {
+                'help': 'The relative standard deviation of the power noise',
+                'type': float,
+                'default': synthdata.DEFAULTS['noise_power'],
+            },
+        },
+        {
+            'short': '-e',
+            'long': '--perf-events',
+            'opts': {
+                'help': 'The events in the time files',
+                'type': str,
+                'nargs': '+',
+                'default': synthdata.DEFAULTS['perf_events'],
+            },
+        },
+        {
+            'short': '-M',
+            'long': '--no-megadb',
+            'opts': {
+                'help': 'Do not write the thermal megadb of the simulated runs',
+                'action': 'store_true',
+            },
+        },
+        {
+            'short': None,
+            'long': '--seed',
+            'opts': {
+                'help': 'The seed of the noise',
+                'type': int,
+                'default': synthdata.DEFAULTS['seed'],
+            },
+        },
+    ],
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    spec = synthdata.make_spec(
+        howmany         = args.howmany,
+        policies        = args.policies,
+        freqs           = args.freqs,
+        tasks           = args.tasks,
+        repetitions     = args.repetitions,
+        warmup          = not args.no_warmup,
+        period_us       = args.period_us,
+        active_s        = args.active,
+        cooldown_s      = args.cooldown,
+        zones           = args.zones,
+        cpus            = args.cpus,
+        power_sensors   = args.power_sensors,
+        noise_temp      = args.noise_temp,
+        noise_power     = args.noise_power,
+        perf_events     = args.perf_events,
+        megadb          = not args.no_megadb,
+        seed            = args.seed,
+    )
+
+    tests, files = synthdata.generate_tree(args.out_dir, spec)
+    print('Generated', tests, 'tests,', files, 'files in',
+        os.path.realpath(args.out_dir))
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
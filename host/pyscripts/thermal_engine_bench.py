@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark accuracy and cost of the thermal model engines over a grid of
+workloads (see modules/enginebench.py).
+
+For each number of cores, number of time instants per run, stiffness regime and
+number of runs, each engine reports the wall time of an evaluation of the
+model, of the residual over all runs and of a fit, with its maximum deviation
+from a high-precision reference solution. The fastest accurate engine of each
+workload is marked as the best one.
+"""
+
+from modules import cmdargs
+from modules import enginebench
+from modules import maketools
+from modules import tempmodelmulticore as tpfit
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    'options': [
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The output file',
+                'type': str,
+                'default': 'a.out',
+            },
+        },
+        {
+            'short': '-e',
+            'long': '--engines',
+            'opts': {
+                'help': 'The model engines to benchmark (default: all)',
+                'type': str,
+                'nargs': '+',
+                'choices': list(tpfit.MODEL_ENGINES),
+                'default': None,
+            },
+        },
+        {
+            'short': '-c',
+            'long': '--cores',
+            'opts': {
+                'help': 'The numbers of cores',
+                'type': int,
+                'nargs': '+',
+                'default': [2, 4],
+            },
+        },
+        {
+            'short': '-p',
+            'long': '--points',
+            'opts': {
+                'help': 'The numbers of time instants of each run',
+                'type': int,
+                'nargs': '+',
+                'default': [50, 300],
+            },
+        },
+        {
+            'short': '-g',
+            'long': '--regimes',
+            'opts': {
+                'help': 'The stiffness regimes',
+                'type': str,
+                'nargs': '+',
+                'choices': list(enginebench.REGIMES),
+                'default': list(enginebench.REGIMES),
+            },
+        },
+        {
+            'short': '-r',
+            'long': '--runs',
+            'opts': {
+                'help': 'The numbers of runs fitted together',
+                'type': int,
+                'nargs': '+',
+                'default': [1, 4],
+            },
+        },
+        {
+            'short': None,
+            'long': '--horizon',
+            'opts': {
+                'help': 'The duration of each run (in seconds)',
+                'type': float,
+                'default': 30.0,
+            },
+        },
+        {
+            'short': None,
+            'long': '--fit-evals',
+            'opts': {
+                'help': 'The maximum number of evaluations of the residual in '
+                    'each fit (0 to skip fits)',
+                'type': int,
+                'default': 100,
+            },
+        },
+        {
+            'short': None,
+            'long': '--repeat',
+            'opts': {
+                'help': 'The number of times each evaluation is timed (the '
+                    'shortest time is reported)',
+                'type': int,
+                'default': 3,
+            },
+        },
+        {
+            'short': '-t',
+            'long': '--tolerance',
+            'opts': {
+                'help': 'The maximum deviation from the reference (in degrees '
+                    'Celsius) of an engine to be the best one of a workload',
+                'type': float,
+                'default': 1e-3,
+            },
+        },
+        {
+            'short': None,
+            'long': '--seed',
+            'opts': {
+                'help': 'The seed used to generate the runs',
+                'type': int,
+                'default': 0,
+            },
+        },
+    ],
+}
+
+#----------------------------------------------------------#
+#                           Main                           #
+#----------------------------------------------------------#
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    engines = args.engines if args.engines else list(tpfit.MODEL_ENGINES)
+
+    print('enginebench: benchmarking', ', '.join(engines))
+    outdf = enginebench.bench_matrix(engines,
+        args.cores, args.points, args.regimes, args.runs,
+        tolerance=args.tolerance,
+        horizon=args.horizon,
+        repeat=args.repeat,
+        fit_evals=args.fit_evals,
+        seed=args.seed,
+    )
+
+    print(outdf.to_string(index=False))
+    print(outdf[outdf['best']].groupby('engine').size()
+        .rename('best workloads'))
+
+    maketools.df_safe_to_csv(outdf, args.out_file)
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
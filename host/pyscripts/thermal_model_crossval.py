@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+Cross-validate the thermal model on the runs of a megadb.
+
+Runs are partitioned in k folds by runid, task or frequency. For each model
+engine and each fold, the model is fitted on the other folds and the RMS and
+maximum absolute temperature errors are measured on the held-out runs.
+"""
+
+from modules import cmdargs
+from modules import crossval
+from modules import maketools
+from modules import tempmodelmulticore as tpfit
+
+# +--------------------------------------------------------+
+# |          Command-line Arguments Configuration          |
+# +--------------------------------------------------------+
+
+cmdargs_conf = {
+    'options': [
+        {
+            'short': None,
+            'long': 'db_file',
+            'opts': {
+                'metavar': 'db-file',
+                'type': str,
+            },
+        },
+        {
+            'short': '-o',
+            'long': '--out-file',
+            'opts': {
+                'help': 'The output file',
+                'type': str,
+                'default': 'crossval.csv',
+            },
+        },
+        {
+            'short': '-k',
+            'long': '--folds',
+            'opts': {
+                'help': 'The number of folds',
+                'type': int,
+                'default': 5,
+            },
+        },
+        {
+            'short': '-b',
+            'long': '--by',
+            'opts': {
+                'help': 'How runs are partitioned in folds',
+                'type': str,
+                'choices': crossval.PARTITION_KEYS,
+                'default': 'runid',
+            },
+        },
+        {
+            'short': '-e',
+            'long': '--engine',
+            'opts': {
+                'help': 'The model engine to validate (can be repeated, '
+                    'default: all engines)',
+                'type': str,
+                'choices': list(tpfit.MODEL_ENGINES),
+                'action': 'append',
+                'dest': 'engines',
+            },
+        },
+        {
+            'short': '-m',
+            'long': '--method',
+            'opts': {
+                'help': 'The minimization method used to fit each fold',
+                'type': str,
+                'default': 'leastsq',
+            },
+        },
+        {
+            'short': '-s',
+            'long': '--seed',
+            'opts': {
+                'help': 'The seed used to shuffle runs before partitioning',
+                'type': int,
+                'default': 19940913,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'The number of parallel processes (default: all cpus)',
+                'type': int,
+                'default': None,
+            },
+        },
+        {
+            'short': None,
+            'long': '--cache-dir',
+            'opts': {
+                'help': 'The directory used to cache runs extracted from the '
+                    'db (default: the directory of the db)',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': None,
+            'long': '--cpu-num',
+            'opts': {
+                'help': 'The number of CPUs in the model',
+                'type': int,
+                'default': 4,
+            },
+        },
+    ],
+}
+
+def main():
+    args = cmdargs.parse_args(cmdargs_conf)
+
+    engines = args.engines if args.engines else list(tpfit.MODEL_ENGINES)
+
+    print('crossval: loading runs')
+    runs = crossval.load_runs(args.db_file,
+        cpu_num=args.cpu_num,
+        cache_dir=args.cache_dir,
+    )
+
+    print('crossval: validating %d runs' % len(runs))
+    outdf = crossval.cross_validate(runs, engines,
+        k=args.folds,
+        by=args.by,
+        seed=args.seed,
+        method=args.method,
+        cpu_num=args.cpu_num,
+        max_workers=args.jobs,
+    )
+
+    print(outdf[['engine', 'fold', 'heldout', 'rms_error', 'max_error']])
+    print(outdf.groupby('engine')[['rms_error', 'max_error', 'fit_time']]
+        .mean())
+
+    maketools.df_safe_to_csv(outdf, args.out_file)
+    return 0
+#-- main
+
+if __name__ == "__main__":
+    main()
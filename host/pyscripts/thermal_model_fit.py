@@ -13,8 +13,11 @@ plt.rcParams.update({
 plt.rcParams["axes.axisbelow"] = False
 
 
+from modules import bootstrap
 from modules import cmdargs
-from modules import tabletools
+from modules import maketools
+from modules import megadb
+from modules import plotting
 from modules import tempmodelmulticore as tpfit
 
 # +--------------------- PARAMETERS ---------------------+ #
@@ -29,6 +32,10 @@ SKIP_FIT        = False
 FIT_ASYMPTOTE   = False
 CPU_NUM         = 4
 PLOT            = True
+PLOT_EXT        = '.pdf'
+PLOT_DPI        = 300   # only used by raster formats (e.g. '.png')
+PLOT_MAX_POINTS = plotting.MAX_POINTS # points drawn per series
+NUISANCE        = None # ('dTe', 'kP') # per-run nuisance parameters
 
 # +--------------------------------------------------------+
 # |          Command-line Arguments Configuration          |
@@ -53,6 +60,35 @@ cmdargs_conf = {
                 'default': 'out',
             },
         },
+        {
+            'short': '-b',
+            'long': '--bootstrap',
+            'opts': {
+                'help': 'The number of bootstrap resamples used to estimate '
+                    'confidence intervals of the parameters (0 to disable)',
+                'type': int,
+                'default': 0,
+            },
+        },
+        {
+            'short': None,
+            'long': '--checkpoint',
+            'opts': {
+                'help': 'The file used to store (and resume) completed '
+                    'bootstrap resamples',
+                'type': str,
+                'default': None,
+            },
+        },
+        {
+            'short': '-j',
+            'long': '--jobs',
+            'opts': {
+                'help': 'The number of parallel processes (default: all cpus)',
+                'type': int,
+                'default': None,
+            },
+        },
     ],
     'required_options': [ ],
     'defaults': { }
@@ -61,121 +97,147 @@ cmdargs_conf = {
 RNG = np.random.default_rng(seed=SEED)
 
 def sample_runs(db, num_sample_runs):
-    runs = db.index.get_level_values('runid').max()+1
+    runs = db.runids().max()+1
     ids = np.sort(
         RNG.choice(runs, size=num_sample_runs, replace=True, shuffle=False)
     )
     print(ids)
-    return db.query('runid in @ids')
+    return db.select(np.isin(db.blocks['runid'].to_numpy(), ids))
 
 def sample_runs_per_tf(db, task, frequency):
-    db = db[db['task'] == task]
-    db = db[db['freq'] == frequency]
+    mask = db.mask(task=task, freq=frequency)
 
     # TODO: using only the ones in which the cpu0 is higher, so basically using
     # only one run
-    db = db.query('power_cpu0 > power_cpu1')
-    return db
+    mask &= (db.blocks['power_cpu0'] > db.blocks['power_cpu1']).to_numpy()
+    return db.select(mask)
+
+def plot_jobs(db, params, basename):
+    """
+    Returns the jobs of plot_run, one per active phase of each run in the db,
+    each one with its own output file.
+    """
+    jobs = []
+    for runid in tpfit.db_get_runids(db):
+        for runtype in tpfit.db_get_runtypes(db):
+            if runtype == 'cooldown':
+                continue
+            selection   = tpfit.db_select_run(db, runid, runtype)
+            t           = tpfit.db_get_t(selection)
+            inputs      = tpfit.db_get_inputs(selection, CPU_NUM)
+            inputs      = tpfit.apply_nuisance(inputs,
+                **tpfit.pars2nuisance(params, runid))
+            data        = tpfit.db_get_data(selection, CPU_NUM)
+
+            task        = selection['task'].to_numpy()[0]
+            freq        = selection['freq'].to_numpy()[0]
+
+            out_file = plotting.out_path(basename,
+                ['run%d' % runid, task, freq], PLOT_EXT)
+            jobs.append((out_file, params, t, inputs, data))
+    return jobs
+
+def plot_run(out_file, params, t, inputs, data):
+    """
+    Plots the measured temperatures of a run against the simulated ones and
+    saves the figure in out_file.
+    """
+    model = MODEL(params, t, inputs)
+
+    fig = plt.figure()
+    ax = fig.gca()
+
+    linewidth_base = 1.2
+
+    for i in range(CPU_NUM):
+        ax.plot(*plotting.decimate(t, data[i, :], PLOT_MAX_POINTS),
+            label='Measured CPU %d' % i)
+    for i in range(CPU_NUM):
+        ax.plot(*plotting.decimate(t - 0.5, model[i, :], PLOT_MAX_POINTS),
+            label='Simulated CPU %d' % i)
+    legend = ax.legend(
+        # title='CPU Temperature',
+        loc='lower right',
+        fancybox=False,
+        edgecolor='black',
+        bbox_to_anchor=(0.975, 0.05),
+        ncol=2,
+        columnspacing=1,
+        labelspacing=0.35,
+    )
+
+    frame = legend.get_frame()
+    frame.set_linewidth(linewidth_base)
+
+    ax.set_xlabel('Time [ s ]', fontsize=12, labelpad=10)
+    ax.set_ylabel('Core Temperature [ °C ]', fontsize=12, labelpad=10)
+
+    ax.set_xlim(0, 32)
+    ax.set_ylim(35.1, 57)
+    ax.grid()
+
+    for axis in ['top', 'bottom', 'left', 'right']:
+        ax.spines[axis].set_linewidth(1.5 * linewidth_base)
+
+    ax.tick_params(
+        direction='in',
+        length=8,
+        width=1.4 * linewidth_base,
+        grid_color='black',
+        left=True,
+        right=True,
+        bottom=True,
+        zorder=1,
+        top=True,
+        grid_alpha=.2,
+        grid_linewidth=.5 * linewidth_base)
+
+    # fig.tight_layout()
+
+    fig.savefig(out_file,
+        dpi=PLOT_DPI,
+        # Plot will be occupy a maximum of available space
+        bbox_inches='tight',
+        )
+    plt.close(fig)
 
 def main():
     args = cmdargs.parse_args(cmdargs_conf)
 
     print('modelfit: creating db')
-    megadb = tabletools.pd_read_csv(args.db_file)
-    megadb = megadb.set_index(['runid', 'type', 'time'])
+    db = megadb.read(args.db_file)
 
     print('modelfit: sampling')
     if TASK and FREQ:
-        sampledb = sample_runs_per_tf(megadb, TASK, FREQ)
+        sampledb = sample_runs_per_tf(db, TASK, FREQ)
     else:
-        sampledb = sample_runs(megadb, NUM_SAMPLE_RUNS)
+        sampledb = sample_runs(db, NUM_SAMPLE_RUNS)
 
     print('modelfit: fitting')
-    params = tpfit.fit_temp_multirun(sampledb, MODEL,
+    params = tpfit.fit_temp_multirun(sampledb.frame(), MODEL,
         skip_fit=SKIP_FIT,
         fit_asymptote=FIT_ASYMPTOTE,
+        nuisance=NUISANCE,
+        )
+
+    if args.bootstrap > 0:
+        print('modelfit: bootstrapping')
+        intervals = bootstrap.bootstrap_fit(sampledb, MODEL, params,
+            num_resamples=args.bootstrap,
+            seed=SEED,
+            checkpoint_file=args.checkpoint,
+            max_workers=args.jobs,
+            method=METHOD,
+            cpu_num=CPU_NUM,
         )
+        print(intervals)
+        maketools.df_safe_to_csv(intervals, args.out_file + '_bootstrap.csv')
 
     if PLOT:
         print('modelfit: plotting comparisons')
-        runids   = tpfit.db_get_runids(sampledb)
-        runtypes = tpfit.db_get_runtypes(sampledb)
-
-        for runid in runids:
-            for runtype in runtypes:
-                if runtype == 'cooldown':
-                    continue
-                selection   = tpfit.db_select_run(sampledb, runid, runtype)
-                t           = tpfit.db_get_t(selection)
-                inputs      = tpfit.db_get_inputs(selection, CPU_NUM)
-                data        = tpfit.db_get_data(selection, CPU_NUM)
-
-                task        = selection['task'].to_numpy()[0]
-                freq        = selection['freq'].to_numpy()[0]
-                i_p         = np.argmax(inputs['P'])
-
-                print('Plotting ', runid, task, freq, i_p)
-
-                model = MODEL(params, t, inputs)
-
-                fig = plt.figure()
-                ax = fig.gca()
-
-                linewidth_base = 1.2
-
-                for i in range(CPU_NUM):
-                    ax.plot(t, data[i, :],  label='Measured CPU %d' % i)
-                for i in range(CPU_NUM):
-                    ax.plot(t - 0.5, model[i, :], label='Simulated CPU %d' % i)
-                legend = plt.legend(
-                    # title='CPU Temperature',
-                    loc='lower right',
-                    fancybox=False,
-                    edgecolor='black',
-                    bbox_to_anchor=(0.975, 0.05),
-                    ncol=2,
-                    columnspacing=1,
-                    labelspacing=0.35,
-                )
-
-                frame = legend.get_frame()
-                frame.set_linewidth(linewidth_base)
-
-                plt.xlabel('Time [ s ]', fontsize=12, labelpad=10)
-                plt.ylabel('Core Temperature [ °C ]', fontsize=12, labelpad=10)
-
-                plt.xlim(0, 32)
-                plt.ylim(35.1, 57)
-                plt.grid()
-
-                for axis in ['top', 'bottom', 'left', 'right']:
-                    ax.spines[axis].set_linewidth(1.5 * linewidth_base)
-
-                plt.tick_params(
-                    direction='in',
-                    length=8,
-                    width=1.4 * linewidth_base,
-                    grid_color='black',
-                    left=True,
-                    right=True,
-                    bottom=True,
-                    zorder=1,
-                    top=True,
-                    grid_alpha=.2,
-                    grid_linewidth=.5 * linewidth_base)
-
-                # plt.tight_layout()
-
-                plt.savefig("graph.pdf",
-                    #This is simple recomendation for publication plots
-                    dpi=1000,
-                    # Plot will be occupy a maximum of available space
-                    bbox_inches='tight',
-                    )
-
-                # plt.show()
-
-                plt.clf()
+        jobs = plot_jobs(sampledb.frame(), params, args.out_file)
+        failures = plotting.render(plot_run, jobs, args.jobs)
+        print('modelfit: plotted', len(jobs) - failures, 'runs')
 
     return 0
 #-- main